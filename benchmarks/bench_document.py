@@ -0,0 +1,61 @@
+"""
+Compares the memory of the input deck as list of lines (the former model of the default mode) with the KeywordDocument,
+and measures the peak memory and time of encrypt_file in the default mode.
+
+usage: python3 bench_document.py [number of nodes and elements] [number of curves]
+"""
+import os
+import sys
+import logging
+import tempfile
+import tracemalloc
+
+from bench_utils import throwaway_gnupg_home, timeit
+from deck_generator import generate_deck
+import encrypt_lsdyna
+from encrypt_lsdyna import LS_Dyna_Encryptor, KeywordDocument, KeywordMatcher
+
+
+def traced(func, *args, **kwargs):
+    """
+    Calls func and returns its result, the elapsed time and the peak of the memory allocated by Python in bytes.
+    """
+    tracemalloc.start()
+    try:
+        result, elapsed = timeit(func, *args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def read_lines(path) -> list:
+    with open(path, 'r', encoding='utf-8', errors='ignore') as infile:
+        return infile.read().splitlines()
+
+
+def main():
+    mesh = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    curves = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    encrypt_lsdyna.sh_logger.setLevel(logging.WARNING)
+    with throwaway_gnupg_home(), tempfile.TemporaryDirectory() as work_dir:
+        deck = generate_deck(os.path.join(work_dir, 'deck.k'), curves=curves, tables=0, points=50, nodes=mesh, elements=mesh, seed=1)
+        size = deck.stat().st_size
+        print(f"deck: {size / 1e6:.1f} MB, {2 * mesh + 50 * curves} lines")
+
+        lines, elapsed, peak = traced(read_lines, deck)
+        print(f"list of lines:   {elapsed:7.3f} s, peak {peak / 1e6:8.1f} MB ({peak / size:.1f} x file size)")
+        del lines
+        document, elapsed, peak = traced(KeywordDocument.read, deck, KeywordMatcher(LS_Dyna_Encryptor.DEFAULT_KEYWORDS_TO_ENCRYPT))
+        print(f"KeywordDocument: {elapsed:7.3f} s, peak {peak / 1e6:8.1f} MB ({peak / size:.1f} x file size), {len(document)} blocks")
+        del document
+
+        lde = LS_Dyna_Encryptor(inputfile=str(deck), expiry_date='0', overwrite=True)
+        lde.show_progress = False
+        _, elapsed, peak = traced(lde.encrypt_file)
+        print(f"encrypt_file:    {elapsed:7.3f} s, peak {peak / 1e6:8.1f} MB ({peak / size:.1f} x file size), stages {lde.profile.stages}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Compares the blocks per second of the per-block gpg call with the batched gpg session.
+
+usage: python3 bench_gpg_batch.py [number of blocks] [points per curve]
+"""
+import os
+import sys
+import tempfile
+
+from bench_utils import throwaway_gnupg_home, make_curve, make_encryptor, timeit
+
+
+def main():
+    num_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    blocks = [make_curve(i, points) for i in range(num_blocks)]
+    with throwaway_gnupg_home(), tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        lde = make_encryptor(work_dir)
+
+        # the per-block path calls gpg (and rm) once for every keyword
+        _, per_block = timeit(lambda: [lde.encrypt_actual_data(block) for block in blocks])
+        # the batched path encrypts all keywords with one gpg session
+        payloads = [lde.build_payload(block) for block in blocks]
+        _, batched = timeit(lde.backend.encrypt_many, payloads)
+
+    print(f"{num_blocks} blocks with {points} points each")
+    print(f"per-block subprocess: {per_block:8.3f} s  {num_blocks / per_block:10.1f} blocks/s")
+    print(f"batched gpg session:  {batched:8.3f} s  {num_blocks / batched:10.1f} blocks/s")
+    print(f"speedup:              {per_block / batched:8.1f} x")
+
+
+if __name__ == '__main__':
+    main()
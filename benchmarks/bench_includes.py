@@ -0,0 +1,64 @@
+"""
+Measures the resolution of *INCLUDE trees by LS_Dyna_Include_Encryptor: several masters include a common set of material files (each with curves)
+and a mesh of their own. Every file is read and indexed once, the files of one level of the trees in parallel. Then the trees are encrypted once
+with the native backend (the keys shipped with the encryptor) and the merged decks are checked to contain every curve of their materials as an armor.
+
+usage: python3 bench_includes.py [masters] [shared material files] [workers ...]
+"""
+import os
+import sys
+import logging
+import pathlib
+import tempfile
+
+from bench_utils import make_curve, timeit
+from deck_generator import generate_deck
+import encrypt_lsdyna
+from encrypt_lsdyna import LS_Dyna_Include_Encryptor
+
+
+def write_tree(work_dir: str, num_masters: int, num_materials: int) -> list:
+    """
+    Writes the masters, their meshes and the shared material files. Returns the paths of the masters.
+    """
+    root = pathlib.Path(work_dir, 'model')
+    (root / 'materials').mkdir(parents=True)
+    for material in range(num_materials):
+        curves = [line for curve_id in range(100 * material + 1, 100 * material + 51) for line in make_curve(curve_id, 200)]
+        (root / 'materials' / f"mat_{material}.k").write_text('\n'.join(['*KEYWORD', *curves, '*END']) + '\n')
+    masters = []
+    for master in range(num_masters):
+        generate_deck(root / f"mesh_{master}.k", curves=0, tables=0, nodes=100000, elements=100000, seed=master)
+        includes = [f"mesh_{master}.k", *(f"materials/mat_{material}.k" for material in range(num_materials))]
+        masters.append(root / f"master_{master}.k")
+        masters[-1].write_text('\n'.join(['*KEYWORD', '*INCLUDE', *includes, '*END']) + '\n')
+    return masters
+
+
+def main():
+    num_masters = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    num_materials = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    all_workers = [int(arg) for arg in sys.argv[3:]] or [1, 4]
+
+    encrypt_lsdyna.sh_logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as work_dir:
+        masters = write_tree(work_dir, num_masters, num_materials)
+        references = num_masters * (num_materials + 2)
+        size = sum(path.stat().st_size for path in pathlib.Path(work_dir, 'model').rglob('*.k'))
+        print(f"{num_masters} masters, {num_materials} shared material files, {references} files referenced, {size / 1e6:.1f} MB")
+        for workers in all_workers:
+            pipeline, elapsed = timeit(LS_Dyna_Include_Encryptor, inputs=[str(master) for master in masters], outdir=os.path.join(work_dir, 'out'),
+                                       mode='merge', expiry_date='0', max_workers=workers)
+            print(f"  {workers} worker(s): {len(pipeline.inputfiles)} files to encrypt, resolved in {elapsed:.3f} s")
+
+        pipeline = LS_Dyna_Include_Encryptor(inputs=[str(master) for master in masters], outdir=os.path.join(work_dir, 'out'), mode='merge', expiry_date='0',
+                                             max_workers=all_workers[-1], backend='native', reuse_session_key=True)
+        _, elapsed = timeit(pipeline.encrypt_files)
+        armors = [pipeline.merged_outfile(master).read_bytes().count(b'-----BEGIN PGP MESSAGE-----') for master in masters]
+        assert not pipeline.failed_files, pipeline.failed_files
+        assert armors == [50 * num_materials] * num_masters, armors
+        print(f"  merged and encrypted in {elapsed:.3f} s, {sum(armors)} encrypted curves in the merged decks")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Measures how the block encryption scales with the number of parallel gpg sessions (max_workers / --jobs).
+
+usage: python3 bench_jobs.py [number of blocks] [maximum number of workers]
+"""
+import os
+import sys
+import tempfile
+
+from bench_utils import throwaway_gnupg_home, make_curve, make_encryptor, timeit
+
+
+def main():
+    num_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    max_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    blocks = [make_curve(i, 50) for i in range(num_blocks)]
+    with throwaway_gnupg_home(), tempfile.TemporaryDirectory() as work_dir:
+        lde = make_encryptor(work_dir)
+        payloads = [lde.build_payload(block) for block in blocks]
+
+        print(f"{num_blocks} blocks, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'time [s]':>10} {'blocks/s':>10} {'speedup':>8}")
+        serial = None
+        jobs = 1
+        while jobs <= max_jobs:
+            lde.max_workers = jobs
+            _, elapsed = timeit(lde.encrypt_payloads, payloads)
+            serial = serial or elapsed
+            print(f"{jobs:8d} {elapsed:10.3f} {num_blocks / elapsed:10.1f} {serial / elapsed:8.2f}")
+            jobs *= 2
+
+
+if __name__ == '__main__':
+    main()
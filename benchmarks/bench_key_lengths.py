@@ -0,0 +1,46 @@
+"""
+Measures the encryption of one deck for both LS-Dyna keys: two runs (one per key length) against one run with key_length=(1024, 2048), which reads
+and scans the deck once and encrypts for both keys in parallel. gpg uses the temporary GnuPG home of the KeyRegistry (keyring='ephemeral'),
+so the keyring of the user is not needed.
+
+usage: python3 bench_key_lengths.py [presets ...]
+"""
+import os
+import sys
+import logging
+import tempfile
+
+from bench_utils import timeit
+from bench_suite import PRESETS
+from deck_generator import generate_deck
+import encrypt_lsdyna
+from encrypt_lsdyna import LS_Dyna_Encryptor, KeyRegistry
+
+
+def encrypt(deck, work_dir: str, key_length, backend: str, **kwargs):
+    lde = LS_Dyna_Encryptor(inputfile=str(deck), outfile=os.path.join(work_dir, f"{deck.name}.asc"), expiry_date='0', key_length=key_length,
+                            overwrite=True, backend=backend, keyring='ephemeral')
+    lde.show_progress = False
+    lde.encrypt_file(**kwargs)
+
+
+def main():
+    presets = sys.argv[1:] or ['small', 'curves']
+
+    encrypt_lsdyna.sh_logger.setLevel(logging.WARNING)
+    # the keys are parsed and imported once per process, this is not part of the runs
+    _, elapsed = timeit(KeyRegistry.gnupg_home)
+    print(f"LS-Dyna keys imported into a temporary GnuPG home in {elapsed:.3f} s")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for preset in presets:
+            deck = generate_deck(os.path.join(work_dir, f"{preset}.k"), **PRESETS[preset])
+            print(f"{preset}: {deck.stat().st_size / 1e6:.1f} MB")
+            for backend in ('gpg', 'native'):
+                for mode, kwargs in (('list', {}), ('mmap', {'mapped': True})):
+                    two_runs = sum(timeit(encrypt, deck, work_dir, key_length, backend, **kwargs)[1] for key_length in (1024, 2048))
+                    _, one_run = timeit(encrypt, deck, work_dir, (1024, 2048), backend, **kwargs)
+                    print(f"  {backend:<6} {mode:<4}  two runs {two_runs:7.3f} s   one run for both keys {one_run:7.3f} s   {two_runs / one_run:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Measures the keyword index of a KeywordFile: building it, loading it from the index file and the KeywordDocument of the encryptor from the index
+instead of scanning the whole file. Also compares the lookup of a curve by its id with a scan of all blocks.
+
+usage: python3 bench_keyword_file.py [presets ...]
+"""
+import os
+import sys
+import statistics
+import tempfile
+
+from bench_utils import timeit
+from bench_suite import PRESETS
+from deck_generator import generate_deck
+from encrypt_lsdyna import LS_Dyna_Encryptor_Base, KeywordDocument, KeywordFile
+
+
+def median_time(func, *args, repeat: int = 5) -> float:
+    return statistics.median(timeit(func, *args)[1] for _ in range(repeat))
+
+
+def load_index(path) -> KeywordFile:
+    keyword_file = KeywordFile(path)
+    keyword_file.index
+    return keyword_file
+
+
+def scan_for_id(path, matcher, curve_id: str):
+    # without index: every block is scanned and the id card of every curve is decoded
+    with open(path, 'rb') as infile:
+        buffer = infile.read()
+    for start, end, _ in matcher.scan_buffer(buffer):
+        cards = KeywordFile.read_cards(buffer, start, end, 1)
+        if len(cards) > 1 and cards[1].split()[:1] == [curve_id]:
+            return start, end
+
+
+def main():
+    presets = sys.argv[1:] or ['small', 'curves', 'medium']
+
+    encryptor = LS_Dyna_Encryptor_Base()
+    matcher = encryptor.keyword_matcher
+    print(f"{'preset':<8} {'MB':>6} {'keywords':>8}  {'scan':>9} {'build index':>12} {'load index':>11} {'from index':>11}  {'id: scan':>9} {'find':>9}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for preset in presets:
+            deck = generate_deck(os.path.join(work_dir, f"{preset}.k"), **PRESETS[preset])
+            megabytes = deck.stat().st_size / 1e6
+            curve_id = str(PRESETS[preset]['curves'])
+
+            keyword_file = KeywordFile(deck, cache_index=False)
+            build = median_time(keyword_file.build_index)
+            load_index(deck)
+            load = median_time(load_index, deck)
+            keyword_file = load_index(deck)
+            scan = median_time(KeywordDocument.read, deck, matcher)
+            from_index = median_time(lambda: KeywordDocument.read(deck, matcher, blocks=load_index(deck).iter_blocks(matcher)))
+            assert KeywordDocument.read(deck, matcher).blocks == KeywordDocument.read(deck, matcher, blocks=keyword_file.iter_blocks(matcher)).blocks
+
+            assert scan_for_id(deck, matcher, curve_id) == keyword_file.find('*DEFINE_CURVE', curve_id)[:2]
+            id_scan = median_time(scan_for_id, deck, matcher, curve_id)
+            keyword_file.find('*DEFINE_CURVE', curve_id)
+            find = median_time(keyword_file.find, '*DEFINE_CURVE', curve_id)
+            print(f"{preset:<8} {megabytes:6.1f} {len(keyword_file):8d}  {scan * 1000:6.1f} ms {build * 1000:9.1f} ms {load * 1000:8.1f} ms {from_index * 1000:8.1f} ms"
+                  f"  {id_scan * 1000:6.1f} ms {find * 1e6:6.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Checks the native OpenPGP backend against gpg and compares the blocks per second of both backends.
+
+A DSA/ElGamal test key is generated in the throwaway GnuPG home, so the messages of the native backend can be decrypted by gpg (the secret
+keys of LS-Dyna are of course not available). Every message has to decrypt to the original payload and has to have the same packet structure
+as a message of gpg. The packet structure of messages for the LS-Dyna keys is checked as well.
+
+usage: python3 bench_native_backend.py [number of blocks] [points per curve]
+"""
+import re
+import sys
+import subprocess
+
+from bench_utils import throwaway_gnupg_home, make_curve, timeit
+from encrypt_lsdyna import LS_Dyna_Encryptor, GpgBackend, NativeOpenPGPBackend
+
+
+def generate_test_key() -> str:
+    # DSA/ElGamal like the LS-Dyna keys, without passphrase
+    subprocess.run(['gpg', '--batch', '--passphrase', '', '--quick-gen-key', 'Native Backend Test <native@example.com>', 'dsa1024', 'sign', 'never'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    fingerprint = re.search(r'^fpr:+([0-9A-F]+):', gpg('--with-colons', '--list-keys', 'native@example.com'), re.M).group(1)
+    subprocess.run(['gpg', '--batch', '--passphrase', '', '--quick-add-key', fingerprint, 'elg1024', 'encr', 'never'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return fingerprint
+
+
+def gpg(*args, message: str = None) -> str:
+    result = subprocess.run(['gpg', '--batch', *args], input=message, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return result.stdout
+
+
+def packet_structure(message: str) -> list:
+    # tag and version/algorithm of the packets, but nothing that changes from message to message
+    listing = gpg('--list-packets', '--ignore-mdc-error', message=message)
+    return re.findall(r'^:(pubkey enc packet: version \d+, algo \d+|encrypted data packet|literal data packet)[:,]', listing, re.M)
+
+
+def main():
+    num_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    payloads = ['\n'.join(make_curve(i, points)).encode() + b'\n' for i in range(num_blocks)]
+    with throwaway_gnupg_home():
+        fingerprint = generate_test_key()
+        public_key = gpg('--armor', '--export', fingerprint)
+        native = NativeOpenPGPBackend(recipient=fingerprint[-8:], public_keys=[public_key])
+
+        for payload in payloads[:10]:
+            message = '\n'.join(native.encrypt(payload)) + '\n'
+            decrypted = subprocess.run(['gpg', '--batch', '--ignore-mdc-error', '--decrypt'], input=message.encode(), stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL).stdout
+            assert decrypted.replace(b'\r\n', b'\n') == payload, "gpg could not decrypt the message of the native backend"
+        print("round trip: gpg decrypts the messages of the native backend")
+
+        for recipient in LS_Dyna_Encryptor.LS_DYNA_USER_IDS.values():
+            expected = packet_structure('\n'.join(GpgBackend(recipient=recipient).encrypt(payloads[0])))
+            actual = packet_structure('\n'.join(NativeOpenPGPBackend(recipient=recipient).encrypt(payloads[0])))
+            assert actual == expected, f"packet structure for {recipient}: {actual} != {expected}"
+            print(f"packet structure for {recipient} is the same as of gpg: {', '.join(actual)}")
+
+            for backend in (GpgBackend(recipient=recipient), NativeOpenPGPBackend(recipient=recipient)):
+                _, elapsed = timeit(backend.encrypt_many, payloads)
+                print(f"  {backend.name:<7} {num_blocks} blocks with {points} points: {elapsed:8.3f} s  {num_blocks / elapsed:10.1f} blocks/s")
+
+
+if __name__ == '__main__':
+    main()
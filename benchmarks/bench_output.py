@@ -0,0 +1,71 @@
+"""
+Measures the output stage: the lines of an armored outfile written the former way (text mode, one write per line) and by AtomicOutputFile
+(chunks of about 1 MB, temporary file and os.replace), also with the compressed copies. The encryption itself is not measured.
+
+usage: python3 bench_output.py [MB of output ...]
+"""
+import os
+import sys
+import base64
+import random
+import importlib.util
+import statistics
+import tempfile
+
+from bench_utils import timeit
+from encrypt_lsdyna import AtomicOutputFile
+
+# zstd only if the package zstandard is installed
+COMPRESSIONS = ('gzip', 'zstd') if importlib.util.find_spec('zstandard') is not None else ('gzip',)
+
+
+def armored_lines(megabytes: float) -> list:
+    # random base64 lines of 64 characters like in a PGP message (so they compress like one), with a keyword in clear text every 1000 lines
+    text = base64.b64encode(random.Random(0).randbytes(int(megabytes * 1e6 * 48 / 65))).decode()
+    lines = [text[start:start + 64] for start in range(0, len(text), 64)]
+    lines[::1000] = ['*DEFINE_CURVE'] * len(lines[::1000])
+    return lines
+
+
+def former_write(path: str, lines: list):
+    with open(path, 'w', encoding='utf-8', errors='ignore') as outfile:
+        outfile.writelines(line + '\n' for line in lines)
+
+
+def atomic_write(path: str, lines: list, compress: tuple = ()) -> AtomicOutputFile:
+    with AtomicOutputFile(path, compress=compress) as outfile:
+        outfile.write_lines(lines)
+    return outfile
+
+
+def median_time(func, *args, repeat: int = 5) -> float:
+    return statistics.median(timeit(func, *args)[1] for _ in range(repeat))
+
+
+def main():
+    all_megabytes = [float(arg) for arg in sys.argv[1:]] or [10, 100]
+
+    header = f"{'MB':>6}  {'former [MB/s]':>13} {'atomic':>8}" + ''.join(f" {compression:>8} {'ratio':>6}" for compression in COMPRESSIONS)
+    print(header)
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'out.k.asc')
+        for megabytes in all_megabytes:
+            lines = armored_lines(megabytes)
+            former_write(path, lines)
+            size = os.path.getsize(path) / 1e6
+            with open(path, 'rb') as former:
+                expected = former.read()
+            atomic_write(path, lines)
+            with open(path, 'rb') as atomic:
+                assert atomic.read() == expected
+
+            row = f"{size:6.1f}  {size / median_time(former_write, path, lines):13.1f} {size / median_time(atomic_write, path, lines):8.1f}"
+            for compression in COMPRESSIONS:
+                outfile = atomic_write(path, lines, (compression,))
+                elapsed = median_time(atomic_write, path, lines, (compression,), repeat=3)
+                row += f" {size / elapsed:8.1f} {outfile.compressed_bytes[compression] / outfile.bytes_written:6.2f}"
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures the scan throughput that the partial mode adds: the index of a KeywordDocument with and without the search for the cards in clear text,
+and the line based split of the streaming mode. The encryption itself is not measured.
+
+usage: python3 bench_partial.py [presets ...]
+"""
+import os
+import sys
+import statistics
+import tempfile
+
+from bench_utils import timeit
+from bench_suite import PRESETS
+from deck_generator import generate_deck
+from encrypt_lsdyna import LS_Dyna_Encryptor_Base, KeywordDocument
+
+
+def median_time(func, *args, repeat: int = 5) -> float:
+    return statistics.median(timeit(func, *args)[1] for _ in range(repeat))
+
+
+def split_all(encryptor, lines: list):
+    for to_encrypt, data in encryptor.iter_keyword_segments(lines):
+        if to_encrypt:
+            encryptor.split_keyword(data)
+
+
+def main():
+    presets = sys.argv[1:] or ['small', 'curves', 'medium']
+
+    whole = LS_Dyna_Encryptor_Base()
+    partial = LS_Dyna_Encryptor_Base()
+    partial.partial = True
+    print(f"{'preset':<8} {'MB':>6} {'blocks':>7}  {'index [MB/s]':>12} {'partial':>8}  {'lines [MB/s]':>12} {'partial':>8}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for preset in presets:
+            deck = generate_deck(os.path.join(work_dir, f"{preset}.k"), **PRESETS[preset])
+            buffer = deck.read_bytes()
+            lines = buffer.decode().splitlines()
+            megabytes = len(buffer) / 1e6
+
+            document = KeywordDocument(buffer, partial.keyword_matcher, partial.clear_cards)
+            index = median_time(KeywordDocument, buffer, whole.keyword_matcher)
+            index_partial = median_time(KeywordDocument, buffer, partial.keyword_matcher, partial.clear_cards)
+            split = median_time(split_all, whole, lines)
+            split_partial = median_time(split_all, partial, lines)
+            print(f"{preset:<8} {megabytes:6.1f} {len(document):7d}  {megabytes / index:12.1f} {megabytes / index_partial:8.1f}"
+                  f"  {megabytes / split:12.1f} {megabytes / split_partial:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures the building of the payload (*VENDOR, DATE, data, *VENDOR_END) for very large keywords, without the encryption itself.
+
+The former ways are kept here as reference: a list of lines with a '\\n' appended to every line and the *VENDOR lines inserted
+in front of it, and for the document model a copy of the block plus two concatenations.
+
+usage: python3 bench_payload.py [points per curve ...]
+"""
+import sys
+import statistics
+from datetime import datetime
+
+from bench_utils import make_curve, timeit
+from encrypt_lsdyna import LS_Dyna_Encryptor_Base, KeywordDocument, KeywordMatcher
+
+
+def former_lines_payload(encryptor, enc_data: list) -> bytes:
+    enc_data = list(enc_data)
+    enc_data.insert(0, encryptor.vendor_message)
+    enc_data.insert(0, f"DATE      {encryptor.expiry_date.strftime('%m/%d/%Y')}")
+    enc_data.insert(0, "*VENDOR")
+    enc_data.append("*VENDOR_END")
+    return ''.join(tte + '\n' for tte in enc_data).encode('utf-8', errors='ignore')
+
+
+def former_document_payload(encryptor, document: KeywordDocument, start: int, data_end: int) -> bytes:
+    data = document.buffer[start:data_end]
+    if not data.endswith(b'\n'):
+        data += b'\n'
+    vendor = f"*VENDOR\nDATE      {encryptor.expiry_date.strftime('%m/%d/%Y')}\n{encryptor.vendor_message}\n".encode('utf-8', errors='ignore')
+    return vendor + data + b"*VENDOR_END\n"
+
+
+def median_time(func, *args, repeat: int = 5) -> float:
+    return statistics.median(timeit(func, *args)[1] for _ in range(repeat))
+
+
+def main():
+    all_points = [int(arg) for arg in sys.argv[1:]] or [100000, 250000, 1000000]
+
+    encryptor = LS_Dyna_Encryptor_Base()
+    encryptor.expiry_date = datetime(2030, 1, 1)
+    print(f"{'points':>9} {'MB':>7}  {'lines: former':>14} {'now':>9}  {'document: former':>17} {'now':>9}")
+    for points in all_points:
+        lines = make_curve(1, points)
+        document = KeywordDocument(('\n'.join(lines) + '\n$ comment\n').encode(), KeywordMatcher(['*DEFINE_CURVE']))
+        _, start, data_end, _ = next(document.iter_blocks())
+        prologue, epilogue = (text.encode() for text in encryptor.vendor_wrapping())
+
+        payload = encryptor.build_payload(lines)
+        assert payload == former_lines_payload(encryptor, lines) == former_document_payload(encryptor, document, start, data_end)
+        assert payload == document.block_payload(start, data_end, prologue, epilogue)
+
+        times = [median_time(former_lines_payload, encryptor, lines), median_time(encryptor.build_payload, lines),
+                 median_time(former_document_payload, encryptor, document, start, data_end),
+                 median_time(document.block_payload, start, data_end, prologue, epilogue)]
+        print(f"{points:9d} {len(payload) / 1e6:7.1f}  {times[0] * 1000:11.2f} ms {times[1] * 1000:6.2f} ms  {times[2] * 1000:14.2f} ms {times[3] * 1000:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark of the keyword scan in lines per second.
+
+Compares the scan loop of version 1.0.0 (line.upper().startswith(tuple(...)) for every line) with the compiled KeywordMatcher.
+
+usage: python3 bench_scanner.py [number of lines in millions]
+"""
+import sys
+
+from bench_utils import make_curve, timeit
+from encrypt_lsdyna import KeywordMatcher
+
+KEYWORDS = ['*DEFINE_TABLE', '*DEFINE_CURVE']
+
+
+def make_lines(num_lines: int) -> list:
+    # mostly nodes with a curve every 1000 lines, similar to a material deck with a mesh
+    lines = []
+    node_lines = [f"{n:8d}{0.5:16.6f}{0.25:16.6f}{0.125:16.6f}" for n in range(900)]
+    curve_id = 0
+    while len(lines) < num_lines:
+        lines.append('*NODE')
+        lines.extend(node_lines)
+        lines.extend(make_curve(curve_id, 96))
+        curve_id += 1
+    return lines[:num_lines]
+
+
+def legacy_scan(lines: list) -> int:
+    # the decision logic of the scan loop in encrypt_data of version 1.0.0
+    keywords = KEYWORDS
+    to_encrypt = False
+    blocks = 0
+    for line in lines:
+        if not line.upper().startswith(tuple(keywords)) and not to_encrypt:
+            continue
+        if line.startswith('*') and to_encrypt:
+            to_encrypt = False
+            blocks += 1
+        if line.upper().startswith(tuple(keywords)) and not to_encrypt:
+            to_encrypt = True
+    return blocks + to_encrypt
+
+
+def main():
+    num_lines = int(float(sys.argv[1]) * 1e6) if len(sys.argv) > 1 else 2_000_000
+    lines = make_lines(num_lines)
+    matcher = KeywordMatcher(KEYWORDS)
+
+    legacy_blocks, legacy_time = timeit(legacy_scan, lines)
+    blocks, scan_time = timeit(lambda: sum(1 for _ in matcher.scan(lines)))
+    assert blocks == legacy_blocks
+
+    print(f"{num_lines} lines, {blocks} keyword blocks")
+    print(f"legacy startswith loop:  {legacy_time:7.3f} s  {num_lines / legacy_time / 1e6:7.2f} M lines/s")
+    print(f"KeywordMatcher.scan:     {scan_time:7.3f} s  {num_lines / scan_time / 1e6:7.2f} M lines/s")
+
+
+if __name__ == '__main__':
+    main()
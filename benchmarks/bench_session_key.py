@@ -0,0 +1,62 @@
+"""
+Measures the native backend with and without reuse of the session key on a *DEFINE_TABLE with many child curves.
+
+Without reuse every keyword costs one ElGamal encryption of a new session key, with reuse only the first keyword of the file.
+The round trip is checked with a test key: every message of a file with reused session key has to be decryptable by gpg on its own.
+
+usage: python3 bench_session_key.py [number of child curves] [points per curve]
+"""
+import os
+import sys
+import logging
+import pathlib
+import tempfile
+import subprocess
+
+from bench_utils import throwaway_gnupg_home, make_curve, timeit
+from bench_native_backend import generate_test_key, gpg
+from deck_generator import make_table
+import encrypt_lsdyna
+from encrypt_lsdyna import LS_Dyna_Encryptor, NativeOpenPGPBackend, dearmor, iter_packets
+
+
+def check_round_trip(payloads: list):
+    fingerprint = generate_test_key()
+    backend = NativeOpenPGPBackend(recipient=fingerprint[-8:], public_keys=[gpg('--armor', '--export', fingerprint)], reuse_session_key=True)
+    messages = ['\n'.join(backend.encrypt(payload)) + '\n' for payload in payloads]
+    # one public-key encrypted session key packet for all messages
+    session_key_packets = {next(iter_packets(dearmor(message)))[1] for message in messages}
+    assert len(session_key_packets) == 1, "the session key was not reused"
+    for payload, message in zip(payloads, messages):
+        decrypted = subprocess.run(['gpg', '--batch', '--ignore-mdc-error', '--decrypt'], input=message.encode(), stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL).stdout
+        assert decrypted.replace(b'\r\n', b'\n') == payload, "gpg could not decrypt a message with reused session key"
+    print(f"round trip: gpg decrypts all {len(messages)} messages with the same session key packet")
+
+
+def main():
+    num_curves = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    encrypt_lsdyna.sh_logger.setLevel(logging.WARNING)
+    curves = [make_curve(curve_id, points) for curve_id in range(1, num_curves + 1)]
+    deck = ['*KEYWORD', *make_table(1000, list(range(1, num_curves + 1))), *(line for curve in curves for line in curve), '*END']
+
+    with throwaway_gnupg_home(), tempfile.TemporaryDirectory() as work_dir:
+        check_round_trip(['\n'.join(curve).encode() + b'\n' for curve in curves[:10]])
+
+        inputfile = pathlib.Path(work_dir, 'table.k')
+        inputfile.write_text('\n'.join(deck) + '\n')
+        print(f"*DEFINE_TABLE with {num_curves} curves of {points} points, {num_curves + 1} keywords to encrypt")
+        for key_length in (1024, 2048):
+            for backend, reuse in (('gpg', False), ('native', False), ('native', True)):
+                lde = LS_Dyna_Encryptor(inputfile=str(inputfile), outfile=os.path.join(work_dir, 'table.k.asc'), expiry_date='0', key_length=key_length,
+                                        overwrite=True, backend=backend, reuse_session_key=reuse)
+                lde.show_progress = False
+                _, elapsed = timeit(lde.encrypt_file)
+                name = f"{backend}{' + reused session key' if reuse else ''}"
+                print(f"  {key_length}-bit {name:<28} {elapsed:8.3f} s  {(num_curves + 1) / elapsed:10.1f} blocks/s")
+
+
+if __name__ == '__main__':
+    main()
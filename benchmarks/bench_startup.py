@@ -0,0 +1,56 @@
+"""
+Measures the fixed cost per file: the import of the module in a fresh interpreter and the construction plus encryption of small files.
+
+usage: python3 bench_startup.py [number of files] [number of imports]
+"""
+import sys
+import pathlib
+import logging
+import statistics
+import subprocess
+import tempfile
+
+from bench_utils import throwaway_gnupg_home, make_curve, timeit
+import encrypt_lsdyna
+from encrypt_lsdyna import LS_Dyna_Encryptor
+
+
+def import_time() -> float:
+    # a fresh interpreter, so nothing is imported yet. The time of the interpreter itself is not included.
+    module_dir = pathlib.Path(encrypt_lsdyna.__file__).parent
+    code = "import time; t = time.perf_counter(); import encrypt_lsdyna; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=module_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    num_imports = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    # the first import compiles the module, this is not part of the cold start
+    import_time()
+    imports = [import_time() for _ in range(num_imports)]
+
+    encrypt_lsdyna.sh_logger.setLevel(logging.WARNING)
+    deck = '\n'.join(['*KEYWORD', *make_curve(1, 20), '*END']) + '\n'
+    with throwaway_gnupg_home(), tempfile.TemporaryDirectory() as work_dir:
+        constructions = []
+        files = []
+        for i in range(num_files):
+            inputfile = pathlib.Path(work_dir, f"customer_{i}.k")
+            inputfile.write_text(deck)
+            lde, elapsed = timeit(LS_Dyna_Encryptor, inputfile=str(inputfile), expiry_date='0', overwrite=True)
+            lde.show_progress = False
+            constructions.append(elapsed)
+            _, elapsed = timeit(lde.encrypt_file)
+            files.append(constructions[-1] + elapsed)
+
+    print(f"import (fresh interpreter): median {statistics.median(imports) * 1000:7.2f} ms")
+    print(f"construction, first file:          {constructions[0] * 1000:7.2f} ms")
+    print(f"construction, other files: median {statistics.median(constructions[1:] or constructions) * 1000:7.2f} ms")
+    print(f"construction + encryption, first file:          {files[0] * 1000:7.2f} ms")
+    print(f"construction + encryption, other files: median {statistics.median(files[1:] or files) * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark suite for the stages of LS_Dyna_Encryptor.encrypt_file.
+
+Synthetic decks are generated with fixed seeds (see deck_generator.py) and encrypted in every mode against a throwaway GnuPG home.
+The median of several runs per case is reported together with the git commit, so the results of two commits can be compared:
+
+usage: python3 bench_suite.py [--presets small medium] [--modes list stream mmap] [--repeat 3] [--jobs 1] [--output results.json] [--compare old.json]
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+from bench_utils import throwaway_gnupg_home
+from deck_generator import generate_deck
+import encrypt_lsdyna
+from encrypt_lsdyna import LS_Dyna_Encryptor
+
+# the decks of the presets, changing them makes the results incomparable to older ones
+PRESETS = {
+    'small': dict(curves=50, tables=5, points=100, nodes=10000, elements=10000, comment_density=0.05, seed=1),
+    'medium': dict(curves=500, tables=20, points=200, nodes=200000, elements=200000, comment_density=0.05, seed=2),
+    'large': dict(curves=2000, tables=50, points=500, nodes=1000000, elements=1000000, comment_density=0.05, seed=3),
+    'curves': dict(curves=5000, tables=0, points=50, nodes=0, elements=0, comment_density=0.2, seed=4),
+}
+MODES = {'list': {}, 'stream': {'stream': True}, 'mmap': {'mapped': True}}
+
+
+# ==============================================================================
+def environment() -> dict:
+    """
+    Returns everything that is needed to judge if two results are comparable.
+    """
+    repo = os.path.dirname(os.path.abspath(__file__))
+
+    def git(*args):
+        result = subprocess.run(['git', *args], cwd=repo, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return result.stdout.strip()
+
+    gpg_version = subprocess.run(['gpg', '--version'], stdout=subprocess.PIPE, text=True).stdout.splitlines()[0]
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'tool_version': encrypt_lsdyna.__version__,
+        'python': platform.python_version(),
+        'gpg': gpg_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+# ==============================================================================
+def run_case(deck: str, work_dir: str, mode: str, repeat: int, jobs: int) -> dict:
+    """
+    Encrypts the deck repeat times and returns the medians of the profiles.
+    """
+    profiles = []
+    for _ in range(repeat):
+        lde = LS_Dyna_Encryptor(inputfile=deck, outfile=os.path.join(work_dir, 'out.k.asc'), expiry_date='0', max_workers=jobs, overwrite=True)
+        lde.show_progress = False
+        lde.encrypt_file(**MODES[mode])
+        profiles.append(lde.profile.to_dict())
+
+    stages = sorted({name for profile in profiles for name in profile['stages_s']})
+    return {
+        'wall_time_s': statistics.median(profile['wall_time_s'] for profile in profiles),
+        'stages_s': {name: statistics.median(profile['stages_s'].get(name, 0.0) for profile in profiles) for name in stages},
+        'blocks': profiles[0]['blocks'],
+        'bytes_in': profiles[0]['bytes_in'],
+        'bytes_out': profiles[0]['bytes_out'],
+        'runs': [profile['wall_time_s'] for profile in profiles],
+    }
+
+
+# ==============================================================================
+def print_results(results: dict, previous: dict = None):
+    header = f"{'case':<14} {'wall [s]':>9} {'blocks/s':>9} {'MB/s':>8}  stages [s]"
+    if previous:
+        header += "  (change of the wall time to the previous results)"
+    print(header)
+    for case, result in results.items():
+        wall_time = max(result['wall_time_s'], 1e-9)
+        stages = ', '.join(f"{name} {seconds:.3f}" for name, seconds in result['stages_s'].items())
+        line = f"{case:<14} {wall_time:9.3f} {result['blocks'] / wall_time:9.1f} {result['bytes_in'] / 1e6 / wall_time:8.2f}  {stages}"
+        if previous and case in previous:
+            line += f"  ({100 * (wall_time / max(previous[case]['wall_time_s'], 1e-9) - 1):+.1f} %)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the stages of LS_Dyna_Encryptor')
+    parser.add_argument('--presets', nargs='+', choices=sorted(PRESETS), default=['small', 'medium'])
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--output', type=str, help='write the results as JSON to this file')
+    parser.add_argument('--compare', type=str, help='compare with the JSON results of an earlier run, e.g. of another commit')
+    args = parser.parse_args()
+
+    # only the results are of interest, not the messages of every single run
+    encrypt_lsdyna.sh_logger.setLevel(logging.WARNING)
+
+    env = environment()
+    print(f"commit {env['commit']}{' (dirty)' if env['dirty'] else ''}, {env['gpg']}, Python {env['python']}, {env['cpus']} CPUs")
+    results = {}
+    with throwaway_gnupg_home(), tempfile.TemporaryDirectory(prefix='lsdyna_bench_') as work_dir:
+        for preset in args.presets:
+            deck = str(generate_deck(os.path.join(work_dir, f"{preset}.k"), **PRESETS[preset]))
+            for mode in args.modes:
+                results[f"{preset}/{mode}"] = run_case(deck, work_dir, mode, args.repeat, args.jobs)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as compare_file:
+            compared = json.load(compare_file)
+        print(f"compared with commit {compared['environment']['commit']} ({compared['environment']['gpg']})")
+        previous = compared['results']
+    print_results(results, previous)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump({'environment': env, 'settings': {'repeat': args.repeat, 'jobs': args.jobs, 'presets': {p: PRESETS[p] for p in args.presets}},
+                       'results': results}, output_file, indent=1)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
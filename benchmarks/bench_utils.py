@@ -0,0 +1,69 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The benchmarks never touch the keyring of the user. A throwaway GnuPG home is created in a temporary directory and the
+LS-Dyna public keys shipped with the encryptor are imported into it, so no network access is needed.
+"""
+import os
+import sys
+import time
+import pathlib
+import tempfile
+import subprocess
+import contextlib
+
+# make the encryptor importable without installing it
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / 'python-lsdyna_encrypt'))
+from encrypt_lsdyna import LS_Dyna_Encryptor  # noqa: E402
+
+
+# ==============================================================================
+@contextlib.contextmanager
+def throwaway_gnupg_home():
+    """
+    Creates a temporary GnuPG home with the LS-Dyna public keys and activates it via GNUPGHOME.
+    """
+    old_home = os.environ.get('GNUPGHOME')
+    with tempfile.TemporaryDirectory(prefix='lsdyna_bench_gnupg_') as gnupg_home:
+        os.chmod(gnupg_home, 0o700)
+        keys = (LS_Dyna_Encryptor.LS_DYNA_PUBLIC_PGP_KEY_1028_BIT + '\n' + LS_Dyna_Encryptor.LS_DYNA_PUBLIC_PGP_KEY_2048_BIT + '\n').encode()
+        subprocess.run(['gpg', '--homedir', gnupg_home, '--batch', '--import'], input=keys, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.environ['GNUPGHOME'] = gnupg_home
+        try:
+            yield gnupg_home
+        finally:
+            if old_home is None:
+                del os.environ['GNUPGHOME']
+            else:
+                os.environ['GNUPGHOME'] = old_home
+
+
+# ==============================================================================
+def make_curve(curve_id: int, points: int) -> list:
+    """
+    Returns the lines of a *DEFINE_CURVE keyword with the given number of points.
+    """
+    lines = ['*DEFINE_CURVE', '$#    lcid      sidr       sfa       sfo      offa      offo    dattyp', f"{curve_id:10d}"]
+    lines.extend(f"{p * 0.01:20.6f}{p * 0.5:20.6f}" for p in range(points))
+    return lines
+
+
+# ==============================================================================
+def make_encryptor(work_dir: str, key_length: int = 1024, **kwargs) -> LS_Dyna_Encryptor:
+    """
+    Returns an encryptor for a dummy input file inside of work_dir.
+    """
+    inputfile = pathlib.Path(work_dir, 'bench.k')
+    inputfile.write_text('*KEYWORD\n*END\n')
+    return LS_Dyna_Encryptor(inputfile=str(inputfile), expiry_date='0', key_length=key_length, **kwargs)
+
+
+# ==============================================================================
+def timeit(func, *args, **kwargs):
+    """
+    Calls func and returns its result together with the elapsed wall time in seconds.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
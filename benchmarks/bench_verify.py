@@ -0,0 +1,46 @@
+"""
+Measures LS_Dyna_Output_Verifier: several decks are encrypted with the native backend (the keys shipped with the encryptor, no gpg keyring needed)
+and their outfiles are checked against the inputfiles by one process and by several processes. Nothing is decrypted.
+
+usage: python3 bench_verify.py [preset] [files] [workers ...]
+"""
+import os
+import sys
+import logging
+import pathlib
+import tempfile
+
+from bench_utils import timeit
+from bench_suite import PRESETS
+from deck_generator import generate_deck
+import encrypt_lsdyna
+from encrypt_lsdyna import LS_Dyna_Encryptor, LS_Dyna_Output_Verifier, KeyRegistry
+
+
+def main():
+    preset = sys.argv[1] if len(sys.argv) > 1 else 'small'
+    num_files = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    all_workers = [int(arg) for arg in sys.argv[3:]] or [1, os.cpu_count() or 1]
+
+    encrypt_lsdyna.sh_logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as work_dir:
+        files = []
+        for i in range(num_files):
+            deck = generate_deck(os.path.join(work_dir, f"{preset}_{i}.k"), **{**PRESETS[preset], 'seed': i})
+            lde = LS_Dyna_Encryptor(inputfile=str(deck), expiry_date='0', backend='native', reuse_session_key=True)
+            lde.show_progress = False
+            lde.encrypt_file(mapped=True)
+            files.append((deck, lde.outfile_fullpath))
+        megabytes = sum(pathlib.Path(outfile).stat().st_size for _, outfile in files) / 1e6
+        print(f"{num_files} outfiles of preset {preset}, {megabytes:.1f} MB")
+
+        verifier = LS_Dyna_Output_Verifier(key_ids=[KeyRegistry.key(1024).key_id])
+        for workers in all_workers:
+            results, elapsed = timeit(verifier.verify_files, files, workers)
+            assert all(result.ok for result in results), [result.errors for result in results if not result.ok]
+            blocks = sum(result.blocks for result in results)
+            print(f"  {workers} process(es): {elapsed:7.3f} s  {megabytes / elapsed:7.1f} MB/s  {blocks / elapsed:9.1f} keywords/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Generator for synthetic LS-Dyna keyword files.
+
+The decks are reproducible: the same arguments and seed always give the same file, so the benchmark results of different commits can be compared.
+
+usage: python3 deck_generator.py outfile [--curves N] [--tables N] [--points N] [--nodes N] [--elements N] [--comment_density X] [--seed N]
+"""
+import random
+import argparse
+import pathlib
+
+from bench_utils import make_curve
+
+
+# ==============================================================================
+def make_table(table_id: int, curve_ids: list) -> list:
+    """
+    Returns the lines of a *DEFINE_TABLE keyword with one value per curve. The curves follow as their own keywords.
+    """
+    lines = ['*DEFINE_TABLE', '$#    tbid      sfa      offa', f"{table_id:10d}"]
+    lines.extend(f"{0.001 * 10 ** i:20.6f}{curve_id:20d}" for i, curve_id in enumerate(curve_ids))
+    return lines
+
+
+# ==============================================================================
+def with_comments(lines: list, comment_density: float, rng: random.Random) -> list:
+    """
+    Inserts comment lines in front of the data lines. comment_density is the probability of a comment in front of every line.
+    """
+    if comment_density <= 0:
+        return lines
+    commented = [lines[0]]
+    for line in lines[1:]:
+        if rng.random() < comment_density:
+            commented.append('$ generated comment')
+        commented.append(line)
+    return commented
+
+
+# ==============================================================================
+def iter_deck_lines(*, curves: int = 100, tables: int = 10, points: int = 100, nodes: int = 10000, elements: int = 10000,
+                    comment_density: float = 0.05, seed: int = 0):
+    """
+    Yields the lines of a synthetic deck: a mesh (*NODE, *ELEMENT_SHELL) that is passed through, followed by material data
+    (*DEFINE_TABLE and *DEFINE_CURVE) that is encrypted.
+
+    :param curves: The number of *DEFINE_CURVE keywords that do not belong to a table.
+    :param tables: The number of *DEFINE_TABLE keywords. Every table references 5 additional curves.
+    :param points: The number of points per curve.
+    :param nodes: The number of nodes.
+    :param elements: The number of shell elements.
+    :param comment_density: The probability of a comment line in front of every line of a curve or table.
+    :param seed: The seed of the random numbers.
+    """
+    rng = random.Random(seed)
+    yield '*KEYWORD'
+    yield '$ synthetic deck generated by deck_generator.py'
+    yield f"$ curves={curves} tables={tables} points={points} nodes={nodes} elements={elements} comment_density={comment_density} seed={seed}"
+
+    if nodes:
+        yield '*NODE'
+        yield '$#   nid               x               y               z      tc      rc'
+        for nid in range(1, nodes + 1):
+            yield f"{nid:8d}{rng.uniform(0, 1000):16.6f}{rng.uniform(0, 1000):16.6f}{rng.uniform(0, 1000):16.6f}"
+
+    if elements:
+        yield '*ELEMENT_SHELL'
+        yield '$#   eid     pid      n1      n2      n3      n4'
+        for eid in range(1, elements + 1):
+            n1 = rng.randint(1, max(nodes - 3, 1))
+            yield f"{eid:8d}{1:8d}{n1:8d}{n1 + 1:8d}{n1 + 2:8d}{n1 + 3:8d}"
+
+    for table_id in range(1, tables + 1):
+        curve_ids = list(range(100000 + 5 * table_id, 100000 + 5 * table_id + 5))
+        yield from with_comments(make_table(table_id, curve_ids), comment_density, rng)
+        for table_curve_id in curve_ids:
+            yield from with_comments(make_curve(table_curve_id, points), comment_density, rng)
+    for curve_id in range(1, curves + 1):
+        yield from with_comments(make_curve(curve_id, points), comment_density, rng)
+
+    yield '*END'
+
+
+# ==============================================================================
+def generate_deck(path, **kwargs) -> pathlib.Path:
+    """
+    Writes a synthetic deck to path and returns the path. See iter_deck_lines for the arguments.
+    """
+    path = pathlib.Path(path)
+    with open(path, 'w', encoding='utf-8') as deck:
+        deck.writelines(line + '\n' for line in iter_deck_lines(**kwargs))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic LS-Dyna keyword file')
+    parser.add_argument('outfile', type=str)
+    parser.add_argument('--curves', type=int, default=100)
+    parser.add_argument('--tables', type=int, default=10)
+    parser.add_argument('--points', type=int, default=100)
+    parser.add_argument('--nodes', type=int, default=10000)
+    parser.add_argument('--elements', type=int, default=10000)
+    parser.add_argument('--comment_density', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = vars(parser.parse_args())
+    path = generate_deck(args.pop('outfile'), **args)
+    print(f"{path}: {path.stat().st_size / 1e6:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
-from encrypt_lsdyna import LS_Dyna_Encryptor
+from encrypt_lsdyna import LS_Dyna_Encryptor, setup_logging
+
+# print the messages of the encryptor to the console
+setup_logging()
 
 lde = LS_Dyna_Encryptor(inputfile = 'test.key', expiry_date = '05/01/2024')
 # uncomment to encrypt only specific keywords
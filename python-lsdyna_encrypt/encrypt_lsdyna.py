@@ -1,18 +1,38 @@
 import sys
 import os
+import re
+import glob
+import json
+import mmap
+import array
+import base64
+import secrets
 import time
+import atexit
+import shutil
 import pathlib
-import argparse
-from typing import Optional, Union
+import getpass
+import hashlib
+import tempfile
+import threading
+import subprocess
+import functools
+import contextlib
+import importlib.util
+import concurrent.futures
+from typing import AsyncIterable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 from datetime import (
     datetime,
     timedelta
 )
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows, the eviction of the block cache is then not locked between processes
+    fcntl = None
 
 # ==============================================================================
 # TODO:
-# - check pitfalls for different keywords in combination with startswith
-# - add option to just encrypt keywords partially (not compatible with expiry date)
 # -
 # ==============================================================================
 __versioninfo__ = (1, 0, 0)
@@ -148,8 +168,9 @@ def addLoggingLevel(levelName, levelNum, methodName=None):
     setattr(logging.getLoggerClass(), methodName, logForLevel)
     setattr(logging, methodName, logToRoot)
 
-addLoggingLevel('PRINT', logging.INFO + 5)
-addLoggingLevel('LIGHT_WARNING', logging.WARNING - 1)
+# the additional logging levels of this module. They are only registered in the logging module (with addLoggingLevel) by setup_logging, so the import has no side effects.
+PRINT = logging.INFO + 5
+LIGHT_WARNING = logging.WARNING - 1
 
 # -------------------------------------------------------------------------------------------------
 # stream handler for logging
@@ -164,8 +185,8 @@ class CustomSHFormatter(logging.Formatter):
     FORMATS = {
         logging.DEBUG: "%(funcName)25s: " + CliColors.fg_blue + format + CliColors.reset_all,
         logging.INFO: CliColors.PR_INFO + format + CliColors.reset_all,
-        logging.PRINT: CliColors.reset_all + format + CliColors.reset_all,
-        logging.LIGHT_WARNING: CliColors.PR_WARNING + format + CliColors.reset_all,
+        PRINT: CliColors.reset_all + format + CliColors.reset_all,
+        LIGHT_WARNING: CliColors.PR_WARNING + format + CliColors.reset_all,
         logging.WARNING: CliColors.PR_WARNING + format + CliColors.reset_all,
         logging.ERROR: CliColors.PR_ERROR + format + CliColors.reset_all,
         logging.CRITICAL: CliColors.PR_CRITICAL + format + CliColors.reset_all
@@ -179,20 +200,32 @@ class CustomSHFormatter(logging.Formatter):
 # -------------------------------------------------------------------------------------------------
 stream_handler_level = logging.INFO
 sh_logger = logging.getLogger(__name__)
-sh_logger.setLevel(stream_handler_level)
 
-sh = logging.StreamHandler()
-sh.setFormatter(CustomSHFormatter())
-# sh.setLevel(stream_handler_level)
-sh_logger.addHandler(sh)
-PRINT = logging.INFO + 5
-logging.addLevelName(PRINT, "PRINT")
+# =================================================================================================
+def setup_logging(level: int = stream_handler_level):
+    """
+    Prints the messages of this module colored to the console. This is done for the CLI, a script using the module can call it as well.
+    Nothing is configured on import, so an application keeps full control over its logging.
+    The levels are registered like in former versions: logging.PRINT, logging.LIGHT_WARNING and the logger methods print() and light_warning().
+    """
+    logging.addLevelName(PRINT, 'PRINT')
+    logging.addLevelName(LIGHT_WARNING, 'LIGHT_WARNING')
+    for level_name, level_num in (('PRINT', PRINT), ('LIGHT_WARNING', LIGHT_WARNING)):
+        # already registered by a former call (or by another module), addLoggingLevel does not change anything then
+        with contextlib.suppress(AttributeError):
+            addLoggingLevel(level_name, level_num)
+    sh_logger.setLevel(level)
+    # calling it twice does not print every message twice
+    if not any(isinstance(handler.formatter, CustomSHFormatter) for handler in sh_logger.handlers):
+        sh = logging.StreamHandler()
+        sh.setFormatter(CustomSHFormatter())
+        sh_logger.addHandler(sh)
 
 # =================================================================================================
 # =================================================================================================
 # displays a progress bar in the console
 # =================================================================================================
-def progress_bar(iteration, maximum):
+def progress_bar(iteration, maximum, suffix: str = ''):
     """
     Draws a progress bar in the console based on the given iteration and maximum.
 
@@ -203,25 +236,250 @@ def progress_bar(iteration, maximum):
     progress_bar_length = 30
     num_bar_chars = int(progress * progress_bar_length)
     bar = '[' + CliColors.fg_green + '■' * num_bar_chars + CliColors.reset_all + ' ' * (progress_bar_length - num_bar_chars) + ' ]'
-    print(f"Progress: {bar} {progress*100:.1f}%", end='\r')
+    print(f"Progress: {bar} {progress*100:.1f}%{suffix}", end='\r')
     
 # =================================================================================================
-def timed(func):
+class EncryptionProfile:
     """
-    decorator to measure the execution time of a function
+    This class records where the time of an encryption run goes.
+
+    The wall time of the stages (e.g. read, scan, gpg, write) is recorded exclusively: if a stage is entered inside of another one, the time is only counted for the inner stage.
+    Besides the stages, the number of blocks, the bytes in and out and a histogram of the gpg latency per block are recorded.
     """
-    def wrapper(*args, **kwargs):
-        start = time.perf_counter()
-        result = func(*args, **kwargs)
-        end = time.perf_counter()
-        print(f"{func.__name__} took {end-start:.6f} seconds to execute. *args: {args[0]}")
-        return result
-    return wrapper
+
+    # upper bounds of the latency histogram in milliseconds, the last bucket takes everything above
+    LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.blocks: int = 0
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+        self.gpg_calls: int = 0
+        self.gpg_blocks: int = 0
+        self.latency_histogram: List[int] = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+        self.wall_time: float = 0.0
+        # the time spent in writing the outfiles (see AtomicOutputFile) and the sizes of their compressed copies
+        self.output_time: float = 0.0
+        self.compressed_bytes: Dict[str, int] = {}
+        # the gpg sessions may run in several threads
+        self._lock = threading.Lock()
+        # [stage name, start of the currently counted time] of the entered stages
+        self._stack: list = []
+        # perf_counter at the start of the current run
+        self.started: Optional[float] = None
+
+    # ==============================================================================
+    def start(self):
+        self.started = time.perf_counter()
+
+    # ==============================================================================
+    def stop(self):
+        if self.started is not None:
+            self.wall_time += time.perf_counter() - self.started
+            self.started = None
+
+    # ==============================================================================
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """
+        Context manager to record the time of a stage. The stage that was running before is paused until this stage is left.
+        """
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self.stages[outer[0]] = self.stages.get(outer[0], 0.0) + now - outer[1]
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            started = self._stack.pop()[1]
+            self.stages[name] = self.stages.get(name, 0.0) + now - started
+            # the outer stage continues from now on
+            if self._stack:
+                self._stack[-1][1] = now
+
+    # ==============================================================================
+    def record_gpg(self, seconds: float, blocks: int):
+        """
+        Records one gpg call. With --multifile one call encrypts many blocks, so the latency per block is the duration of the call divided by its blocks.
+        """
+        if blocks <= 0:
+            return
+        latency_ms = seconds * 1000 / blocks
+        bucket = next((i for i, bound in enumerate(self.LATENCY_BUCKETS_MS) if latency_ms <= bound), len(self.LATENCY_BUCKETS_MS))
+        with self._lock:
+            self.gpg_calls += 1
+            self.gpg_blocks += blocks
+            self.latency_histogram[bucket] += blocks
+
+    # ==============================================================================
+    def merge(self, other: 'EncryptionProfile'):
+        # e.g. to sum up the profiles of all files of a batch
+        for name, seconds in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.blocks += other.blocks
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.gpg_calls += other.gpg_calls
+        self.gpg_blocks += other.gpg_blocks
+        self.latency_histogram = [a + b for a, b in zip(self.latency_histogram, other.latency_histogram)]
+        self.output_time += other.output_time
+        for compression, size in other.compressed_bytes.items():
+            self.compressed_bytes[compression] = self.compressed_bytes.get(compression, 0) + size
+
+    # ==============================================================================
+    def record_output(self, output: 'AtomicOutputFile'):
+        self.output_time += output.elapsed
+        for compression, size in output.compressed_bytes.items():
+            self.compressed_bytes[compression] = self.compressed_bytes.get(compression, 0) + size
+
+    # ==============================================================================
+    def to_dict(self) -> dict:
+        wall_time = max(self.wall_time, 1e-9)
+        labels = [f"<={bound}ms" for bound in self.LATENCY_BUCKETS_MS] + [f">{self.LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'tool_version': __version__,
+            'wall_time_s': self.wall_time,
+            'stages_s': dict(self.stages),
+            'blocks': self.blocks,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'gpg_calls': self.gpg_calls,
+            'gpg_blocks': self.gpg_blocks,
+            'gpg_latency_per_block_ms': dict(zip(labels, self.latency_histogram)),
+            'blocks_per_s': self.blocks / wall_time,
+            'mb_in_per_s': self.bytes_in / 1e6 / wall_time,
+            'output_s': self.output_time,
+            'mb_out_per_s': self.bytes_out / 1e6 / max(self.output_time, 1e-9),
+            'compressed_bytes': dict(self.compressed_bytes),
+        }
+
+    # ==============================================================================
+    def write_json(self, path: Union[str, pathlib.Path]):
+        with open(path, 'w', encoding='utf-8') as profile_file:
+            json.dump(self.to_dict(), profile_file, indent=1)
+
+    # ==============================================================================
+    def summary(self) -> str:
+        profile = self.to_dict()
+        lines = [f"Profile: {self.wall_time:.3f} s, {self.blocks} blocks, {self.bytes_in / 1e6:.2f} MB in, {self.bytes_out / 1e6:.2f} MB out",
+                 f"  {profile['blocks_per_s']:.1f} blocks/s, {profile['mb_in_per_s']:.2f} MB/s"]
+        for name, seconds in sorted(self.stages.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<8} {seconds:9.3f} s  {100 * seconds / max(self.wall_time, 1e-9):5.1f} %")
+        lines.append(f"  output: {self.output_summary()}")
+        if self.gpg_calls:
+            lines.append(f"  gpg: {self.gpg_calls} calls, latency per block:")
+            lines.extend(f"    {label:>9} {count}" for label, count in profile['gpg_latency_per_block_ms'].items() if count)
+        return '\n'.join(lines)
+
+    # ==============================================================================
+    def output_summary(self) -> str:
+        # e.g. "12.50 MB in 0.031 s (403.2 MB/s), gzip 3.10 MB (24.8 %)"
+        parts = [f"{self.bytes_out / 1e6:.2f} MB in {self.output_time:.3f} s ({self.bytes_out / 1e6 / max(self.output_time, 1e-9):.1f} MB/s)"]
+        parts.extend(f"{compression} {size / 1e6:.2f} MB ({100 * size / max(self.bytes_out, 1):.1f} %)" for compression, size in sorted(self.compressed_bytes.items()))
+        return ', '.join(parts)
+
+# =================================================================================================
+class ProgressState(NamedTuple):
+    """
+    The state of an encryption run as passed to a progress callback.
+    """
+    done: int
+    total: int
+    fraction: float
+    blocks: int
+    blocks_per_s: float
+    elapsed_s: float
+    eta_s: Optional[float]
+
+# =================================================================================================
+class ProgressReporter:
+    """
+    This class reports the progress of an encryption run without slowing it down.
+
+    update can be called as often as wanted, the progress is only reported if the last report is at least interval seconds ago.
+    On a terminal a progress bar with blocks/s and ETA is drawn. If the output is not a terminal (e.g. a CI log), a log line is written every log_interval seconds instead.
+    If a callback is given, it gets a ProgressState instead and nothing is printed.
+    """
+
+    def __init__(self, total: int, *, callback: Optional[Callable[[ProgressState], None]] = None, interval: float = 0.2, log_interval: float = 10.0,
+                 tty: Optional[bool] = None, start: Optional[float] = None):
+        """
+        :param total: The amount of work, e.g. the size of the inputfile in bytes.
+        :param callback: Called with a ProgressState for every report instead of drawing a progress bar.
+        :param interval: The minimum time between two reports in seconds.
+        :param log_interval: The minimum time between two log lines in seconds if the output is not a terminal.
+        :param tty: If the output is a terminal. Default = sys.stdout.isatty()
+        :param start: The time.perf_counter() value at which the work started. Default = now
+        """
+        self.total: int = max(total, 1)
+        self.callback = callback
+        self.tty: bool = tty if tty is not None else sys.stdout.isatty()
+        # a log line for every update would flood the log
+        self.interval: float = interval if self.tty or callback is not None else max(interval, log_interval)
+        self.start: float = start if start is not None else time.perf_counter()
+        self.last_report: float = -float('inf')
+        self.drawn: bool = False
+
+    # ==============================================================================
+    def update(self, done: int, blocks_found: int = 0, blocks_done: int = 0, gpg_seconds: float = 0.0):
+        """
+        :param done: The amount of work done, e.g. the position in the inputfile.
+        :param blocks_found: The number of keywords to encrypt found up to this position.
+        :param blocks_done: The number of keywords already encrypted.
+        :param gpg_seconds: The time spent in gpg so far, used with blocks_done as latency per block for the ETA.
+        """
+        now = time.perf_counter()
+        if now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        self.report(self.state(done, blocks_found, blocks_done, gpg_seconds, now))
+
+    # ==============================================================================
+    def state(self, done: int, blocks_found: int, blocks_done: int, gpg_seconds: float, now: float) -> ProgressState:
+        elapsed = now - self.start
+        fraction = min(max(done / self.total, 0.0), 1.0)
+        eta = None
+        if fraction > 0:
+            remaining = (1 - fraction) / fraction
+            if blocks_done:
+                # the scan goes on at the same rate, the blocks found but not yet encrypted and the blocks still to find need gpg
+                latency = gpg_seconds / blocks_done
+                blocks_to_encrypt = blocks_found * (1 + remaining) - blocks_done
+                eta = max(elapsed - gpg_seconds, 0.0) * remaining + max(blocks_to_encrypt, 0) * latency
+            else:
+                eta = elapsed * remaining
+        return ProgressState(done=done, total=self.total, fraction=fraction, blocks=blocks_done, blocks_per_s=blocks_done / max(elapsed, 1e-9),
+                             elapsed_s=elapsed, eta_s=eta)
+
+    # ==============================================================================
+    def report(self, state: ProgressState):
+        if self.callback is not None:
+            self.callback(state)
+            return
+        eta = f"{int(state.eta_s) // 60}:{int(state.eta_s) % 60:02d}" if state.eta_s is not None else '-'
+        if self.tty:
+            # the trailing spaces clear the rest of a longer line before
+            progress_bar(iteration=state.done - 1, maximum=state.total, suffix=f"  {state.blocks_per_s:.1f} blocks/s  ETA {eta}   ")
+            self.drawn = True
+        else:
+            sh_logger.info(f"Progress: {state.fraction * 100:.1f}%, {state.blocks} blocks, {state.blocks_per_s:.1f} blocks/s, ETA {eta}")
+
+    # ==============================================================================
+    def finish(self, blocks_done: int = 0, gpg_seconds: float = 0.0):
+        # the final state is always reported
+        self.report(self.state(self.total, blocks_done, blocks_done, gpg_seconds, time.perf_counter()))
+        if self.drawn:
+            # print after the progress bar to get to the next line
+            print()
 
 # =================================================================================================
 def ask_overwrite(question):
     """
-    Asks the user if he wants to overwrite a file. If the user answers with 'y', the function returns. If the user answers with 'n', the program is terminated.
+    Asks the user if he wants to overwrite a file. If the user answers with 'y', the function returns. If the user answers with 'n', UserCanceledError is raised.
+    Only used by the 'ask' choices of EncryptionPolicy.
     """
     while True:
         sh_logger.critical(f"{question} Overwrite? (y/n)")
@@ -229,206 +487,1479 @@ def ask_overwrite(question):
         if overwrite == 'y':
             break
         elif overwrite == 'n':
-            sh_logger.error(f"User canceled.")
-            sys.exit()
+            raise UserCanceledError("User canceled.")
         else:
             sh_logger.error(f"invalid input. Try again.")
 
+# =================================================================================================
+@functools.lru_cache(maxsize=None)
+def find_tmpfs_dir() -> Optional[str]:
+    """
+    Returns a writable directory on a tmpfs (RAM backed) filesystem or None if there is none.
+
+    Plaintext that needs to be handed to gpg as a file is only written there, so it never ends up on a disk.
+    """
+    candidates = [os.environ.get('XDG_RUNTIME_DIR'), '/dev/shm']
+    try:
+        with open('/proc/mounts', 'r', encoding='utf-8', errors='ignore') as mounts:
+            tmpfs_mounts = {line.split()[1].replace('\\040', ' ') for line in mounts if line.split()[2:3] == ['tmpfs']}
+    except OSError:
+        # no /proc/mounts (e.g. Windows or macOS), so no tmpfs can be detected
+        return None
+
+    for candidate in candidates:
+        if candidate and candidate in tmpfs_mounts and os.access(candidate, os.W_OK | os.X_OK):
+            return candidate
+    return None
+
+# =================================================================================================
+def file_sha256(path: Union[str, pathlib.Path]) -> str:
+    """
+    Returns the sha256 hash of a file, which is read in chunks of 1 MB.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 # ==============================================================================
 # classes
 # ==============================================================================
-class LS_Dyna_Encryptor:
+@functools.lru_cache(maxsize=None)
+def process_umask() -> int:
+    # os.umask can only be read by setting it, in the meantime files created by other threads would get the wrong permissions. /proc has it without that.
+    try:
+        with open('/proc/self/status', 'r', encoding='utf-8', errors='ignore') as status:
+            for line in status:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+# ==============================================================================
+class EncryptionError(Exception):
+    """
+    The base class of all errors of the encryptors. The message is meant for the user, the CLI prints it and exits.
     """
-    This class is used to encrypt and decrypt files with LS-Dyna.
 
-    The encryption is done with the public key of LS-Dyna. The currently used public key is stored in the variable LS_DYNA_PUBLIC_PGP_KEY_1028_BIT.
+class ConfigurationError(EncryptionError, ValueError):
+    """
+    Invalid arguments, e.g. an unknown key length or backend, an invalid expiry date or options that can not be combined.
     """
 
-    LS_DYNA_PUBLIC_PGP_KEY_1028_BIT = """-----BEGIN PGP PUBLIC KEY BLOCK-----
-Version: GnuPG v2.0.19 (GNU/Linux)
+class InputFileError(EncryptionError):
+    """
+    An inputfile or an included file does not exist or can not be used.
+    """
 
-mQGiBFM61ScRBACgqz7q7kytYuuRpa+1DTD9J3Kn8s3kMHO7zPtLu8bsb1L1I4UQ
-CC6HRL2fMVRtBQZuy445eqsot5npcnzpQ6rcvsQZTVCqXH/gx5O5xs6/W8ktaJXn
-hBrxGabk6IzlOXYvmQ2+jOATfQs29pt4+e/+oXFI9EfKBHao2dEgtOWS6wCg+9gi
-9azFZOUIHV0EJDPFQJZrRFUD/11AG23e7964MN0HTWAWCIvPs8johwB7NOF6UjRR
-xuqD/ZqiQ1hhmQzJR89Weg0TeFFCVP+yK2tgPOgsXry/r7WF/RnO9S/7yvtTWHr8
-QPVxCur7vcKX/Lis6ByiyyDvihavBB6RgMYl5HkrEstTY/j3O09woxtQ4Pae5yZ2
-woj0BACI87Lk6aO/9wAVXBDYyufqX9bea/lbMEuQZ7qzBO7xjSwchYeoLUbCK5sh
-iGI+nT3+liqUZW8+KXd/6I+xsN+YXuS9olmeN5L391VF7ZnWcsOKLbr3tnA3TKJb
-Q/txpFhI/2CM2u0VU6w6DAAGlxic5Gf1Cdc8/mA5KaNEuq24PrRDTGl2ZXJtb3Jl
-IFNvZnR3YXJlIFRlY2hub2xvZ3kgQ29ycG9yYXRpb24gKExTVEMpIDxzdXBwb3J0
-QGxzdGMuY29tPohVBBMRAgAVAhsDAh4BAheABQJTOtVDAgsHAhYAAAoJECATgx5l
-rsCu0P4An2f9h8YuWfW+mNY1gm29nIs+kbeZAJ44HMvNgfOVtqUxUCyTlCLjwR6O
-CbkBDQRTOtUnEAQA4Q4D0F6l77N0e6XCIH49b7MHFyjkq3OdgHE4vylubEAXVeeX
-FD4Vrojn3t/I1QqAUG4ipZZAlLVrSYruzQLYaLhjYP124Py/b6vRo0FcyVsLbazj
-BxnGs+fFTrYspLaWfBK2dIrQ9ze9QSLhNous36W3em+fhx8hzGgcUUZRQOcAAwUD
-/RkrdN+Mbim6H6MNnEKhoXlpogzriCUB+hpxfQSP+go6+Np2RGkQfTEu+W51vrFA
-cW36cncp3OLpsvKzaQgTTT1rqb11Hoe/YpH3T9ngz4NX7a4OSDhHDKC1Q1BuzTEJ
-3A3RXeAgRaMV8+hFm91g2KWZuMeqd+nSo2sb5EvpFhW9iEkEGBECAAkFAlM61ScC
-GwwACgkQIBODHmWuwK7BaQCfUovuhS6oXuh+1sSqkGCxzHEGER8AniHYve/Kn6CL
-SoAeXMxSC7F44Ood
-=R0pG
------END PGP PUBLIC KEY BLOCK-----"""
+class OutputExistsError(EncryptionError):
+    """
+    The outfile or logfile already exists and the EncryptionPolicy does not allow to overwrite it.
+    """
 
-    LS_DYNA_PUBLIC_PGP_KEY_2048_BIT = """-----BEGIN PGP PUBLIC KEY BLOCK-----
-Version: GnuPG v2.0.19 (GNU/Linux)
+class UserCanceledError(EncryptionError):
+    """
+    The user answered a question with 'n'.
+    """
 
-mQMuBFM55y8RCACloOCLGOpfDgWJz75dF2K0MAP6T6ckM41s9lOASvLGK80tnJIl
-pzaaX0Ty0/N1U2d4vD04xQi6tjFJk5ggLx6Bp2EyOhpCmZ0Rfz6Qss6vFHfpso9+
-QV/lVoAggquTtmnd5lXD0id7L8MGy5bXO8CyLC1mZxnN/HCAolVxEntBIdk0dj0k
-1SQxbCyUKW42cArr4if3k1dOxc8hu23xMDykJQHvJnv5ycxFdJrQWyGsoPNEAsBR
-aea4HaTbrTeNUXw594ZAck8yiMz48DuoQ834NTaJzg99Bk3UjdWX1DXUAf3viq5r
-u/VngaNStQl8Y6b+3GZAE5Zs1viqjufUFIqHAQCzETBjSxjHcF8ewygBYvDc9UFu
-meWV7PpJo6ea1hBdewgAhXG3FqDtWIsSdrV763ENRjjfCs4PMlu56i3uOL/E+AYV
-hZjBM7Cq9GnpqZNOA7Xu0f4bhn4lH0m+abXvPf6NbF1y0B0bzpl4OC0nKnnwk70f
-k5Zo+HI1ERQcrbNjxYoQcIc6gQIeUDX8NbNpNcN6gnCfYkGDNdVDL911KnPPO2/8
-+2RTdPrzplDvfYl17AYmy57/rQs+gRpKP/P5DkMEMlkFAjvaIlble9bt2+CiHJMX
-l72u8oStrOZSIh935WnSVfVxqGHdG/ogp0E4tDiHoRxO33YzNd0Qqh/aoGLw8UHN
-yTaTEv6WAseqBEgn7cXpg1gIGNw5lmyK/xjJAlnUKgf/UPqiL99XF08X17Kii+6V
-IZ2shIAx+n9Lqxh1W5LlLmSPsnf5hm0xaJzjmAopMjj6EMKpsAYeLrM6efn0jJPI
-r7DYsrdch5SjNR5Pa6Nj9WQFYROg48vfzmTFTzokXqDI25ACtZG7712R9a+iWzCD
-cxGjRNzvKWPYzqjFDE5vbS0dhcQX8/su+DcpGPxkyLlu4hWU7nwCC+OxM5k/qZCs
-8ZQojw5JmczSA7vfTexRoei+N2rH+eA8HPYE6lUYOmPNC+PJ+EwS2TPQVF6sD02v
-onEoxuwDyqQ+6Iq6wh2+7m9yauD7pPZUk2Kp9BdcnfA7bSm9Vpve6eQuPAUQFYem
-trRDTGl2ZXJtb3JlIFNvZnR3YXJlIFRlY2hub2xvZ3kgQ29ycG9yYXRpb24gKExT
-VEMpIDxzdXBwb3J0QGxzdGMuY29tPohtBBMRCAAVAhsDAh4BAheABQJTOedXAgsH
-AhYAAAoJEHfQoCtgwENaOiQBAIckdWTiP8uKwDLeK5+L0jJ7qwVYLoLf3RCBwgZd
-ZsbxAP4u5L73Q2K+iC/ICq+k5QubXR0yWjwmGhuk/wsBBt7+TbkCDQRTOecvEAgA
-ueZwK5BSGCAvSSXPSeNWXkZNGU1UJ8fDNWAUZy07bdQCUaJjhTooxHbtPlAu9ybK
-oIp9gXWJjMu0ZcyhNAWLYg0lC/eYULXO5J7NPVZB0lFyhasmLxiw3es+yP0LVVFI
-pnF5JppqzTSNc50RiCNBljO5uTmF9C0SAkLDbphWlPn3OWuOxkWLXRhnX9dO/L71
-WsCO8VgqDvahmXbI5l/IXueCBlJ18I1LO91cGA6yTmwxd7qfVBmLiJI3pqhRnA6H
-rOaQ2nf4m/zyaPG8Q1rCGxSP0ctfwIt85Nghfw14NiIkLm6/CGLT5roW2bY3lPZN
-zX/sw2oLGTMjop91Cb3J9wADBQgAoJkhip55PEe6ykQdkvxjE/wUJVpIBuNRKTOF
-RMivPL5NcHhnBGtWywKpUlaQNaFOYUDFVEsrCqT9uVk6NwmWpqJyJoUxK5b2vbGF
-dOLgI+JDrUo8KZx+Hz1981VMD9v4zm0I7Rt4MMYaDhBMuJyNm831ruamAGM96RaF
-+6pMUS6Cb4wVGdz7912CzAgsNftNWpTCvTbj4+/eKynYcBfWVZp4xzS5cM6nTzNC
-GwIyUtzgvXtY2ByEPqeu2AdpIhU1CiXeLRdYlYiXadXzJfJGVi1irKoAb1uiLypJ
-sVXhgMlHKDQ81tEJiVJ5nawYT4e7mel+T74v3+BufysSFmKm1ohhBBgRCAAJBQJT
-OecvAhsMAAoJEHfQoCtgwENaVqQBAJpCFxs3P6wU+YE202jd4BzNXORIqJjYHbk+
-9kiD0cATAP97Th8x9NUhyBGUBH4UUXxz7ek8eG5wxWsC8UkROjjpgw==
-=xfll
------END PGP PUBLIC KEY BLOCK-----"""
+class EncryptionKeyError(EncryptionError, RuntimeError):
+    """
+    The LS-Dyna key is not imported in gpg or not found by the native backend.
+    """
 
-    def __init__(self, *, inputfile: str, outfile: Optional[str] = None, expiry_date: Union[str, datetime.date], key_length: int = 1024):
-        """
-        This class is used to encrypt the keywords in the input file and write the output to the output file.
+class BackendError(EncryptionError, RuntimeError):
+    """
+    The encryption backend failed, e.g. gpg returned an error or the package cryptography is missing.
+    """
 
-        :param inputfile: The input file to be encrypted.
-        :param outfile: The output file to write the encrypted keywords to.
-        :param expiry_date: The expiry date for the public key.
-        :param key_length: The length of the key to be generated.
+class VerificationError(EncryptionError):
+    """
+    An outfile does not match its inputfile, see LS_Dyna_Output_Verifier.
+    """
+
+# ==============================================================================
+class EncryptionPolicy(NamedTuple):
+    """
+    Decides what happens in situations that would otherwise need an answer of the user, so large batches can run unattended.
+
+    existing: an existing outfile or logfile is 'ask'ed for (the former behavior), overwritten ('overwrite'), skipped with its inputfile ('skip') or fails the file ('fail').
+    odd_expiry_date: an expiry date in the past or more than three years in the future is 'ask'ed for, only logged ('warn') or fails the file ('fail').
+    fail_fast: If True, a batch stops at the first file that fails. Otherwise the errors are collected per file and reported at the end.
+    """
+    existing: str = 'ask'
+    odd_expiry_date: str = 'ask'
+    fail_fast: bool = False
+
+    # ==============================================================================
+    def check(self):
+        if self.existing not in EXISTING_FILE_CHOICES:
+            raise ConfigurationError(f"Unknown choice for existing files: {self.existing}. Available: {', '.join(EXISTING_FILE_CHOICES)}")
+        if self.odd_expiry_date not in ODD_EXPIRY_DATE_CHOICES:
+            raise ConfigurationError(f"Unknown choice for odd expiry dates: {self.odd_expiry_date}. Available: {', '.join(ODD_EXPIRY_DATE_CHOICES)}")
+
+    # ==============================================================================
+    def allow_existing(self, path: pathlib.Path) -> bool:
         """
-        self.inputfile: pathlib.Path = pathlib.Path(inputfile).resolve()
-        self.outfile: pathlib.Path = None
-        if outfile is not None:
-            self.outfile: pathlib.Path = pathlib.Path(outfile).resolve()
-        self.expiry_date: Union[str, datetime.date] = expiry_date
-        self.key_length: int = key_length
-        
-        self.keywords_to_encrypt = ['*DEFINE_TABLE', '*DEFINE_CURVE']
-        self.output_text: list = []
+        Returns True if the existing file may be overwritten and False if its inputfile is skipped. Raises OutputExistsError for 'fail'.
+        """
+        if self.existing == 'overwrite':
+            return True
+        if self.existing == 'skip':
+            sh_logger.info(f"{path} already exists, skipping.")
+            return False
+        if self.existing == 'fail':
+            raise OutputExistsError(f"{path} already exists")
+        ask_overwrite(f"{path} already exists.")
+        return True
 
-        self.log_text: str = None
-        self.ls_dyna_user_id: str = None
+    # ==============================================================================
+    def confirm_expiry_date(self, message: str):
+        if self.odd_expiry_date == 'warn':
+            sh_logger.warning(message)
+        elif self.odd_expiry_date == 'fail':
+            raise ConfigurationError(message)
+        else:
+            ask_overwrite(f"{message} Please verify that you want to proceed.")
 
-        self.inputfile_fullpath: pathlib.Path = self.inputfile.resolve()
-        # check if the input file exists
-        self.check_inputfile()
+EXISTING_FILE_CHOICES = ('ask', 'overwrite', 'skip', 'fail')
+ODD_EXPIRY_DATE_CHOICES = ('ask', 'warn', 'fail')
 
-        # get name for output file
-        self.check_outfile()
-        # get name for log file
-        self.logfile_fullpath: pathlib.Path 
-        self.check_logfile()
+# ==============================================================================
+class KeywordMatcher:
+    """
+    This class matches keyword lines against a set of keywords. All keywords are compiled into one regular expression once.
 
-        # check the expiry date
-        self.check_expiry_date()
+    A keyword matches itself and its _TITLE variant, e.g. *DEFINE_CURVE matches *DEFINE_CURVE and *DEFINE_CURVE_TITLE, but not *DEFINE_CURVE_FUNCTION.
+    A trailing '*' turns a keyword into a prefix, e.g. *DEFINE_CURVE* matches every keyword starting with *DEFINE_CURVE. The default keywords are prefixes.
+    The format flags '+', '-' and '%' after a keyword are ignored and the case does not matter.
+    """
 
-        # check the specified key_length to use
-        self.__set_ls_dyna_user_id()
-        self.check_gpg_key()
+    # every line starting with '*' in a binary buffer
+    KEYWORD_LINE_REGEX = re.compile(rb'^\*[^\r\n]*', re.MULTILINE)
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        :param keywords: The keywords to match, e.g. ['*DEFINE_CURVE', '*DEFINE_TABLE'].
+        """
+        self.keywords: Tuple[str, ...] = tuple(keywords)
+
+        alternatives = []
+        for keyword in self.keywords:
+            keyword = keyword.strip().upper()
+            if len(keyword) > 1 and keyword.endswith('*'):
+                alternatives.append(re.escape(keyword[:-1]) + r'[^\s+%-]*')
+            else:
+                alternatives.append(re.escape(keyword) + '(?:_TITLE)?')
+        # (?!) never matches, so an empty list of keywords does not match every line
+        pattern = '|'.join(alternatives) if alternatives else '(?!)'
+        self.regex = re.compile(rf'(?:{pattern})(?=[\s+%-]|$)', re.IGNORECASE)
 
     # ==============================================================================
-    def __set_ls_dyna_user_id(self):
-        # these user ids probably need to be updated at some point if LSTC/ANSYS changes them
-        if self.key_length == 1024:
-            self.ls_dyna_user_id: str = "0x65AEC0AE"
-        elif self.key_length == 2048:
-            self.ls_dyna_user_id: str = "0x60C0435A"
-        else:
-            sh_logger.error("Encryption key length not available/not known. At the moment just 1024- and 2048-bit keys are supported by LS-Dyna. Exiting...")
-            sys.exit()
+    def match(self, line: str) -> Optional[str]:
+        """
+        Returns the matched keyword in upper case or None if the line is not one of the keywords.
+        """
+        match = self.regex.match(line)
+        if match is None:
+            return None
+        return match.group(0).upper()
 
     # ==============================================================================
-    def check_inputfile(self):
-        # check if inputfile exists
-        if not self.inputfile_fullpath.exists():
-            sh_logger.error(f"Specified inputfile does not exist. Exiting...")
-            sys.exit()
+    def scan(self, lines: Sequence[str]) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields (start, end, keyword) for every matching keyword block in a single pass. The block covers lines[start:end] and ends with the next keyword or the end of the lines.
+        Only lines starting with '*' are looked at.
+        """
+        keyword_lines = [i for i, line in enumerate(lines) if line[:1] == '*']
+        start = None
+        keyword = None
+        for i in keyword_lines:
+            if keyword is not None:
+                yield start, i, keyword
+            start = i
+            keyword = self.match(lines[i])
+        if keyword is not None:
+            yield start, len(lines), keyword
 
     # ==============================================================================
-    def check_outfile(self) -> str:
-        # check if outfile was specified, if not set it to inputfile + .asc
-        if self.outfile is None:
-            self.outfile_fullpath: pathlib.Path = self.inputfile_fullpath.with_name(self.inputfile_fullpath.name + '.asc').resolve()
-        # if outfile was specified, make it a full path
-        else:
-            self.outfile_fullpath: pathlib.Path = pathlib.Path(self.outfile).resolve()
-        sh_logger.info(f"Output-File will be called: {self.outfile_fullpath.name}")
+    def scan_buffer(self, buffer) -> Iterator[Tuple[int, int, str]]:
+        """
+        Same as scan, but for a binary buffer like bytes or a mmap. Yields (start, end, keyword) with byte offsets, the block covers buffer[start:end].
+        Only the keyword lines are decoded, all other data is just skipped by the regular expression.
+        """
+        start = None
+        keyword = None
+        for match in self.KEYWORD_LINE_REGEX.finditer(buffer):
+            if keyword is not None:
+                yield start, match.start(), keyword
+            start = match.start()
+            keyword = self.match(match.group(0).decode('utf-8', errors='ignore'))
+        if keyword is not None:
+            yield start, len(buffer), keyword
 
-        # check if outfile already exists, if so ask if it should be overwritten
-        # if not, exit the script
-        if self.outfile_fullpath.exists():
-            ask_overwrite(f"outfile: {self.outfile_fullpath.name} already exists.")
+# ==============================================================================
+class CardParser:
+    """
+    This class splits LS-Dyna cards into their fields. The fields are looked up in precomputed tables of slices instead of being parsed character by character.
 
-        self.outfile = self.outfile_fullpath.name
+    The fields of a card have a fixed width of 10 characters, in the long format 20. The long format is switched on for the whole deck by *KEYWORD LONG=Y
+    or for a single keyword by a '+' after the keyword, a '-' switches a single keyword back to the standard format. A card with commas is in free format.
+    """
+
+    # the slices of the 8 fields of a card by the width of the fields
+    FIELD_SLICES = {width: tuple(slice(i, i + width) for i in range(0, 8 * width, width)) for width in (10, 20)}
+    # the format flag after the name of a keyword
+    FORMAT_FLAG_REGEX = re.compile(r'^\*[^\s+%-]*\s*([+-]?)')
+    # *KEYWORD LONG=Y in the first lines of a deck
+    LONG_FORMAT_REGEX = re.compile(rb'^\*KEYWORD\b[^\n]*\bLONG\s*=\s*Y', re.IGNORECASE | re.MULTILINE)
+
+    def __init__(self, long_format: bool = False):
+        """
+        :param long_format: If True, the deck is in the long format (*KEYWORD LONG=Y).
+        """
+        self.long_format: bool = long_format
 
     # ==============================================================================
-    def check_logfile(self) -> str:
-        # check if logfile exists
-        # if not just write the logfile
-        # if yes, write the logfile
-        # if no, exit script
-        self.logfile_fullpath: pathlib.Path = self.outfile_fullpath.with_name(self.outfile_fullpath.name + '.log').resolve()
-        if self.logfile_fullpath.exists():
-            ask_overwrite(f"Logfile {self.logfile_fullpath} already exists.")
+    @classmethod
+    def is_long_format(cls, head: bytes) -> bool:
+        """
+        Returns True if the *KEYWORD line in the head (the first bytes) of a deck switches on the long format.
+        """
+        return cls.LONG_FORMAT_REGEX.search(head) is not None
 
     # ==============================================================================
-    def check_expiry_date(self) -> bool:
-        # if True, expiry_date was specified as 0 on CLI. That means no expiry date will be set
-        if self.expiry_date == '0' or self.expiry_date is None or self.expiry_date is False:
-            sh_logger.info("No expiry date specified. Continue without expiry date.")
-            self.expiry_date = None
-            return
-        # if True, expiry_date was not specified on CLI, default argument
-        elif isinstance(self.expiry_date, datetime):
-            sh_logger.debug(f"{self.expiry_date=}")
-            sh_logger.debug(f"DATE      {self.expiry_date.strftime('%m/%d/%Y')}")
-            sh_logger.info(f"The default expiry date will be the: {self.expiry_date.strftime('%d. %B %Y')}")
-            return
+    def field_width(self, keyword_line: str) -> int:
+        flag = self.FORMAT_FLAG_REGEX.match(keyword_line)
+        flag = flag.group(1) if flag is not None else ''
+        if flag == '+' or (self.long_format and flag != '-'):
+            return 20
+        return 10
 
-        # if here, expiry_date was specified on CLI
-        # raises ValueError if date is not in the correct format
-        self.expiry_date = datetime.strptime(self.expiry_date, '%m/%d/%Y')
-        
-        # check if date is in the past, if so let user know.
-        if datetime.today() > self.expiry_date:
-            ask_overwrite("The specified expiry date is in the past. Please verify that you want to proceed since it does not make a lot of sense.")
-        # check if date is more then 3 years in the future, if so let user know.
-        elif datetime.today() + timedelta(days=3*365) < self.expiry_date:
-            ask_overwrite("The specified expiry date is more than three years in the future. Please verify that you want to proceed since this is higher than the default.")
+    # ==============================================================================
+    def fields(self, card: str, width: int = 10) -> List[str]:
+        """
+        Returns the stripped fields of a card. Fields after the end of the card are not returned.
+        """
+        if ',' in card:
+            return [field.strip() for field in card.split(',')]
+        card = card.rstrip()
+        return [card[field].strip() for field in self.FIELD_SLICES[width] if field.start < len(card)]
 
-        sh_logger.debug(f"{self.expiry_date=}")
-        sh_logger.debug(f"DATE      {self.expiry_date.strftime('%m/%d/%Y')}")
-        sh_logger.info(f"The chosen expiry date will be the: {self.expiry_date.strftime('%d. %B %Y')}")
-        return
+# ==============================================================================
+class KeywordDocument:
+    """
+    A compact model of an input deck: the file as one contiguous binary buffer (bytes or mmap) plus an index of the keyword blocks to encrypt.
 
-    # ==============================================================================
-    def generate_header(self) -> str:
-        # get user id and date for the header
-        user_id = os.popen('whoami').read().strip()
-        today_date = datetime.now().strftime("%d.%m.%Y")
+    No string is created per line. The index holds four byte offsets per block in an array: the start of the keyword line, the start of the data to encrypt,
+    the end of the data to encrypt and the end of the block. The data starts with the keyword line, in the partial mode after the cards that stay in clear text.
+    The data ends before the comment lines ('$') at the end of the block, which stay unencrypted. Only the blocks to encrypt are ever decoded.
+    """
+
+    __slots__ = ('buffer', 'blocks', 'long_format')
+
+    def __init__(self, buffer, matcher: KeywordMatcher, clear_cards: Optional[Callable[[str], int]] = None, blocks: Optional[Iterable[Tuple[int, int, str]]] = None):
+        """
+        :param buffer: The content of the inputfile, bytes or a mmap.
+        :param matcher: The keywords to encrypt.
+        :param clear_cards: For the partial mode: returns the number of cards after the keyword line that stay in clear text for a keyword.
+        :param blocks: (start, end, keyword) of the blocks to encrypt, e.g. from the index of a KeywordFile. By default the buffer is scanned by the matcher.
+        """
+        self.buffer = buffer
+        self.long_format: bool = CardParser.is_long_format(buffer[:65536])
+        self.blocks: array.array = array.array('q')
+        for start, end, keyword in (matcher.scan_buffer(buffer) if blocks is None else blocks):
+            data_start = start if clear_cards is None else self.card_end(start, end, clear_cards(keyword))
+            self.blocks.extend((start, data_start, self.data_end(start, end), end))
+
+    # ==============================================================================
+    @classmethod
+    def read(cls, path: Union[str, pathlib.Path], matcher: KeywordMatcher, clear_cards: Optional[Callable[[str], int]] = None,
+             blocks: Optional[Iterable[Tuple[int, int, str]]] = None) -> 'KeywordDocument':
+        with open(path, 'rb') as infile:
+            buffer = infile.read()
+        # the lines of the text modes end with '\n' only, so CRLF is converted once for the whole buffer
+        if b'\r\n' in buffer:
+            buffer = buffer.replace(b'\r\n', b'\n')
+            # the offsets of the blocks refer to the file with CRLF, the converted buffer is scanned again
+            blocks = None
+        return cls(buffer, matcher, clear_cards, blocks)
+
+    # ==============================================================================
+    def __len__(self) -> int:
+        return len(self.blocks) // 4
+
+    # ==============================================================================
+    def iter_blocks(self) -> Iterator[Tuple[int, int, int, int]]:
+        """
+        Yields (start, data_start, data_end, end) of every keyword block to encrypt. There is nothing to encrypt if data_start >= data_end.
+        """
+        blocks = self.blocks
+        for i in range(0, len(blocks), 4):
+            yield blocks[i], blocks[i + 1], blocks[i + 2], blocks[i + 3]
+
+    # ==============================================================================
+    def card_end(self, start: int, end: int, cards: int) -> int:
+        # the offset after the keyword line and the given number of cards. Comment lines are no cards, empty lines are (with default values).
+        buffer = self.buffer
+        pos = buffer.find(b'\n', start, end) + 1 or end
+        while cards > 0 and pos < end:
+            if buffer[pos] != 0x24:  # '$'
+                cards -= 1
+            pos = buffer.find(b'\n', pos, end) + 1 or end
+        return pos
+
+    # ==============================================================================
+    def text(self, start: int, end: int) -> str:
+        return self.buffer[start:end].decode('utf-8', errors='ignore')
+
+    # ==============================================================================
+    def data_end(self, start: int, end: int) -> int:
+        # same as LS_Dyna_Encryptor_Base.split_trailing_comments, but the lines are searched backwards in the buffer
+        buffer = self.buffer
+        data_end = end
+        line_end = end - 1 if end > start and buffer[end - 1] == 0x0A else end
+        while line_end > start:
+            line_start = buffer.rfind(b'\n', start, line_end) + 1 or start
+            if buffer[line_start] != 0x24:  # '$'
+                break
+            data_end = line_start
+            line_end = line_start - 1
+        return data_end
+
+    # ==============================================================================
+    def block_payload(self, data_start: int, data_end: int, prologue: bytes = b'', epilogue: bytes = b'') -> bytes:
+        """
+        Returns the payload of a block to encrypt: prologue, the data with a newline after every line and epilogue.
+        The payload is built with a single join from a view of the buffer, so the data is copied once, also for very large blocks.
+        """
+        buffer = self.buffer
+        # only a file with CRLF that is memory mapped needs a converted copy
+        if buffer.find(b'\r', data_start, data_end) != -1:
+            data = buffer[data_start:data_end].replace(b'\r\n', b'\n')
+            return b''.join((prologue, data, b'' if data.endswith(b'\n') else b'\n', epilogue))
+        newline = b'' if buffer[data_end - 1] == 0x0A else b'\n'
+        with memoryview(buffer)[data_start:data_end] as data:
+            return b''.join((prologue, data, newline, epilogue))
+
+# ==============================================================================
+class KeywordIndex(NamedTuple):
+    """
+    The index of a KeywordFile. The blocks are in the order of the file, every block ends with the next keyword line.
+    """
+    # the name of the keyword of every block in upper case without format flags, e.g. '*DEFINE_CURVE_TITLE'
+    keywords: List[str]
+    # the start and end offset of every block in the file
+    offsets: array.array
+    # the id of every block, '' if it has none
+    ids: List[str]
+    # the names of the included files as written in the *INCLUDE keywords
+    includes: List[str]
+    # the directories of the *INCLUDE_PATH keywords, searched for included files
+    include_paths: List[str]
+
+# ==============================================================================
+class KeywordFile:
+    """
+    This class reads keyword files with random access to the keywords, e.g. to the *DEFINE_CURVE with the id 4711 or to all *MAT_* keywords, without parsing the whole file.
+
+    On first access an index of all keywords is built in a single pass over the memory mapped file: the keyword, the byte offsets of its block, its id and the files
+    referenced by *INCLUDE. Only the keyword lines and the cards with the ids are decoded. The id is the first field of the first card, after the title of a _TITLE variant
+    and the heading of a *PART. The index is stored next to the file (.<name>.kwindex.json) and reused as long as the size and the modification time of the file are unchanged.
+    """
+
+    INDEX_VERSION = 2
+    # the name of a keyword without the format flags and options after it
+    KEYWORD_NAME_REGEX = re.compile(r'\*[^\s+%-]*')
+    # keywords with a heading card before the card with the id
+    HEADING_KEYWORDS = frozenset(('*PART', '*PART_INERTIA', '*PART_CONTACT', '*PART_COMPOSITE'))
+    # the first card of these keywords is the name of an included file, the cards of *INCLUDE_PATH are directories
+    INCLUDE_REGEX = re.compile(r'\*INCLUDE(?!_PATH)')
+
+    def __init__(self, path: Union[str, pathlib.Path], *, cache_index: bool = True):
+        """
+        :param path: The keyword file.
+        :param cache_index: If True, the index is read from and written to the index file next to the keyword file.
+        """
+        self.path: pathlib.Path = pathlib.Path(path).resolve()
+        self.cache_index: bool = cache_index
+        self.index_path: pathlib.Path = self.path.with_name(f".{self.path.name}.kwindex.json")
+        self._index: Optional[KeywordIndex] = None
+        # (size, modification time) of the file the index belongs to
+        self._stat: Optional[Tuple[int, int]] = None
+        # the block of every (keyword without _TITLE, id), only built for the first lookup by id
+        self._blocks_by_id: Optional[Dict[Tuple[str, str], int]] = None
+
+    # ==============================================================================
+    @property
+    def index(self) -> KeywordIndex:
+        # the file is checked on every access, a changed file is indexed again
+        stat = self.path.stat()
+        file_stat = (stat.st_size, stat.st_mtime_ns)
+        if self._index is None or self._stat != file_stat:
+            index = self.load_index(file_stat) if self.cache_index else None
+            if index is None:
+                index = self.build_index()
+                if self.cache_index:
+                    self.save_index(index, file_stat)
+            self._index, self._stat, self._blocks_by_id = index, file_stat, None
+        return self._index
+
+    # ==============================================================================
+    def load_index(self, file_stat: Tuple[int, int]) -> Optional[KeywordIndex]:
+        """
+        Returns the index stored next to the file or None if there is none or it belongs to another version of the file.
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as index_file:
+                stored = json.load(index_file)
+            if stored['index_version'] != self.INDEX_VERSION or (stored['size'], stored['mtime_ns']) != file_stat:
+                return None
+            return KeywordIndex(stored['keywords'], array.array('q', stored['offsets']), stored['ids'], stored['includes'], stored['include_paths'])
+        except (OSError, ValueError, KeyError, TypeError):
+            # a missing or damaged index is just built again
+            return None
+
+    # ==============================================================================
+    def save_index(self, index: KeywordIndex, file_stat: Tuple[int, int]):
+        stored = {'index_version': self.INDEX_VERSION, 'size': file_stat[0], 'mtime_ns': file_stat[1], 'keywords': index.keywords,
+                  'offsets': index.offsets.tolist(), 'ids': index.ids, 'includes': index.includes, 'include_paths': index.include_paths}
+        # write to a unique temporary file first, the rename is atomic and a reader never sees a partial index
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_path.parent, prefix='.tmp_')
+        except OSError as error:
+            sh_logger.debug(f"keyword index not stored ({error})")
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as index_file:
+                json.dump(stored, index_file, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    # ==============================================================================
+    def build_index(self) -> KeywordIndex:
+        keywords, ids, includes, include_paths = [], [], [], []
+        offsets = array.array('q')
+        with open(self.path, 'rb') as infile:
+            # an empty file can not be mapped
+            if os.fstat(infile.fileno()).st_size == 0:
+                return KeywordIndex(keywords, offsets, ids, includes, include_paths)
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                card_parser = CardParser(CardParser.is_long_format(buffer[:65536]))
+                starts = [match.start() for match in KeywordMatcher.KEYWORD_LINE_REGEX.finditer(buffer)]
+                for start, end in zip(starts, starts[1:] + [len(buffer)]):
+                    # the keyword line and the cards up to the one with the id
+                    cards = self.read_cards(buffer, start, end, 3)
+                    keyword = self.KEYWORD_NAME_REGEX.match(cards[0]).group(0).upper()
+                    keywords.append(keyword)
+                    offsets.extend((start, end))
+
+                    if self.INCLUDE_REGEX.match(keyword):
+                        # *INCLUDE takes a file per card, the other variants only one
+                        includes.extend(self.include_names(self.read_cards(buffer, start, end, None)[1:], single=keyword != '*INCLUDE'))
+                        ids.append('')
+                        continue
+                    if keyword.startswith('*INCLUDE_PATH'):
+                        include_paths.extend(card.strip() for card in self.read_cards(buffer, start, end, None)[1:] if card.strip())
+                        ids.append('')
+                        continue
+                    id_card = 1 + keyword.endswith('_TITLE') + (keyword in self.HEADING_KEYWORDS)
+                    fields = card_parser.fields(cards[id_card], card_parser.field_width(cards[0])) if len(cards) > id_card else []
+                    ids.append(fields[0] if fields else '')
+        return KeywordIndex(keywords, offsets, ids, includes, include_paths)
+
+    # ==============================================================================
+    @staticmethod
+    def read_cards(buffer, start: int, end: int, count: Optional[int]) -> List[str]:
+        # the keyword line and the first count cards of a block (all if count is None), comment lines are skipped
+        cards = []
+        pos = start
+        while pos < end and (count is None or len(cards) <= count):
+            line_end = buffer.find(b'\n', pos, end)
+            if line_end == -1:
+                line_end = end
+            if not cards or buffer[pos] != 0x24:  # '$'
+                cards.append(buffer[pos:line_end].decode('utf-8', errors='ignore').rstrip('\r'))
+            pos = line_end + 1
+        return cards
+
+    # ==============================================================================
+    @staticmethod
+    def include_names(cards: List[str], single: bool = False) -> List[str]:
+        # a long file name is continued on the next card if a card ends with ' +'
+        names = []
+        name = ''
+        for card in cards:
+            if card.endswith(' +'):
+                name += card[:-2]
+                continue
+            names.append((name + card).strip())
+            name = ''
+            if single:
+                break
+        return [name for name in names if name]
+
+    # ==============================================================================
+    def __len__(self) -> int:
+        return len(self.index.keywords)
+
+    # ==============================================================================
+    @property
+    def includes(self) -> List[pathlib.Path]:
+        """
+        The files referenced by *INCLUDE, relative names are resolved against the directory of the file.
+        """
+        return [self.path.parent / name for name in self.index.includes]
+
+    # ==============================================================================
+    def iter_blocks(self, keywords: Union[KeywordMatcher, Iterable[str], None] = None) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields (start, end, keyword) of all keyword blocks or only of the given keywords. The keywords are matched like by KeywordMatcher,
+        e.g. '*DEFINE_CURVE' also matches *DEFINE_CURVE_TITLE and '*MAT_*' matches all materials.
+        """
+        index = self.index
+        if keywords is None:
+            for i, keyword in enumerate(index.keywords):
+                yield index.offsets[2 * i], index.offsets[2 * i + 1], keyword
+            return
+
+        matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+        # the same keyword names occur many times, every name is matched once
+        matches = {}
+        for i, keyword in enumerate(index.keywords):
+            if keyword not in matches:
+                matches[keyword] = matcher.match(keyword)
+            if matches[keyword] is not None:
+                yield index.offsets[2 * i], index.offsets[2 * i + 1], matches[keyword]
+
+    # ==============================================================================
+    def find(self, keyword: str, keyword_id: Union[int, str]) -> Optional[Tuple[int, int, str]]:
+        """
+        Returns (start, end, keyword) of the keyword with the id or None, e.g. find('*DEFINE_CURVE', 4711) for the curve 4711 with or without title.
+        """
+        index = self.index
+        if self._blocks_by_id is None:
+            self._blocks_by_id = {}
+            for i, (name, block_id) in enumerate(zip(index.keywords, index.ids)):
+                if block_id:
+                    # the first keyword with an id wins, like for duplicate ids in LS-Dyna
+                    self._blocks_by_id.setdefault((name[:-len('_TITLE')] if name.endswith('_TITLE') else name, block_id), i)
+        keyword = keyword.strip().upper()
+        i = self._blocks_by_id.get((keyword[:-len('_TITLE')] if keyword.endswith('_TITLE') else keyword, str(keyword_id).strip()))
+        if i is None:
+            return None
+        return index.offsets[2 * i], index.offsets[2 * i + 1], index.keywords[i]
+
+    # ==============================================================================
+    def read_block(self, start: int, end: int) -> str:
+        """
+        Returns the text of a block, only this part of the file is read.
+        """
+        with open(self.path, 'rb') as infile:
+            infile.seek(start)
+            return infile.read(end - start).replace(b'\r\n', b'\n').decode('utf-8', errors='ignore')
+
+    # ==============================================================================
+    def get(self, keyword: str, keyword_id: Union[int, str]) -> Optional[str]:
+        """
+        Returns the text of the keyword with the id or None, e.g. get('*DEFINE_CURVE', 4711).
+        """
+        block = self.find(keyword, keyword_id)
+        return self.read_block(block[0], block[1]) if block is not None else None
+
+# ==============================================================================
+class EncryptionBackend:
+    """
+    The interface of all encryption backends. A backend encrypts payloads for a single recipient and returns the lines of one armored OpenPGP message per payload.
+    """
+
+    # the name of the backend for --backend
+    name: str = None
+
+    def __init__(self, *, recipient: str):
+        """
+        :param recipient: The key id the payloads are encrypted for.
+        """
+        self.recipient: str = recipient
+
+    # ==============================================================================
+    def encrypt(self, payload: bytes) -> List[str]:
+        raise NotImplementedError
+
+    # ==============================================================================
+    def encrypt_many(self, payloads: Sequence[bytes]) -> List[List[str]]:
+        """
+        Encrypts all payloads and returns the armored lines for each payload in the same order.
+        """
+        return [self.encrypt(payload) for payload in payloads]
+
+    # ==============================================================================
+    def new_session(self):
+        """
+        Called at the start of every file. Backends that keep state across the messages of a file (e.g. a reused session key) reset it here.
+        """
+
+    # ==============================================================================
+    async def encrypt_async(self, payload: bytes) -> List[str]:
+        import asyncio
+        # a backend working in this process would block the event loop, so it runs in the default thread pool of the loop
+        return await asyncio.get_running_loop().run_in_executor(None, self.encrypt, payload)
+
+# ==============================================================================
+class GpgBackend(EncryptionBackend):
+    """
+    This class wraps the gpg binary and encrypts payloads for a single recipient.
+
+    All blocks of a file are encrypted with one gpg process by using the --multifile option. gpg writes one independent armored message per input file, which is exactly what LS-Dyna expects for every encrypted keyword.
+    The plaintext for --multifile is only written to a uniquely named directory on tmpfs. If there is no tmpfs, every payload is piped through its own gpg process instead, so no plaintext is ever written to a disk.
+    """
+
+    name = 'gpg'
+
+    def __init__(self, *, recipient: str, gpg_binary: str = 'gpg', homedir: Optional[str] = None):
+        """
+        :param recipient: The key id or fingerprint the payloads are encrypted for.
+        :param gpg_binary: The gpg executable to call.
+        :param homedir: The GnuPG home to use instead of the one of the user, e.g. KeyRegistry.gnupg_home().
+        """
+        super().__init__(recipient=recipient)
+        self.gpg_binary: str = gpg_binary
+        self.homedir: Optional[str] = homedir
+
+    # ==============================================================================
+    def base_command(self) -> List[str]:
+        # gpg with the GnuPG home of this backend, if it has one
+        return [self.gpg_binary, '--homedir', self.homedir] if self.homedir is not None else [self.gpg_binary]
+
+    # ==============================================================================
+    def command(self, *args: str) -> List[str]:
+        # the options are the same as in the former per-block call, --batch and --yes avoid any interactive questions
+        return [*self.base_command(), '--batch', '--yes', '-e', '-a', '--rfc2440', '--textmode', '--cipher-algo', 'AES', '--compress-algo', '0',
+                '-r', self.recipient, '--trust-model', 'always', *args]
+
+    # ==============================================================================
+    def check_result(self, result: subprocess.CompletedProcess):
+        if result.returncode != 0:
+            sh_logger.debug(result.stderr.decode('utf-8', errors='ignore'))
+            raise BackendError(f"gpg failed to encrypt the data (exit code {result.returncode})")
+
+    # ==============================================================================
+    def encrypt(self, payload: bytes) -> List[str]:
+        """
+        Encrypts one payload by streaming it to the stdin of gpg and returns the armored lines read from its stdout.
+        """
+        result = subprocess.run(self.command(), input=payload, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.check_result(result)
+        return result.stdout.decode('utf-8', errors='ignore').splitlines()
+
+    # ==============================================================================
+    def encrypt_many(self, payloads: Sequence[bytes]) -> List[List[str]]:
+        """
+        Encrypts all payloads with one gpg process and returns the armored lines for each payload in the same order.
+        """
+        if not payloads:
+            return []
+
+        tmpfs_dir = find_tmpfs_dir()
+        if tmpfs_dir is None:
+            return [self.encrypt(payload) for payload in payloads]
+
+        # the files are written to a private (mode 0700), uniquely named directory on tmpfs so that concurrent runs do not interfere
+        with tempfile.TemporaryDirectory(prefix='lsdyna_enc_', dir=tmpfs_dir) as tmp_dir:
+            tmp_files = []
+            for i, payload in enumerate(payloads):
+                tmp_file = pathlib.Path(tmp_dir, f"block_{i:07d}.txt")
+                tmp_file.write_bytes(payload)
+                tmp_files.append(tmp_file)
+
+            # the filenames are passed on stdin to not run into the limit of the command line length
+            file_list = ''.join(f"{tmp_file}\n" for tmp_file in tmp_files).encode('utf-8')
+            result = subprocess.run(self.command('--multifile'), input=file_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.check_result(result)
+
+            enc_texts = []
+            for tmp_file in tmp_files:
+                with open(tmp_file.with_name(tmp_file.name + '.asc'), 'r', encoding='utf-8', errors='ignore') as tmp_enc_file:
+                    enc_texts.append(tmp_enc_file.read().splitlines())
+
+        return enc_texts
+
+    # ==============================================================================
+    async def encrypt_async(self, payload: bytes) -> List[str]:
+        """
+        Same as encrypt, but gpg is started with asyncio so that the event loop is not blocked.
+        Raises RuntimeError if gpg fails, since exiting is no option inside of a service.
+        """
+        import asyncio
+        process = await asyncio.create_subprocess_exec(*self.command(), stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.PIPE)
+        stdout, stderr = await process.communicate(payload)
+        if process.returncode != 0:
+            sh_logger.debug(stderr.decode('utf-8', errors='ignore'))
+            raise BackendError(f"gpg failed to encrypt the data (exit code {process.returncode})")
+        return stdout.decode('utf-8', errors='ignore').splitlines()
+
+# ==============================================================================
+# OpenPGP (RFC 2440/4880) helpers of the NativeOpenPGPBackend
+# ==============================================================================
+@functools.lru_cache(maxsize=None)
+def crc24_table() -> Tuple[int, ...]:
+    table = []
+    for byte in range(256):
+        crc = byte << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= 0x1864CFB
+        table.append(crc & 0xFFFFFF)
+    return tuple(table)
+
+# =================================================================================================
+def crc24(data: bytes) -> int:
+    """
+    Returns the CRC-24 checksum of the ASCII armor (RFC 4880, section 6.1).
+    """
+    table = crc24_table()
+    crc = 0xB704CE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFF) ^ table[(crc >> 16) ^ byte]
+    return crc
+
+# =================================================================================================
+def armor_message(data: bytes) -> List[str]:
+    """
+    Returns the lines of an armored PGP MESSAGE like gpg writes it.
+    """
+    encoded = base64.b64encode(data).decode('ascii')
+    crc = base64.b64encode(crc24(data).to_bytes(3, 'big')).decode('ascii')
+    return ['-----BEGIN PGP MESSAGE-----', '', *(encoded[i:i + 64] for i in range(0, len(encoded), 64)), f"={crc}", '-----END PGP MESSAGE-----']
+
+# =================================================================================================
+def dearmor(armored: str) -> bytes:
+    """
+    Returns the binary data of an armored OpenPGP block. Raises ValueError if the checksum does not match.
+    """
+    lines = [line.strip() for line in armored.strip().splitlines()]
+    # the armor headers (e.g. Version) end with the first empty line
+    body = lines[lines.index('') + 1:-1]
+    checksum = None
+    if body and body[-1].startswith('='):
+        checksum = body.pop()
+    data = base64.b64decode(''.join(body), validate=True)
+    if checksum is not None and base64.b64decode(checksum[1:]) != crc24(data).to_bytes(3, 'big'):
+        raise ValueError("CRC-24 checksum of the armored data does not match")
+    return data
+
+# =================================================================================================
+def iter_packets(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yields (tag, body) of all OpenPGP packets in data. Old packet headers with definite lengths and new packet headers are supported.
+    """
+    pos = 0
+    while pos < len(data):
+        ctb = data[pos]
+        if not ctb & 0x80:
+            raise ValueError(f"invalid OpenPGP packet header at offset {pos}")
+        parts = []
+        if ctb & 0x40:
+            # new format. gpg splits large bodies into parts with partial body lengths, the last part has a definite length.
+            tag = ctb & 0x3F
+            pos += 1
+            first = data[pos]
+            while 224 <= first < 255:
+                part_length = 1 << (first & 0x1F)
+                if pos + 1 + part_length >= len(data):
+                    raise ValueError(f"OpenPGP packet at offset {pos} is truncated")
+                parts.append(data[pos + 1:pos + 1 + part_length])
+                pos += 1 + part_length
+                first = data[pos]
+            if first < 192:
+                length, pos = first, pos + 1
+            elif first < 224:
+                length, pos = ((first - 192) << 8) + data[pos + 1] + 192, pos + 2
+            else:
+                length, pos = int.from_bytes(data[pos + 1:pos + 5], 'big'), pos + 5
+        else:
+            # old format
+            tag = (ctb >> 2) & 0x0F
+            length_bytes = {0: 1, 1: 2, 2: 4}.get(ctb & 0x03)
+            if length_bytes is None:
+                raise ValueError("indeterminate packet lengths are not supported")
+            length, pos = int.from_bytes(data[pos + 1:pos + 1 + length_bytes], 'big'), pos + 1 + length_bytes
+        if pos + length > len(data):
+            raise ValueError(f"OpenPGP packet at offset {pos} is truncated")
+        yield tag, b''.join((*parts, data[pos:pos + length])) if parts else data[pos:pos + length]
+        pos += length
+
+# =================================================================================================
+def old_format_packet(tag: int, body: bytes) -> bytes:
+    # gpg writes the public-key encrypted session key packet with an old format header
+    if len(body) < 0x100:
+        return bytes([0x80 | tag << 2]) + len(body).to_bytes(1, 'big') + body
+    if len(body) < 0x10000:
+        return bytes([0x80 | tag << 2 | 1]) + len(body).to_bytes(2, 'big') + body
+    return bytes([0x80 | tag << 2 | 2]) + len(body).to_bytes(4, 'big') + body
+
+# =================================================================================================
+def new_format_packet(tag: int, body: bytes) -> bytes:
+    length = len(body)
+    if length < 192:
+        header = bytes([length])
+    elif length < 8384:
+        header = bytes([((length - 192) >> 8) + 192, (length - 192) & 0xFF])
+    else:
+        header = b'\xff' + length.to_bytes(4, 'big')
+    return bytes([0xC0 | tag]) + header + body
+
+# =================================================================================================
+def mpi(value: int) -> bytes:
+    # multiprecision integer: number of bits followed by the big endian value
+    return value.bit_length().to_bytes(2, 'big') + value.to_bytes((value.bit_length() + 7) // 8, 'big')
+
+# =================================================================================================
+def read_mpis(data: bytes, count: int) -> List[int]:
+    values = []
+    pos = 0
+    for _ in range(count):
+        num_bytes = (int.from_bytes(data[pos:pos + 2], 'big') + 7) // 8
+        values.append(int.from_bytes(data[pos + 2:pos + 2 + num_bytes], 'big'))
+        pos += 2 + num_bytes
+    return values
+
+# =================================================================================================
+class OpenPGPPublicKey(NamedTuple):
+    """
+    A (sub)key of a public key block. values are the MPIs of the key, e.g. (p, g, y) for ElGamal.
+    """
+    fingerprint: bytes
+    algorithm: int
+    values: Tuple[int, ...]
+    is_subkey: bool
+
+    @property
+    def key_id(self) -> bytes:
+        return self.fingerprint[-8:]
+
+# =================================================================================================
+@functools.lru_cache(maxsize=None)
+def load_public_keys(armored: str) -> Tuple[Tuple[OpenPGPPublicKey, ...], ...]:
+    """
+    Parses an armored public key block once and returns the keys grouped by primary key: ((primary, subkey, ...), ...)
+    """
+    # number of MPIs of the public key algorithms: RSA, ElGamal (encrypt only), DSA, ElGamal
+    num_values = {1: 2, 2: 2, 3: 2, 16: 3, 17: 4, 20: 3}
+    key_blocks = []
+    for tag, body in iter_packets(dearmor(armored)):
+        # 6: public key, 14: public subkey. User ids and signatures are not needed for the encryption
+        if tag not in (6, 14):
+            continue
+        if body[0] != 4:
+            raise ValueError(f"only version 4 keys are supported, not version {body[0]}")
+        algorithm = body[5]
+        fingerprint = hashlib.sha1(b'\x99' + len(body).to_bytes(2, 'big') + body).digest()
+        key = OpenPGPPublicKey(fingerprint, algorithm, tuple(read_mpis(body[6:], num_values.get(algorithm, 0))), tag == 14)
+        if tag == 6:
+            key_blocks.append([key])
+        elif key_blocks:
+            key_blocks[-1].append(key)
+    return tuple(tuple(block) for block in key_blocks)
+
+# ==============================================================================
+class NativeOpenPGPBackend(EncryptionBackend):
+    """
+    This backend builds the OpenPGP messages in this process instead of calling gpg. No keyring, no gpg process and no --trust-model workaround are needed.
+
+    The messages have the same structure as the ones gpg writes with the options of GpgBackend (--rfc2440, --textmode, --cipher-algo AES, --compress-algo 0):
+    a public-key encrypted session key packet (tag 1, ElGamal) followed by a symmetrically encrypted data packet (tag 9, AES-128 in OpenPGP CFB mode without MDC) with a literal data packet (tag 11, text mode) inside.
+    The public keys are parsed once per process. AES is done by the optional package cryptography.
+
+    With reuse_session_key, one session key is used for all messages of a file and the public-key encrypted session key packet is computed only once.
+    LS-Dyna needs every encrypted keyword as a complete message, so the packet is still repeated in every message, only the expensive ElGamal step is saved.
+    Each message still gets its own random CFB prefix. The trade-off: whoever gets the session key of one keyword can decrypt all keywords of the file.
+    """
+
+    name = 'native'
+
+    # bits of the random exponent k of ElGamal per bits of p. Like libgcrypt, Wiener's table with a safety margin of 3/2 is used instead of a k as large as p.
+    WIENER_MAP = ((512, 119), (768, 145), (1024, 165), (1280, 183), (1536, 198), (1792, 212), (2048, 225), (2304, 237), (2560, 249), (2816, 259),
+                  (3072, 269), (3328, 279), (3584, 288), (3840, 296), (4096, 305))
+
+    def __init__(self, *, recipient: str, public_keys: Optional[Sequence[str]] = None, reuse_session_key: bool = False):
+        """
+        :param recipient: The key id the payloads are encrypted for.
+        :param public_keys: Armored public key blocks to search for the recipient. Default = the LS-Dyna public keys.
+        :param reuse_session_key: If True, all messages until the next call of new_session share one session key.
+        """
+        super().__init__(recipient=recipient)
+        self.reuse_session_key: bool = reuse_session_key
+        # (session key, public-key encrypted session key packet) if reuse_session_key, created by the first message of the file
+        self._session: Optional[Tuple[bytes, bytes]] = None
+        self._session_lock = threading.Lock()
+        try:
+            from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+        except ImportError:
+            raise BackendError("The native backend needs the package cryptography (pip install cryptography)") from None
+        try:
+            # newer versions of cryptography moved CFB to the legacy ciphers
+            from cryptography.hazmat.decrepit.ciphers.modes import CFB
+        except ImportError:
+            from cryptography.hazmat.primitives.ciphers.modes import CFB
+        self._cipher, self._aes, self._cfb = Cipher, algorithms.AES, CFB
+
+        if public_keys is None:
+            public_keys = (LS_Dyna_Encryptor.LS_DYNA_PUBLIC_PGP_KEY_1028_BIT, LS_Dyna_Encryptor.LS_DYNA_PUBLIC_PGP_KEY_2048_BIT)
+        self.key: OpenPGPPublicKey = self.find_encryption_key(public_keys, recipient)
+        p = self.key.values[0]
+        self.k_bits: int = next((bits for p_bits, bits in self.WIENER_MAP if p.bit_length() <= p_bits), self.WIENER_MAP[-1][1]) * 3 // 2
+
+    # ==============================================================================
+    @staticmethod
+    def find_encryption_key(public_keys: Sequence[str], recipient: str) -> OpenPGPPublicKey:
+        # the recipient may be the (short) id of the primary key or of the subkey, the encryption is done with the ElGamal (sub)key
+        key_id = recipient.upper()[2:] if recipient.lower().startswith('0x') else recipient.upper()
+        for armored in public_keys:
+            for key_block in load_public_keys(armored):
+                if not any(key.fingerprint.hex().upper().endswith(key_id) for key in key_block):
+                    continue
+                for key in key_block:
+                    if key.algorithm in (16, 20):
+                        return key
+                raise EncryptionKeyError(f"The key {recipient} has no ElGamal key for encryption")
+        raise EncryptionKeyError(f"The key {recipient} was not found in the public keys of the native backend")
+
+    # ==============================================================================
+    def encrypt_session_key(self, session_key: bytes) -> bytes:
+        """
+        Returns the body of the public-key encrypted session key packet (tag 1, version 3) for an AES-128 session key.
+        """
+        p, g, y = self.key.values
+        # EME-PKCS1-v1_5: 0x00 0x02 nonzero random bytes 0x00 message, the message is the cipher (7 = AES-128), the key and its checksum
+        message = bytes([7]) + session_key + (sum(session_key) % 0x10000).to_bytes(2, 'big')
+        padding_length = (p.bit_length() + 7) // 8 - 3 - len(message)
+        padding = bytearray()
+        while len(padding) < padding_length:
+            padding.extend(byte for byte in os.urandom(padding_length) if byte)
+        encoded = int.from_bytes(b'\x00\x02' + bytes(padding[:padding_length]) + b'\x00' + message, 'big')
+
+        k = secrets.randbits(self.k_bits) | (1 << (self.k_bits - 1))
+        return bytes([3]) + self.key.key_id + bytes([16]) + mpi(pow(g, k, p)) + mpi(encoded * pow(y, k, p) % p)
+
+    # ==============================================================================
+    def encrypt_data(self, session_key: bytes, payload: bytes) -> bytes:
+        """
+        Returns the body of the symmetrically encrypted data packet (tag 9) with the payload as literal data packet inside.
+        """
+        # text mode: the lines end with CRLF, like gpg --textmode does it
+        text = payload.replace(b'\r\n', b'\n').replace(b'\n', b'\r\n')
+        literal = new_format_packet(11, b't\x00' + int(time.time()).to_bytes(4, 'big') + text)
+
+        # OpenPGP CFB: 16 random bytes plus a repetition of the last two are encrypted with an IV of zeros. The data follows after a resync,
+        # which is a standard CFB with the last 16 bytes of the encrypted prefix as IV.
+        prefix = os.urandom(16)
+        encryptor = self._cipher(self._aes(session_key), self._cfb(bytes(16))).encryptor()
+        encrypted_prefix = encryptor.update(prefix + prefix[-2:])
+        encryptor = self._cipher(self._aes(session_key), self._cfb(encrypted_prefix[2:18])).encryptor()
+        return encrypted_prefix + encryptor.update(literal) + encryptor.finalize()
+
+    # ==============================================================================
+    def new_session(self):
+        with self._session_lock:
+            self._session = None
+
+    # ==============================================================================
+    def session(self) -> Tuple[bytes, bytes]:
+        """
+        Returns the session key and the public-key encrypted session key packet for the next message.
+        """
+        if not self.reuse_session_key:
+            session_key = os.urandom(16)
+            return session_key, old_format_packet(1, self.encrypt_session_key(session_key))
+        # the lock is needed since the windows of a file can be encrypted by several threads (max_workers)
+        with self._session_lock:
+            if self._session is None:
+                session_key = os.urandom(16)
+                self._session = (session_key, old_format_packet(1, self.encrypt_session_key(session_key)))
+            return self._session
+
+    # ==============================================================================
+    def encrypt(self, payload: bytes) -> List[str]:
+        session_key, session_key_packet = self.session()
+        return armor_message(session_key_packet + new_format_packet(9, self.encrypt_data(session_key, payload)))
+
+# the backends available for --backend
+ENCRYPTION_BACKENDS = {backend.name: backend for backend in (GpgBackend, NativeOpenPGPBackend)}
+
+# where gpg finds the LS-Dyna keys: 'user' = the keyring of the user (GNUPGHOME), 'ephemeral' = a temporary GnuPG home of the KeyRegistry
+KEYRINGS = ('user', 'ephemeral')
+
+# ==============================================================================
+def key_length_tuple(key_length: Union[int, Sequence[int]]) -> Tuple[int, ...]:
+    # a single key length or several ones, e.g. (1024, 2048). Duplicates are removed, the order is kept.
+    key_lengths = tuple(dict.fromkeys([key_length] if isinstance(key_length, int) else key_length))
+    if not key_lengths:
+        raise ConfigurationError("At least one key length is needed")
+    return key_lengths
+
+# ==============================================================================
+class LSDynaKey(NamedTuple):
+    """
+    A LS-Dyna public key of the KeyRegistry. fingerprint is the one of the primary key, encryption_key the ElGamal subkey.
+    """
+    key_length: int
+    user_id: str
+    fingerprint: str
+    encryption_key: OpenPGPPublicKey
+
+    @property
+    def key_id(self) -> str:
+        # the long id of the encryption key, as written to the public-key encrypted session key packets
+        return self.encryption_key.key_id.hex().upper()
+
+# ==============================================================================
+class KeyRegistry:
+    """
+    This class holds the LS-Dyna public keys shipped with this module (LS_Dyna_Encryptor.LS_DYNA_PUBLIC_PGP_KEY_*), parsed and fingerprinted once per process.
+
+    The user ids of LS_DYNA_USER_IDS are checked against the shipped keys, including the key length of the encryption key.
+    gnupg_home imports the keys once per process into a temporary GnuPG home, which is removed at the exit of the process. gpg then does not depend on
+    the keyring of the user, and the recipient is given by the full fingerprint, so gpg can not pick another key with the same short id.
+    """
+
+    _lock = threading.Lock()
+    _keys: Dict[int, LSDynaKey] = {}
+    # the temporary GnuPG home per gpg binary
+    _gnupg_homes: Dict[str, str] = {}
+
+    # ==============================================================================
+    @staticmethod
+    def armored_keys() -> Dict[int, str]:
+        return {1024: LS_Dyna_Encryptor.LS_DYNA_PUBLIC_PGP_KEY_1028_BIT, 2048: LS_Dyna_Encryptor.LS_DYNA_PUBLIC_PGP_KEY_2048_BIT}
+
+    # ==============================================================================
+    @classmethod
+    def key(cls, key_length: int) -> LSDynaKey:
+        with cls._lock:
+            if key_length not in cls._keys:
+                cls._keys[key_length] = cls.load_key(key_length)
+            return cls._keys[key_length]
+
+    # ==============================================================================
+    @classmethod
+    def load_key(cls, key_length: int) -> LSDynaKey:
+        user_id = LS_Dyna_Encryptor_Base.LS_DYNA_USER_IDS.get(key_length)
+        armored = cls.armored_keys().get(key_length)
+        if user_id is None or armored is None:
+            raise ConfigurationError(f"Encryption key length {key_length} not available/not known. Supported: {sorted(LS_Dyna_Encryptor_Base.LS_DYNA_USER_IDS)}")
+        encryption_key = NativeOpenPGPBackend.find_encryption_key([armored], user_id)
+        # e.g. if only one of the user ids or keys was updated
+        if encryption_key.values[0].bit_length() != key_length:
+            raise EncryptionKeyError(f"The key {user_id} has {encryption_key.values[0].bit_length()} bits instead of {key_length}")
+        primary = next(key_block[0] for key_block in load_public_keys(armored) if encryption_key in key_block)
+        return LSDynaKey(key_length, user_id, primary.fingerprint.hex().upper(), encryption_key)
+
+    # ==============================================================================
+    @classmethod
+    def gnupg_home(cls, gpg_binary: str = 'gpg') -> str:
+        """
+        Returns a temporary GnuPG home (mode 0700) with all shipped LS-Dyna public keys. It is created on first use and removed at the exit of the process.
+        """
+        with cls._lock:
+            home = cls._gnupg_homes.get(gpg_binary)
+            if home is not None:
+                return home
+            home = tempfile.mkdtemp(prefix='lsdyna_gnupg_')
+            atexit.register(cls.remove_gnupg_home, home)
+            keys = ''.join(armored + '\n' for armored in cls.armored_keys().values()).encode('utf-8')
+            result = subprocess.run([gpg_binary, '--homedir', home, '--batch', '--import'], input=keys, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                sh_logger.debug(result.stderr.decode('utf-8', errors='ignore'))
+                raise BackendError(f"gpg could not import the LS-Dyna keys into {home} (exit code {result.returncode})")
+            sh_logger.debug(f"LS-Dyna keys imported into {home}")
+            cls._gnupg_homes[gpg_binary] = home
+            return home
+
+    # ==============================================================================
+    @staticmethod
+    def remove_gnupg_home(home: str):
+        # newer versions of gpg may start a keyboxd or gpg-agent for the home, they would keep running otherwise
+        with contextlib.suppress(OSError):
+            subprocess.run(['gpgconf', '--homedir', home, '--kill', 'all'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(home, ignore_errors=True)
+
+    # ==============================================================================
+    @classmethod
+    def gpg_backend(cls, key_length: int, gpg_binary: str = 'gpg') -> GpgBackend:
+        # gpg with the temporary GnuPG home, encrypting for the full fingerprint
+        return GpgBackend(recipient=cls.key(key_length).fingerprint, gpg_binary=gpg_binary, homedir=cls.gnupg_home(gpg_binary))
+
+# ==============================================================================
+class BlockCache:
+    """
+    This class is an on-disk cache of encrypted keywords.
+
+    The entries are addressed by a hash of the plaintext and everything else that changes the encrypted output (recipient, expiry date, *VENDOR message).
+    Unchanged keywords are therefore not encrypted again. New entries are written to a temporary file and renamed, so several processes can share one cache directory.
+    If the cache grows beyond max_bytes, the least recently used entries are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        :param directory: The directory of the cache. It is created if it does not exist.
+        :param max_bytes: The maximum size of all entries in bytes.
+        """
+        self.directory: pathlib.Path = pathlib.Path(directory).resolve()
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.max_bytes: int = max_bytes
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stores: int = 0
+        self.evictions: int = 0
+
+        self._lock = threading.Lock()
+        # the size is only determined when it is needed for the first time
+        self._size: Optional[int] = None
+
+    # ==============================================================================
+    @staticmethod
+    def key(payload: bytes, recipient: str, expiry_date: str, vendor_message: str) -> str:
+        # the parts are separated by a NUL byte so that they can not be shifted into each other
+        digest = hashlib.sha256()
+        for part in (recipient, expiry_date, vendor_message):
+            digest.update(part.encode('utf-8') + b'\0')
+        digest.update(payload)
+        return digest.hexdigest()
+
+    # ==============================================================================
+    def path(self, key: str) -> pathlib.Path:
+        # the entries are spread over 256 subdirectories to keep the directories small
+        return self.directory / key[:2] / f"{key}.asc"
+
+    # ==============================================================================
+    def get(self, key: str) -> Optional[List[str]]:
+        """
+        Returns the encrypted lines for the key or None if there is no (valid) entry.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as entry:
+                enc_text = entry.read().splitlines()
+        except OSError:
+            enc_text = None
+
+        # a damaged entry is treated like a missing one and overwritten later on
+        if not enc_text or enc_text[0] != '-----BEGIN PGP MESSAGE-----':
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # the modification time is the last usage for the eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return enc_text
+
+    # ==============================================================================
+    def put(self, key: str, enc_text: List[str]):
+        """
+        Stores the encrypted lines for the key.
+        """
+        path = self.path(key)
+        path.parent.mkdir(mode=0o700, exist_ok=True)
+        data = ''.join(line + '\n' for line in enc_text).encode('utf-8')
+
+        # write to a unique temporary file first, the rename is atomic and readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp_')
+        try:
+            with os.fdopen(fd, 'wb') as entry:
+                entry.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self.stores += 1
+            if self._size is not None:
+                self._size += len(data)
+        if self.size() > self.max_bytes:
+            self.evict()
+
+    # ==============================================================================
+    def entries(self) -> list:
+        # (last usage, size, path) of all entries
+        entries = []
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith('.asc'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    # ==============================================================================
+    def size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self.entries())
+        return self._size
+
+    # ==============================================================================
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is below 90% of max_bytes.
+        """
+        with open(self.directory / '.lock', 'a') as lock_file:
+            # only one process evicts at a time, entries removed by another process in the meantime are just skipped
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = sorted(self.entries())
+            size = sum(entry_size for _, entry_size, _ in entries)
+            evictions = 0
+            for _, entry_size, path in entries:
+                if size <= 0.9 * self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    evictions += 1
+                except FileNotFoundError:
+                    pass
+                size -= entry_size
+
+        with self._lock:
+            self._size = size
+            self.evictions += evictions
+        sh_logger.debug(f"block cache: evicted {evictions} entries")
+
+# ==============================================================================
+# the formats of the compressed copies of an outfile with their suffix and compression level
+OUTPUT_COMPRESSIONS = {'gzip': ('.gz', 6), 'zstd': ('.zst', 3)}
+
+# ==============================================================================
+class AtomicOutputFile:
+    """
+    This class writes a file atomically. The data goes through a large buffer into a temporary file in the directory of the file, which replaces the file
+    with os.replace when the file is closed without an error. An interrupted run therefore leaves the former file untouched instead of a half-written one.
+    The file is not synced to disk, a crash of the machine may still lose it.
+
+    Compressed copies of the file (see OUTPUT_COMPRESSIONS) are written and replaced alongside. Every chunk is compressed when it is written, the data is not read again.
+    The bytes written and the time spent in writing are recorded for the throughput.
+
+    Usage:
+        with AtomicOutputFile(path, compress=('gzip',)) as outfile:
+            outfile.write(data)
+    """
+
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, path: Union[str, pathlib.Path], *, compress: Sequence[str] = (), buffer_size: int = BUFFER_SIZE):
+        """
+        :param path: The file to write.
+        :param compress: The formats of the compressed copies, e.g. ('gzip',) also writes <path>.gz. zstd needs the package zstandard.
+        :param buffer_size: The size of the write buffer in bytes.
+        """
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.compress: Tuple[str, ...] = tuple(compress)
+        self.check_compressions(self.compress)
+        self.buffer_size: int = buffer_size
+        self.bytes_written: int = 0
+        self.compressed_bytes: Dict[str, int] = {}
+        self.elapsed: float = 0.0
+
+        self._tmp_path: Optional[pathlib.Path] = None
+        self._file = None
+        # [format, path, temporary path, file, compressor] of the compressed copies
+        self._copies: list = []
+
+    # ==============================================================================
+    @staticmethod
+    def check_compressions(compress: Sequence[str]):
+        for compression in compress:
+            if compression not in OUTPUT_COMPRESSIONS:
+                raise ConfigurationError(f"Unknown compression {compression}. Available: {', '.join(OUTPUT_COMPRESSIONS)}")
+            if compression == 'zstd' and importlib.util.find_spec('zstandard') is None:
+                raise ConfigurationError("The zstd compression needs the package zstandard (pip install zstandard)")
+
+    # ==============================================================================
+    def compressed_path(self, compression: str) -> pathlib.Path:
+        return self.path.with_name(self.path.name + OUTPUT_COMPRESSIONS[compression][0])
+
+    # ==============================================================================
+    def __enter__(self) -> 'AtomicOutputFile':
+        started = time.perf_counter()
+        try:
+            self._tmp_path, self._file = self.create_temp(self.path, self.buffer_size)
+            for compression in self.compress:
+                path = self.compressed_path(compression)
+                tmp_path, raw = self.create_temp(path, self.buffer_size)
+                self._copies.append([compression, path, tmp_path, raw, None])
+                self._copies[-1][4] = self.open_compressor(compression, raw, self.path.name)
+        except BaseException:
+            self.discard()
+            raise
+        self.elapsed += time.perf_counter() - started
+        return self
+
+    # ==============================================================================
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    # ==============================================================================
+    @staticmethod
+    def create_temp(path: pathlib.Path, buffer_size: int):
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        # mkstemp creates the file only accessible by the owner, the outfile gets the permissions of a file created with open()
+        os.chmod(tmp_path, 0o666 & ~process_umask())
+        return pathlib.Path(tmp_path), os.fdopen(fd, 'wb', buffering=buffer_size)
+
+    # ==============================================================================
+    @staticmethod
+    def open_compressor(compression: str, raw, name: str):
+        # the compressors do not close the raw file, it is closed by commit or discard
+        level = OUTPUT_COMPRESSIONS[compression][1]
+        if compression == 'gzip':
+            import gzip
+            # without a timestamp, the same outfile always gives the same .gz
+            return gzip.GzipFile(filename=name, mode='wb', fileobj=raw, compresslevel=level, mtime=0)
+        import zstandard
+        return zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+
+    # ==============================================================================
+    def write(self, data) -> int:
+        started = time.perf_counter()
+        self._file.write(data)
+        for copy in self._copies:
+            copy[4].write(data)
+        size = memoryview(data).nbytes
+        self.bytes_written += size
+        self.elapsed += time.perf_counter() - started
+        return size
+
+    # ==============================================================================
+    def writelines(self, chunks: Iterable[bytes]):
+        for chunk in chunks:
+            self.write(chunk)
+
+    # ==============================================================================
+    def write_lines(self, lines: Iterable[str]):
+        """
+        Writes text lines, each followed by a newline. The lines are joined to chunks of about the buffer size, so there is one write (and one call of
+        each compressor) per chunk instead of one per line.
+        """
+        chunk = []
+        size = 0
+        for line in lines:
+            chunk.append(line)
+            size += len(line) + 1
+            if size >= self.buffer_size:
+                self.write(('\n'.join(chunk) + '\n').encode('utf-8', errors='ignore'))
+                chunk = []
+                size = 0
+        if chunk:
+            self.write(('\n'.join(chunk) + '\n').encode('utf-8', errors='ignore'))
+
+    # ==============================================================================
+    def copy_file_range(self, in_fd: int, offset: int, count: int) -> int:
+        """
+        Copies up to count bytes from offset of in_fd to the file inside of the kernel with os.copy_file_range. Returns the number of bytes copied.
+        Only possible without compressed copies, since the data never reaches this process.
+        """
+        started = time.perf_counter()
+        # the buffered data comes first
+        self._file.flush()
+        copied = os.copy_file_range(in_fd, self._file.fileno(), count, offset)
+        self.bytes_written += copied
+        self.elapsed += time.perf_counter() - started
+        return copied
+
+    # ==============================================================================
+    def commit(self):
+        """
+        Closes the file and its compressed copies and replaces the destinations. The compressed copies are replaced first, so the file is never newer than them.
+        """
+        started = time.perf_counter()
+        try:
+            for compression, _, _, raw, compressor in self._copies:
+                compressor.close()
+                self.compressed_bytes[compression] = raw.tell()
+                raw.close()
+            self._file.close()
+            for _, path, tmp_path, _, _ in self._copies:
+                os.replace(tmp_path, path)
+            os.replace(self._tmp_path, self.path)
+        except BaseException:
+            self.discard()
+            raise
+        self.elapsed += time.perf_counter() - started
+
+    # ==============================================================================
+    def discard(self):
+        # nothing of an interrupted write is left behind
+        for _, _, tmp_path, raw, _ in self._copies:
+            raw.close()
+            tmp_path.unlink(missing_ok=True)
+        if self._file is not None:
+            self._file.close()
+        if self._tmp_path is not None:
+            self._tmp_path.unlink(missing_ok=True)
+        self._copies = []
+
+# ==============================================================================
+class LS_Dyna_Encryptor_Base:
+    """
+    This class holds everything that does not depend on where the data comes from: which keywords are encrypted, how the payload of a keyword looks and the header of the outfile.
+
+    It is shared by LS_Dyna_Encryptor (files) and LS_Dyna_Async_Encryptor (bytes and streams).
+    """
+
+    # these user ids probably need to be updated at some point if LSTC/ANSYS changes them
+    LS_DYNA_USER_IDS = {1024: "0x65AEC0AE", 2048: "0x60C0435A"}
+
+    # prefixes like the startswith of former versions: every variant (_TITLE, _2D, _3D, _COMPACT, _SMOOTH, _FUNCTION, ...) stays encrypted
+    DEFAULT_KEYWORDS_TO_ENCRYPT = ['*DEFINE_TABLE*', '*DEFINE_CURVE*']
+    DEFAULT_VENDOR_MESSAGE = "This could be a self written error message in the VENDOR keyword"
+    # partial mode: the number of cards after the keyword line (and the title card of the _TITLE variant) that stay in clear text, e.g. the card with the LCID.
+    # other keywords only keep the keyword line and the title in clear text.
+    DEFAULT_PARTIAL_CARDS = {'*DEFINE_CURVE': 1, '*DEFINE_TABLE': 1, '*DEFINE_TABLE_2D': 1, '*DEFINE_TABLE_3D': 1}
+
+    # (GnuPG home, key id) of all keys that were already found in gpg by this process
+    checked_gpg_keys: set = set()
+
+    def __init__(self):
+        self.keywords_to_encrypt = list(self.DEFAULT_KEYWORDS_TO_ENCRYPT)
+        self._keyword_matcher: KeywordMatcher = None
+        self.vendor_message: str = self.DEFAULT_VENDOR_MESSAGE
+        self.expiry_date: Optional[datetime] = None
+        self.ls_dyna_user_id: str = None
+        # partial mode: only the cards after the ones in partial_cards are encrypted. Not possible with an expiry date, *VENDOR has to contain whole keywords.
+        self.partial: bool = False
+        self.partial_cards: Dict[str, int] = dict(self.DEFAULT_PARTIAL_CARDS)
+        # the partially encrypted keywords with their id for the logfile, e.g. '*DEFINE_CURVE 1'
+        self.partial_keywords: List[str] = []
+        self.card_parser: CardParser = CardParser()
+
+    # ==============================================================================
+    def build_header(self) -> str:
+        # get user id and date for the header. getpass does not start a process like whoami did
+        try:
+            user_id = getpass.getuser()
+        except Exception:
+            user_id = 'unknown'
+        today_date = datetime.now().strftime("%d.%m.%Y")
 
         header = f"""$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
 $
@@ -445,197 +1976,2157 @@ $ END OF ENCRYPTION HEADER
 $
 $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
 $"""
+        return header
+
+    # ==============================================================================
+    def split_trailing_comments(self, curve_data):
+        # since just the next keyword ends the curve, it could be that some comments are after the current data to encrypt and before the next keyword
+        # these comments are returned separately so that they can be appended unencrypted to the outfile_text
+        p = 0
+        for p, t in enumerate(reversed(curve_data)):
+            if t.startswith('$'):
+                continue
+            break
+
+        # if there were comments after the curve the curve data needs to be reduced
+        if p == 0:
+            return curve_data, []
+        return curve_data[:-p], curve_data[-p:]
+
+    # ==============================================================================
+    def clear_cards(self, keyword: str) -> int:
+        # the number of cards after the keyword line that stay in clear text in the partial mode
+        title = keyword.endswith('_TITLE')
+        return self.partial_cards.get(keyword[:-len('_TITLE')] if title else keyword, 0) + (1 if title else 0)
+
+    # ==============================================================================
+    def split_keyword(self, data: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Splits the lines of a keyword to encrypt into the lines in clear text before the data (only in the partial mode), the data to encrypt and the comments after it.
+        If there is nothing to encrypt, all lines are returned as lines before the data.
+        """
+        clear = []
+        if self.partial:
+            keyword = self.keyword_matcher.match(data[0]) or ''
+            cards = self.clear_cards(keyword)
+            i = 1
+            while cards > 0 and i < len(data):
+                if not data[i].startswith('$'):
+                    cards -= 1
+                i += 1
+            clear, data = data[:i], data[i:]
+            # searched from the end, where the data usually is
+            if not any(not line.startswith('$') for line in reversed(data)):
+                return clear + data, [], []
+            self.partial_keywords.append(self.describe_partial_keyword(clear, keyword))
+        enc_data, comments_after_enc_data = self.split_trailing_comments(data)
+        return clear, enc_data, comments_after_enc_data
+
+    # ==============================================================================
+    @staticmethod
+    def is_long_format(lines: List[str]) -> bool:
+        # for the line based modes: *KEYWORD LONG=Y is in the first lines of the deck
+        return CardParser.is_long_format('\n'.join(lines[:100]).encode('utf-8', errors='ignore'))
+
+    # ==============================================================================
+    def check_long_format(self, lines: List[str]):
+        if self.partial:
+            self.card_parser.long_format = self.is_long_format(lines)
+
+    # ==============================================================================
+    def describe_partial_keyword(self, clear: List[str], keyword: Optional[str] = None) -> str:
+        # e.g. '*DEFINE_CURVE_TITLE 1': the keyword and the first field of the first card after the title, if this card is in clear text
+        keyword = keyword or self.keyword_matcher.match(clear[0]) or clear[0].strip()
+        cards = [line for line in clear[1:] if not line.startswith('$')]
+        id_card = 1 if keyword.endswith('_TITLE') else 0
+        if len(cards) <= id_card:
+            return keyword
+        fields = self.card_parser.fields(cards[id_card], self.card_parser.field_width(clear[0]))
+        return f"{keyword} {fields[0]}" if fields and fields[0] else keyword
+
+    # ==============================================================================
+    def build_payload(self, enc_data) -> bytes:
+        # one join and one encode for the whole keyword, the lines of the caller are not changed
+        prologue, epilogue = self.vendor_wrapping()
+        return ''.join((prologue, '\n'.join(enc_data), '\n' if enc_data else '', epilogue)).encode('utf-8', errors='ignore')
+
+    # ==============================================================================
+    def vendor_wrapping(self) -> Tuple[str, str]:
+        # text_to_encrypt is the data plus *VENDOR if expiry date. Returns the text before and after the data.
+        if self.expiry_date is None:
+            return '', ''
+        return f"*VENDOR\nDATE      {self.expiry_date.strftime('%m/%d/%Y')}\n{self.vendor_message}\n", "*VENDOR_END\n"
+
+    # ==============================================================================
+    def cache_key(self, payload: bytes) -> str:
+        return BlockCache.key(payload, self.ls_dyna_user_id, self.expiry_date_text(), self.vendor_message)
+
+    # ==============================================================================
+    def expiry_date_text(self) -> str:
+        # the expiry date as written to the *VENDOR keyword or 'never'
+        return self.expiry_date.strftime('%m/%d/%Y') if self.expiry_date is not None else 'never'
+
+    # ==============================================================================
+    @property
+    def keyword_matcher(self) -> KeywordMatcher:
+        # keywords_to_encrypt can be changed at any time, the matcher is only compiled again if it was changed
+        if self._keyword_matcher is None or self._keyword_matcher.keywords != tuple(self.keywords_to_encrypt):
+            self._keyword_matcher = KeywordMatcher(self.keywords_to_encrypt)
+        return self._keyword_matcher
+
+    # ==============================================================================
+    def iter_keyword_segments(self, lines: Iterable[str], run_length: int = 4096) -> Iterator[Tuple[bool, list]]:
+        """
+        Splits the lines into segments. Yields (False, lines) for runs of lines that are just passed through and (True, lines) for every keyword to encrypt.
+
+        :param run_length: The maximum number of lines of a passthrough run if the lines are read from an iterator.
+        """
+        matcher = self.keyword_matcher
+
+        # for a list the keyword blocks are found by the scanner and the lines in between are passed through as slices
+        if isinstance(lines, Sequence):
+            last_end = 0
+            for start, end, keyword in matcher.scan(lines):
+                if start > last_end:
+                    yield False, lines[last_end:start]
+                yield True, lines[start:end]
+                last_end = end
+            if last_end < len(lines):
+                yield False, lines[last_end:]
+            return
+
+        # for an iterator the lines are looked at one by one. Only lines starting with '*' can start or end a keyword.
+        run = []
+        block = None
+        for line in lines:
+            if line[:1] == '*':
+                # every keyword ends the current keyword to encrypt
+                if block is not None:
+                    yield True, block
+                    block = None
+                if matcher.match(line):
+                    if run:
+                        yield False, run
+                        run = []
+                    block = [line]
+                    continue
+
+            if block is not None:
+                block.append(line)
+            else:
+                run.append(line)
+                if len(run) >= run_length:
+                    yield False, run
+                    run = []
+
+        # if no *END Keyword is specified and the last keyword is to encrypt, the end of the last curve is not triggered since the for loop just ends.
+        # we must check if there is still something to encrypt
+        if block is not None:
+            yield True, block
+        if run:
+            yield False, run
+
+# ==============================================================================
+class LS_Dyna_Encryptor(LS_Dyna_Encryptor_Base):
+    """
+    This class is used to encrypt and decrypt files with LS-Dyna.
+
+    The encryption is done with the public key of LS-Dyna. The currently used public key is stored in the variable LS_DYNA_PUBLIC_PGP_KEY_1028_BIT.
+    """
+
+    LS_DYNA_PUBLIC_PGP_KEY_1028_BIT = """-----BEGIN PGP PUBLIC KEY BLOCK-----
+Version: GnuPG v2.0.19 (GNU/Linux)
+
+mQGiBFM61ScRBACgqz7q7kytYuuRpa+1DTD9J3Kn8s3kMHO7zPtLu8bsb1L1I4UQ
+CC6HRL2fMVRtBQZuy445eqsot5npcnzpQ6rcvsQZTVCqXH/gx5O5xs6/W8ktaJXn
+hBrxGabk6IzlOXYvmQ2+jOATfQs29pt4+e/+oXFI9EfKBHao2dEgtOWS6wCg+9gi
+9azFZOUIHV0EJDPFQJZrRFUD/11AG23e7964MN0HTWAWCIvPs8johwB7NOF6UjRR
+xuqD/ZqiQ1hhmQzJR89Weg0TeFFCVP+yK2tgPOgsXry/r7WF/RnO9S/7yvtTWHr8
+QPVxCur7vcKX/Lis6ByiyyDvihavBB6RgMYl5HkrEstTY/j3O09woxtQ4Pae5yZ2
+woj0BACI87Lk6aO/9wAVXBDYyufqX9bea/lbMEuQZ7qzBO7xjSwchYeoLUbCK5sh
+iGI+nT3+liqUZW8+KXd/6I+xsN+YXuS9olmeN5L391VF7ZnWcsOKLbr3tnA3TKJb
+Q/txpFhI/2CM2u0VU6w6DAAGlxic5Gf1Cdc8/mA5KaNEuq24PrRDTGl2ZXJtb3Jl
+IFNvZnR3YXJlIFRlY2hub2xvZ3kgQ29ycG9yYXRpb24gKExTVEMpIDxzdXBwb3J0
+QGxzdGMuY29tPohVBBMRAgAVAhsDAh4BAheABQJTOtVDAgsHAhYAAAoJECATgx5l
+rsCu0P4An2f9h8YuWfW+mNY1gm29nIs+kbeZAJ44HMvNgfOVtqUxUCyTlCLjwR6O
+CbkBDQRTOtUnEAQA4Q4D0F6l77N0e6XCIH49b7MHFyjkq3OdgHE4vylubEAXVeeX
+FD4Vrojn3t/I1QqAUG4ipZZAlLVrSYruzQLYaLhjYP124Py/b6vRo0FcyVsLbazj
+BxnGs+fFTrYspLaWfBK2dIrQ9ze9QSLhNous36W3em+fhx8hzGgcUUZRQOcAAwUD
+/RkrdN+Mbim6H6MNnEKhoXlpogzriCUB+hpxfQSP+go6+Np2RGkQfTEu+W51vrFA
+cW36cncp3OLpsvKzaQgTTT1rqb11Hoe/YpH3T9ngz4NX7a4OSDhHDKC1Q1BuzTEJ
+3A3RXeAgRaMV8+hFm91g2KWZuMeqd+nSo2sb5EvpFhW9iEkEGBECAAkFAlM61ScC
+GwwACgkQIBODHmWuwK7BaQCfUovuhS6oXuh+1sSqkGCxzHEGER8AniHYve/Kn6CL
+SoAeXMxSC7F44Ood
+=R0pG
+-----END PGP PUBLIC KEY BLOCK-----"""
+
+    LS_DYNA_PUBLIC_PGP_KEY_2048_BIT = """-----BEGIN PGP PUBLIC KEY BLOCK-----
+Version: GnuPG v2.0.19 (GNU/Linux)
+
+mQMuBFM55y8RCACloOCLGOpfDgWJz75dF2K0MAP6T6ckM41s9lOASvLGK80tnJIl
+pzaaX0Ty0/N1U2d4vD04xQi6tjFJk5ggLx6Bp2EyOhpCmZ0Rfz6Qss6vFHfpso9+
+QV/lVoAggquTtmnd5lXD0id7L8MGy5bXO8CyLC1mZxnN/HCAolVxEntBIdk0dj0k
+1SQxbCyUKW42cArr4if3k1dOxc8hu23xMDykJQHvJnv5ycxFdJrQWyGsoPNEAsBR
+aea4HaTbrTeNUXw594ZAck8yiMz48DuoQ834NTaJzg99Bk3UjdWX1DXUAf3viq5r
+u/VngaNStQl8Y6b+3GZAE5Zs1viqjufUFIqHAQCzETBjSxjHcF8ewygBYvDc9UFu
+meWV7PpJo6ea1hBdewgAhXG3FqDtWIsSdrV763ENRjjfCs4PMlu56i3uOL/E+AYV
+hZjBM7Cq9GnpqZNOA7Xu0f4bhn4lH0m+abXvPf6NbF1y0B0bzpl4OC0nKnnwk70f
+k5Zo+HI1ERQcrbNjxYoQcIc6gQIeUDX8NbNpNcN6gnCfYkGDNdVDL911KnPPO2/8
++2RTdPrzplDvfYl17AYmy57/rQs+gRpKP/P5DkMEMlkFAjvaIlble9bt2+CiHJMX
+l72u8oStrOZSIh935WnSVfVxqGHdG/ogp0E4tDiHoRxO33YzNd0Qqh/aoGLw8UHN
+yTaTEv6WAseqBEgn7cXpg1gIGNw5lmyK/xjJAlnUKgf/UPqiL99XF08X17Kii+6V
+IZ2shIAx+n9Lqxh1W5LlLmSPsnf5hm0xaJzjmAopMjj6EMKpsAYeLrM6efn0jJPI
+r7DYsrdch5SjNR5Pa6Nj9WQFYROg48vfzmTFTzokXqDI25ACtZG7712R9a+iWzCD
+cxGjRNzvKWPYzqjFDE5vbS0dhcQX8/su+DcpGPxkyLlu4hWU7nwCC+OxM5k/qZCs
+8ZQojw5JmczSA7vfTexRoei+N2rH+eA8HPYE6lUYOmPNC+PJ+EwS2TPQVF6sD02v
+onEoxuwDyqQ+6Iq6wh2+7m9yauD7pPZUk2Kp9BdcnfA7bSm9Vpve6eQuPAUQFYem
+trRDTGl2ZXJtb3JlIFNvZnR3YXJlIFRlY2hub2xvZ3kgQ29ycG9yYXRpb24gKExT
+VEMpIDxzdXBwb3J0QGxzdGMuY29tPohtBBMRCAAVAhsDAh4BAheABQJTOedXAgsH
+AhYAAAoJEHfQoCtgwENaOiQBAIckdWTiP8uKwDLeK5+L0jJ7qwVYLoLf3RCBwgZd
+ZsbxAP4u5L73Q2K+iC/ICq+k5QubXR0yWjwmGhuk/wsBBt7+TbkCDQRTOecvEAgA
+ueZwK5BSGCAvSSXPSeNWXkZNGU1UJ8fDNWAUZy07bdQCUaJjhTooxHbtPlAu9ybK
+oIp9gXWJjMu0ZcyhNAWLYg0lC/eYULXO5J7NPVZB0lFyhasmLxiw3es+yP0LVVFI
+pnF5JppqzTSNc50RiCNBljO5uTmF9C0SAkLDbphWlPn3OWuOxkWLXRhnX9dO/L71
+WsCO8VgqDvahmXbI5l/IXueCBlJ18I1LO91cGA6yTmwxd7qfVBmLiJI3pqhRnA6H
+rOaQ2nf4m/zyaPG8Q1rCGxSP0ctfwIt85Nghfw14NiIkLm6/CGLT5roW2bY3lPZN
+zX/sw2oLGTMjop91Cb3J9wADBQgAoJkhip55PEe6ykQdkvxjE/wUJVpIBuNRKTOF
+RMivPL5NcHhnBGtWywKpUlaQNaFOYUDFVEsrCqT9uVk6NwmWpqJyJoUxK5b2vbGF
+dOLgI+JDrUo8KZx+Hz1981VMD9v4zm0I7Rt4MMYaDhBMuJyNm831ruamAGM96RaF
++6pMUS6Cb4wVGdz7912CzAgsNftNWpTCvTbj4+/eKynYcBfWVZp4xzS5cM6nTzNC
+GwIyUtzgvXtY2ByEPqeu2AdpIhU1CiXeLRdYlYiXadXzJfJGVi1irKoAb1uiLypJ
+sVXhgMlHKDQ81tEJiVJ5nawYT4e7mel+T74v3+BufysSFmKm1ohhBBgRCAAJBQJT
+OecvAhsMAAoJEHfQoCtgwENaVqQBAJpCFxs3P6wU+YE202jd4BzNXORIqJjYHbk+
+9kiD0cATAP97Th8x9NUhyBGUBH4UUXxz7ek8eG5wxWsC8UkROjjpgw==
+=xfll
+-----END PGP PUBLIC KEY BLOCK-----"""
+
+    def __init__(self, *, inputfile: str, outfile: Optional[str] = None, expiry_date: Union[str, datetime.date], key_length: Union[int, Sequence[int]] = 1024,
+                 max_workers: Optional[int] = 1, cache_dir: Optional[str] = None, overwrite: bool = False, backend: str = 'gpg', reuse_session_key: bool = False,
+                 partial: bool = False, keyword_index: bool = False, policy: Optional[EncryptionPolicy] = None, compress: Sequence[str] = (), keyring: str = 'user'):
+        """
+        This class is used to encrypt the keywords in the input file and write the output to the output file.
+        Errors raise an EncryptionError, the constructor does not ask anything if the policy does not say so.
+
+        :param inputfile: The input file to be encrypted.
+        :param outfile: The output file to write the encrypted keywords to.
+        :param expiry_date: The expiry date for the public key.
+        :param key_length: The length of the LS-Dyna key (1024 or 2048). With several key lengths, e.g. (1024, 2048), the inputfile is read and scanned once and
+                           encrypted for every key in parallel. Every outfile then gets its key length in the name, e.g. test.key.2048.asc, see key_length_encryptors.
+        :param max_workers: The number of gpg sessions running in parallel. None uses one per CPU.
+        :param cache_dir: The directory of a BlockCache. Unchanged keywords are then taken from the cache instead of being encrypted again.
+        :param overwrite: If True, an existing outfile and logfile are overwritten without asking, like policy.existing = 'overwrite'.
+        :param backend: The name of the encryption backend, see ENCRYPTION_BACKENDS. 'gpg' calls the gpg binary, 'native' encrypts in this process.
+        :param reuse_session_key: If True, all keywords of the file are encrypted with one session key, see NativeOpenPGPBackend. Only for the native backend.
+        :param partial: If True, the keyword line and the cards in partial_cards (e.g. the one with the LCID) stay in clear text. Only without expiry date.
+        :param keyword_index: If True, the keyword blocks are taken from the index of a KeywordFile stored next to the inputfile instead of scanning the file.
+                              The index is built on the first run and reused as long as the file does not change. Not used by the streaming mode.
+        :param policy: What happens with existing outfiles and odd expiry dates, see EncryptionPolicy. Default = ask the user.
+        :param compress: The formats of compressed copies of the outfile, e.g. ('gzip',) also writes <outfile>.gz. See AtomicOutputFile.
+        :param keyring: Where gpg finds the LS-Dyna keys, see KEYRINGS. 'ephemeral' uses a temporary GnuPG home with the keys shipped with this module, see KeyRegistry.
+        """
+        super().__init__()
+        self.inputfile: pathlib.Path = pathlib.Path(inputfile).resolve()
+        self.outfile: pathlib.Path = None
+        if outfile is not None:
+            self.outfile: pathlib.Path = pathlib.Path(outfile).resolve()
+        self.expiry_date: Union[str, datetime.date] = expiry_date
+        self.key_lengths: Tuple[int, ...] = key_length_tuple(key_length)
+        self.key_length: int = self.key_lengths[0]
+        self.max_workers: int = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.overwrite: bool = overwrite
+        self.policy: EncryptionPolicy = policy if policy is not None else EncryptionPolicy()
+        if overwrite:
+            self.policy = self.policy._replace(existing='overwrite')
+        self.policy.check()
+        # True if the outfile or logfile exists and the policy says to skip the file
+        self.skipped: bool = False
+        AtomicOutputFile.check_compressions(compress)
+        self.compress: Tuple[str, ...] = tuple(compress)
+
+        # the output of the default mode: the header, slices of the inputfile and encrypted keywords, not one string per line
+        self.output_chunks: list = []
+        self.document: Optional[KeywordDocument] = None
+        self.keyword_file: Optional[KeywordFile] = KeywordFile(self.inputfile) if keyword_index else None
+        # copy_file_range is disabled after the first failure (e.g. not supported by the filesystem)
+        self._copy_file_range: bool = hasattr(os, 'copy_file_range')
+        # a shared pool for the gpg sessions, e.g. of a LS_Dyna_Batch_Encryptor. If None, a pool is created for every window.
+        self.executor: Optional[concurrent.futures.Executor] = None
+        self.show_progress: bool = True
+        # called with a ProgressState instead of drawing the progress bar, e.g. by a GUI
+        self.progress_callback: Optional[Callable[[ProgressState], None]] = None
+        self._progress_reporter: Optional[ProgressReporter] = None
+        self.found_keywords: int = 0
+        self.encrypted_keywords: int = 0
+        self.reused_keywords: int = 0
+        # encrypted keywords of a former run by their cache key, e.g. from an EncryptionManifest
+        self.previous_keywords: Dict[str, List[str]] = {}
+        # if a list, the cache keys of all encrypted keywords are appended in the order of the output
+        self.keyword_keys: Optional[List[str]] = None
+        # time per stage, bytes and gpg latency of encrypt_file. If profile_json is True, it is also written next to the logfile.
+        self.profile: EncryptionProfile = EncryptionProfile()
+        self.profile_json: bool = False
+
+        # the encryption window: keywords are collected and encrypted together until one of these limits is reached.
+        # this bounds the memory of the streaming mode by the window instead of the file size.
+        self.window_keywords: int = 512
+        self.window_bytes: int = 16 * 1024 * 1024
+
+        self.log_text: str = None
+
+        self.inputfile_fullpath: pathlib.Path = self.inputfile.resolve()
+        # check if the input file exists
+        self.check_inputfile()
+
+        # with several key lengths, every outfile gets its key length in the name
+        base_outfile = self.outfile if self.outfile is not None else self.inputfile_fullpath.with_name(self.inputfile_fullpath.name + '.asc')
+        if len(self.key_lengths) > 1:
+            self.outfile = self.key_length_outfile(base_outfile, self.key_length)
+
+        # get name for output file
+        self.check_outfile()
+        # get name for log file
+        self.logfile_fullpath: pathlib.Path 
+        self.check_logfile()
+
+        # check the expiry date
+        self.check_expiry_date()
+        self.partial = partial
+        if self.partial and self.expiry_date is not None:
+            raise ConfigurationError("Keywords can only be encrypted partially without expiry date, since *VENDOR has to contain whole keywords")
+
+        # check the specified key_length to use. If the key is imported in gpg is checked on first use.
+        self.__set_ls_dyna_user_id()
+
+        # all keyword blocks of a file are collected and encrypted by one gpg session (or in this process by the native backend)
+        if backend not in ENCRYPTION_BACKENDS:
+            raise ConfigurationError(f"Unknown encryption backend {backend}. Available: {', '.join(ENCRYPTION_BACKENDS)}")
+        if keyring not in KEYRINGS:
+            raise ConfigurationError(f"Unknown keyring {keyring}. Available: {', '.join(KEYRINGS)}")
+        self.keyring: str = keyring
+        if reuse_session_key:
+            # gpg creates a new session key for every message, there is no option to pass one in
+            if ENCRYPTION_BACKENDS[backend] is not NativeOpenPGPBackend:
+                raise ConfigurationError("The session key can only be reused by the native backend")
+            self.backend: EncryptionBackend = NativeOpenPGPBackend(recipient=self.ls_dyna_user_id, reuse_session_key=True)
+        elif keyring == 'ephemeral' and ENCRYPTION_BACKENDS[backend] is GpgBackend:
+            self.backend: EncryptionBackend = KeyRegistry.gpg_backend(self.key_length)
+        else:
+            self.backend: EncryptionBackend = ENCRYPTION_BACKENDS[backend](recipient=self.ls_dyna_user_id)
+        self.cache: Optional[BlockCache] = None
+        if cache_dir is not None:
+            self.cache = BlockCache(cache_dir)
+
+        # the encryptors of the other key lengths. They get the read and scanned inputfile of this encryptor, see encrypt_file.
+        self.key_length_encryptors: List[LS_Dyna_Encryptor] = []
+        for other_key_length in self.key_lengths[1:]:
+            # the expiry date is already checked (and maybe confirmed)
+            self.key_length_encryptors.append(LS_Dyna_Encryptor(
+                inputfile=str(self.inputfile_fullpath), outfile=str(self.key_length_outfile(base_outfile, other_key_length)),
+                expiry_date=self.expiry_date if self.expiry_date is not None else '0', key_length=other_key_length, max_workers=self.max_workers,
+                backend=backend, reuse_session_key=reuse_session_key, partial=partial, policy=self.policy, compress=compress, keyring=keyring))
+        if any(encryptor.skipped for encryptor in self.key_length_encryptors):
+            self.skipped = True
+
+    # ==============================================================================
+    def __set_ls_dyna_user_id(self):
+        if self.key_length in self.LS_DYNA_USER_IDS:
+            self.ls_dyna_user_id: str = self.LS_DYNA_USER_IDS[self.key_length]
+        else:
+            raise ConfigurationError("Encryption key length not available/not known. At the moment just 1024- and 2048-bit keys are supported by LS-Dyna")
+
+    # ==============================================================================
+    @staticmethod
+    def key_length_outfile(outfile: Union[str, pathlib.Path], key_length: int) -> pathlib.Path:
+        # the key length goes before the suffix, e.g. test.key.asc -> test.key.2048.asc
+        outfile = pathlib.Path(outfile)
+        return outfile.with_name(f"{outfile.stem}.{key_length}{outfile.suffix}")
+
+    # ==============================================================================
+    @property
+    def key_encryptors(self) -> List['LS_Dyna_Encryptor']:
+        # this encryptor and the ones of the other key lengths
+        return [self, *self.key_length_encryptors]
+
+    # ==============================================================================
+    def prepare_key_length_encryptors(self):
+        # the settings that may be changed after the construction are taken over from this encryptor
+        for encryptor in self.key_length_encryptors:
+            encryptor.keywords_to_encrypt = list(self.keywords_to_encrypt)
+            encryptor.vendor_message = self.vendor_message
+            encryptor.partial_cards = dict(self.partial_cards)
+            encryptor.cache = self.cache
+            encryptor.executor = self.executor
+            encryptor.window_keywords = self.window_keywords
+            encryptor.window_bytes = self.window_bytes
+            encryptor.profile_json = self.profile_json
+            # only the progress of this encryptor is shown
+            encryptor.show_progress = False
+
+    # ==============================================================================
+    def for_each_key_length(self, func: Callable[['LS_Dyna_Encryptor'], None]):
+        # the key lengths are encrypted in parallel, each with its own gpg sessions
+        if not self.key_length_encryptors:
+            func(self)
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.key_encryptors)) as key_executor:
+            for future in [key_executor.submit(func, encryptor) for encryptor in self.key_encryptors]:
+                future.result()
+
+    # ==============================================================================
+    def check_inputfile(self):
+        # check if inputfile exists
+        if not self.inputfile_fullpath.exists():
+            raise InputFileError(f"Specified inputfile {self.inputfile_fullpath} does not exist")
+
+    # ==============================================================================
+    def check_outfile(self) -> str:
+        # check if outfile was specified, if not set it to inputfile + .asc
+        if self.outfile is None:
+            self.outfile_fullpath: pathlib.Path = self.inputfile_fullpath.with_name(self.inputfile_fullpath.name + '.asc').resolve()
+        # if outfile was specified, make it a full path
+        else:
+            self.outfile_fullpath: pathlib.Path = pathlib.Path(self.outfile).resolve()
+        sh_logger.info(f"Output-File will be called: {self.outfile_fullpath.name}")
+
+        # check if outfile already exists, if so the policy decides if it is overwritten, skipped or an error
+        if self.outfile_fullpath.exists() and not self.policy.allow_existing(self.outfile_fullpath):
+            self.skipped = True
+
+        self.outfile = self.outfile_fullpath.name
+
+    # ==============================================================================
+    def check_logfile(self) -> str:
+        # check if logfile exists, if so the policy decides like for the outfile
+        self.logfile_fullpath: pathlib.Path = self.outfile_fullpath.with_name(self.outfile_fullpath.name + '.log').resolve()
+        if self.logfile_fullpath.exists() and not self.skipped and not self.policy.allow_existing(self.logfile_fullpath):
+            self.skipped = True
+
+    # ==============================================================================
+    def check_expiry_date(self) -> bool:
+        # if True, expiry_date was specified as 0 on CLI. That means no expiry date will be set
+        if self.expiry_date == '0' or self.expiry_date is None or self.expiry_date is False:
+            sh_logger.info("No expiry date specified. Continue without expiry date.")
+            self.expiry_date = None
+            return
+        # if True, expiry_date was not specified on CLI, default argument
+        elif isinstance(self.expiry_date, datetime):
+            sh_logger.debug(f"{self.expiry_date=}")
+            sh_logger.debug(f"DATE      {self.expiry_date.strftime('%m/%d/%Y')}")
+            sh_logger.info(f"The default expiry date will be the: {self.expiry_date.strftime('%d. %B %Y')}")
+            return
+
+        # if here, expiry_date was specified on CLI
+        try:
+            self.expiry_date = datetime.strptime(self.expiry_date, '%m/%d/%Y')
+        except ValueError:
+            raise ConfigurationError(f"The expiry date {self.expiry_date} is not in the format mm/dd/yyyy") from None
+        
+        # check if date is in the past, if so let user know.
+        if datetime.today() > self.expiry_date:
+            self.policy.confirm_expiry_date("The specified expiry date is in the past, which does not make a lot of sense.")
+        # check if date is more then 3 years in the future, if so let user know.
+        elif datetime.today() + timedelta(days=3*365) < self.expiry_date:
+            self.policy.confirm_expiry_date("The specified expiry date is more than three years in the future, which is higher than the default.")
+
+        sh_logger.debug(f"{self.expiry_date=}")
+        sh_logger.debug(f"DATE      {self.expiry_date.strftime('%m/%d/%Y')}")
+        sh_logger.info(f"The chosen expiry date will be the: {self.expiry_date.strftime('%d. %B %Y')}")
+        return
+
+    # ==============================================================================
+    def generate_header(self) -> str:
+        header = self.build_header()
+        self.output_chunks.append((header + '\n').encode('utf-8', errors='ignore'))
+        return header
+
+# ==============================================================================
+    def gather_logs(self):
+        # gather all information for the logfile
+        self.log_text = []
+        self.log_text.append(f"# -----------------------------------------------------------------------------")
+        self.log_text.append(f"Input file to encrypt: {self.inputfile_fullpath}")
+        self.log_text.append(f"by: {self.ls_dyna_user_id}")
+        self.log_text.append(f"on: {datetime.now().strftime('%d. %B %Y %H:%M:%S')}")
+        self.log_text.append(f"Tool version: {__version__}")
+        if self.expiry_date:
+            self.log_text.append(f"Expiry date: {self.expiry_date.strftime('%d. %B %Y')}")
+        else:
+            self.log_text.append(f"Expiry date: Never")
+        self.log_text.append(f"Encrypted keywords: {', '.join(self.keywords_to_encrypt)}")
+        if self.partial:
+            self.log_text.append(f"Partial encryption, cards in clear text: {', '.join(f'{keyword} {cards}' for keyword, cards in self.partial_cards.items())}")
+
+    # ==============================================================================
+    def check_gpg_key(self):
+        # only gpg needs the key in the keyring, the native backend already found its key in the constructor
+        if not isinstance(self.backend, GpgBackend):
+            return
+        # the key only needs to be checked once per process and GnuPG home, e.g. for a batch of files
+        checked_key = (self.backend.homedir or os.environ.get('GNUPGHOME'), self.backend.recipient)
+        if checked_key in LS_Dyna_Encryptor.checked_gpg_keys:
+            return
+
+        # check if the key is imported in gpg, returns 0 if available
+        check_key = subprocess.run([*self.backend.base_command(), '-k', self.backend.recipient], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+
+        if check_key != 0:
+            raise EncryptionKeyError(f"""The LS-Dyna key {self.backend.recipient} is not available in gpg. Maybe also outdated.
+Please check your keys in your gpg configuration ot add the LS-Dyna keys. For further instructions refer to the LS-Dyna instructions:
+
+https://ftp.lstc.com/anonymous/outgoing/support/FAQ/Instructions_encryption
+""")
+        LS_Dyna_Encryptor.checked_gpg_keys.add(checked_key)
+
+    # ==============================================================================
+    def encrypt_actual_data(self, enc_data):
+        self.check_gpg_key()
+        # the data is piped through gpg, no temporary files are written
+        return self.backend.encrypt(self.build_payload(enc_data))
+
+    # ==============================================================================
+    def encrypt_keyword(self, curve_data):
+        enc_data, comments_after_enc_data = self.split_trailing_comments(curve_data)
+
+        # encrypt actual curve
+        encrypted_xy_data = self.encrypt_actual_data(enc_data)
+        # add comments after curve back to the text
+        encrypted_xy_data.extend(comments_after_enc_data)
+        return encrypted_xy_data
+
+    # ==============================================================================
+    def encrypt_payloads(self, payloads: list) -> list:
+        self.encrypted_keywords += len(payloads)
+        if self.cache is None and not self.previous_keywords and self.keyword_keys is None:
+            return self.encrypt_payloads_parallel(payloads)
+
+        keys = [self.cache_key(payload) for payload in payloads]
+        if self.keyword_keys is not None:
+            self.keyword_keys.extend(keys)
+
+        # only the keywords which are neither known from a former run nor in the cache are encrypted
+        encrypted_keywords = []
+        for key in keys:
+            encrypted_xy_data = self.previous_keywords.get(key)
+            if encrypted_xy_data is None and self.cache is not None:
+                encrypted_xy_data = self.cache.get(key)
+            encrypted_keywords.append(encrypted_xy_data)
+        missing = [i for i, encrypted_xy_data in enumerate(encrypted_keywords) if encrypted_xy_data is None]
+        self.reused_keywords += len(payloads) - len(missing)
+
+        for i, encrypted_xy_data in zip(missing, self.encrypt_payloads_parallel([payloads[i] for i in missing])):
+            encrypted_keywords[i] = encrypted_xy_data
+            if self.cache is not None:
+                self.cache.put(keys[i], encrypted_xy_data)
+        return encrypted_keywords
+
+    # ==============================================================================
+    def encrypt_payloads_parallel(self, payloads: list) -> list:
+        self.check_gpg_key()
+        with self.profile.stage('gpg'):
+            return self._encrypt_payloads_parallel(payloads)
+
+    # ==============================================================================
+    def _encrypt_payloads_parallel(self, payloads: list) -> list:
+        # with a single worker all payloads are encrypted by one gpg session
+        if self.max_workers <= 1 or len(payloads) <= 1:
+            return self.encrypt_chunk(payloads)
+
+        # otherwise the payloads are split into chunks which are encrypted by parallel gpg sessions.
+        # threads are sufficient here since the actual work is done in the gpg processes.
+        # several chunks per worker keep all workers busy even if the keywords differ in size.
+        chunk_size = max(1, -(-len(payloads) // (self.max_workers * 4)))
+        chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+        encrypted_keywords = []
+        # map returns the results in the order of the chunks, so the output does not depend on the number of workers
+        if self.executor is not None:
+            for encrypted_chunk in self.executor.map(self.encrypt_chunk, chunks):
+                encrypted_keywords.extend(encrypted_chunk)
+            return encrypted_keywords
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for encrypted_chunk in executor.map(self.encrypt_chunk, chunks):
+                encrypted_keywords.extend(encrypted_chunk)
+        return encrypted_keywords
+
+    # ==============================================================================
+    def encrypt_chunk(self, payloads: list) -> list:
+        # one gpg session, the latency is recorded in the profile
+        start = time.perf_counter()
+        encrypted_keywords = self.backend.encrypt_many(payloads)
+        self.profile.record_gpg(time.perf_counter() - start, len(payloads))
+        return encrypted_keywords
+
+    # ==============================================================================
+    def iter_output_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Yields the output lines for the given input lines. The keywords to encrypt are collected in a window and encrypted together as soon as the window is full.
+        Lines that follow the first keyword of the window have to wait until the window is encrypted, all other lines are passed through directly.
+        """
+        # output lines of the window, None is the placeholder for an encrypted keyword
+        pending = []
+        pending_bytes = 0
+        payloads = []
+        first_segment = True
+        for to_encrypt, data in self.iter_keyword_segments(lines):
+            if first_segment and not to_encrypt:
+                self.check_long_format(data)
+            first_segment = False
+            enc_data = None
+            if to_encrypt:
+                # the lines in clear text before the data are passed through like all other lines
+                data, enc_data, comments_after_enc_data = self.split_keyword(data)
+            if data:
+                if not payloads:
+                    yield from data
+                else:
+                    pending.extend(data)
+                    pending_bytes += sum(map(len, data))
+            if enc_data:
+                payload = self.build_payload(enc_data)
+                payloads.append(payload)
+                self.found_keywords += 1
+                pending.append(None)
+                pending.extend(comments_after_enc_data)
+                pending_bytes += len(payload)
+
+            if len(payloads) >= self.window_keywords or pending_bytes >= self.window_bytes:
+                yield from self.flush_window(pending, payloads)
+                pending, pending_bytes, payloads = [], 0, []
+
+        yield from self.flush_window(pending, payloads)
+
+    # ==============================================================================
+    def flush_window(self, pending: list, payloads: list) -> Iterator[str]:
+        # encrypt all keywords of the window in one go and splice the encrypted data into the placeholders
+        if payloads:
+            sh_logger.debug(f"encrypting {len(payloads)} keywords with {self.max_workers} worker(s)")
+        encrypted_keywords = iter(self.encrypt_payloads(payloads))
+        for line in pending:
+            if line is None:
+                yield from next(encrypted_keywords)
+            else:
+                yield line
+
+    # ==============================================================================
+    def iter_document_output(self, document: KeywordDocument) -> Iterator[Union[Tuple[int, int], bytes]]:
+        """
+        Yields the output for a document: (start, end) for regions of the buffer that are passed through and bytes for the encrypted keywords.
+        The keywords are encrypted in windows like in iter_output_lines, the progress is reported by the position in the buffer.
+        """
+        size = len(document.buffer)
+        # output of the window: (start, end) for passthrough regions and None for encrypted keywords
+        pending = []
+        pending_bytes = 0
+        payloads = []
+        last_end = 0
+        last_data_end = None
+        prologue, epilogue = (text.encode('utf-8', errors='ignore') for text in self.vendor_wrapping())
+        self.card_parser.long_format = document.long_format
+        for start, data_start, data_end, end in document.iter_blocks():
+            # the cards in clear text of the partial mode are passed through together with the region before the keyword
+            if data_start >= data_end:
+                data_start = end
+            if data_start > last_end:
+                if payloads:
+                    pending.append((last_end, data_start))
+                else:
+                    yield last_end, data_start
+            last_end = data_start
+            if data_start == end:
+                continue
+            if data_start > start:
+                self.partial_keywords.append(self.describe_partial_keyword(document.text(start, data_start).splitlines()))
+
+            # only the keyword to encrypt is copied out of the buffer, the comments after it are passed through
+            payload = document.block_payload(data_start, data_end, prologue, epilogue)
+            payloads.append(payload)
+            self.found_keywords += 1
+            pending.append(None)
+            if data_end < end:
+                pending.append((data_end, end))
+            pending_bytes += len(payload)
+            last_end, last_data_end = end, data_end
+
+            if len(payloads) >= self.window_keywords or pending_bytes >= self.window_bytes:
+                yield from self.flush_document_window(pending, payloads)
+                pending, pending_bytes, payloads = [], 0, []
+            self.progress(iteration=last_end - 1, maximum=size)
+
+        yield from self.flush_document_window(pending, payloads)
+
+        # the remaining data after the last keyword to encrypt
+        if last_end < size:
+            yield last_end, size
+        # every line of the output ends with a newline, an encrypted keyword at the end of the file already does
+        if size and document.buffer[size - 1] != 0x0A and last_data_end != size:
+            yield b'\n'
+        self.progress(iteration=size - 1, maximum=max(size, 1))
+
+    # ==============================================================================
+    def flush_document_window(self, pending: list, payloads: list) -> Iterator[Union[Tuple[int, int], bytes]]:
+        # encrypt all keywords of the window in one go and splice the encrypted data into the placeholders
+        if payloads:
+            sh_logger.debug(f"encrypting {len(payloads)} keywords with {self.max_workers} worker(s)")
+        encrypted_keywords = iter(self.encrypt_payloads(payloads))
+        for item in pending:
+            if item is None:
+                yield ''.join(line + '\n' for line in next(encrypted_keywords)).encode('utf-8')
+            else:
+                yield item
+
+    # ==============================================================================
+    def encrypt_data(self):
+        sh_logger.info(f"Encrypting...")
+        sh_logger.log(PRINT, f"Will encrypt the keywords: {' ,'.join(self.keywords_to_encrypt)}")
+
+        # the passthrough regions are slices of the buffer, no data is copied
+        view = memoryview(self.document.buffer)
+        for item in self.iter_document_output(self.document):
+            self.output_chunks.append(view[item[0]:item[1]] if isinstance(item, tuple) else item)
+
+        self.finish_progress()
+
+    # ==============================================================================
+    def progress(self, iteration: int, maximum: int):
+        # cheap enough to be called often, the ProgressReporter only reports every few hundred milliseconds
+        if not self.show_progress and self.progress_callback is None:
+            return
+        if self._progress_reporter is None:
+            self._progress_reporter = ProgressReporter(maximum, callback=self.progress_callback, start=self.profile.started)
+        self._progress_reporter.update(iteration + 1, blocks_found=self.found_keywords, blocks_done=self.encrypted_keywords,
+                                       gpg_seconds=self.profile.stages.get('gpg', 0.0))
+
+    # ==============================================================================
+    def finish_progress(self):
+        if self._progress_reporter is not None:
+            self._progress_reporter.finish(blocks_done=self.encrypted_keywords, gpg_seconds=self.profile.stages.get('gpg', 0.0))
+            self._progress_reporter = None
+
+    # ==============================================================================
+    def read_inputfile(self):
+        # read inputfile into one buffer and index the keywords to encrypt
+        self.document = KeywordDocument.read(self.inputfile_fullpath, self.keyword_matcher, self.clear_cards if self.partial else None, self.indexed_blocks())
+
+    # ==============================================================================
+    def indexed_blocks(self) -> Optional[Iterator[Tuple[int, int, str]]]:
+        # the blocks to encrypt from the keyword index or None if the file is scanned
+        if self.keyword_file is None:
+            return None
+        return self.keyword_file.iter_blocks(self.keyword_matcher)
+
+    # ==============================================================================
+    def iter_inputfile(self) -> Iterator[str]:
+        """
+        Yields the lines of the inputfile one by one without reading the whole file into memory.
+        """
+        file_size = max(self.inputfile_fullpath.stat().st_size, 1)
+        chars_read = 0
+        with open(self.inputfile_fullpath, 'r', encoding='utf-8', errors='ignore') as infile:
+            for i, line in enumerate(infile):
+                chars_read += len(line)
+                # the progress is based on the position in the file since the number of lines is not known in advance
+                if i % 1000 == 0:
+                    self.progress(iteration=min(chars_read, file_size) - 1, maximum=file_size)
+                yield line.rstrip('\n')
+        self.progress(iteration=file_size - 1, maximum=file_size)
+
+    # ==============================================================================
+    def encrypt_file(self, stream: bool = False, mapped: bool = False):
+        """
+        Encrypts the inputfile and writes the outfile and the logfile.
+
+        :param stream: If True, the inputfile is read, encrypted and written line by line. The memory is then bounded by the encryption window instead of the file size.
+        :param mapped: If True, the inputfile is memory mapped. Only the keywords to encrypt are decoded, everything else is copied to the outfile in large chunks.
+        """
+        if self.skipped:
+            sh_logger.info(f"Skipping {self.inputfile_fullpath}, the outfile already exists.")
+            return
+        self.prepare_key_length_encryptors()
+        for encryptor in self.key_encryptors:
+            encryptor.profile.start()
+            # fail before anything is written
+            encryptor.check_gpg_key()
+            # a reused session key is never shared between files
+            encryptor.backend.new_session()
+        if mapped:
+            self.encrypt_file_mapped()
+        elif stream:
+            # the lines are not kept, so every key length streams the inputfile on its own
+            self.for_each_key_length(LS_Dyna_Encryptor.encrypt_file_streaming)
+        else:
+            with self.profile.stage('read'):
+                self.read_inputfile()
+            # all key lengths encrypt the same document, the inputfile is read and scanned once
+            self.for_each_key_length(lambda encryptor: encryptor.encrypt_document(self.document))
+        for encryptor in self.key_encryptors:
+            encryptor.finish_file()
+
+        if self.cache is not None:
+            sh_logger.info(f"Block cache: {self.cache.hits} hits, {self.cache.misses} misses")
+
+    # ==============================================================================
+    def encrypt_document(self, document: KeywordDocument):
+        self.document = document
+        self.generate_header()
+
+        # gather input for logfile
+        self.gather_logs()
+
+        with self.profile.stage('scan'):
+            self.encrypt_data()
+
+        # write outfile
+        sh_logger.debug(f"write output to file: {self.outfile_fullpath}")
+        with self.profile.stage('write'), self.open_outfile() as outfile:
+            outfile.writelines(self.output_chunks)
+        self.profile.record_output(outfile)
+
+        self.write_logfile()
+
+    # ==============================================================================
+    def finish_file(self):
+        self.profile.stop()
+
+        self.profile.blocks += self.encrypted_keywords
+        self.profile.bytes_in += self.inputfile_fullpath.stat().st_size
+        self.profile.bytes_out += self.outfile_fullpath.stat().st_size
+        sh_logger.info(f"Written {self.outfile_fullpath.name}: {self.profile.output_summary()}")
+        if self.profile_json:
+            self.profile.write_json(self.profile_path)
+
+    # ==============================================================================
+    def open_outfile(self) -> AtomicOutputFile:
+        # the outfile only replaces an existing one when it is complete
+        return AtomicOutputFile(self.outfile_fullpath, compress=self.compress)
+
+    # ==============================================================================
+    @property
+    def profile_path(self) -> pathlib.Path:
+        # next to the logfile
+        return self.outfile_fullpath.with_name(self.outfile_fullpath.name + '.profile.json')
+
+    # ==============================================================================
+    def encrypt_file_streaming(self):
+        # gather input for logfile
+        self.gather_logs()
+
+        sh_logger.info("Encrypting...")
+        sh_logger.log(PRINT, f"Will encrypt the keywords: {' ,'.join(self.keywords_to_encrypt)}")
+
+        # read, encrypt and write the outfile incrementally
+        sh_logger.debug(f"stream output to file: {self.outfile_fullpath}")
+        # reading, scanning and writing are interleaved line by line, so they are recorded as one stage. Only gpg is recorded separately.
+        with self.profile.stage('stream'), self.open_outfile() as outfile:
+            outfile.write_lines([self.build_header()])
+            outfile.write_lines(self.iter_output_lines(self.iter_inputfile()))
+        self.profile.record_output(outfile)
+
+        self.finish_progress()
+
+        self.write_logfile()
+
+    # ==============================================================================
+    def encrypt_file_mapped(self):
+        with open(self.inputfile_fullpath, 'rb') as infile:
+            # an empty file can not be mapped
+            if os.fstat(infile.fileno()).st_size == 0:
+                self.for_each_key_length(lambda encryptor: encryptor.write_mapped_file(None, infile.fileno()))
+                return
+            # all key lengths write their outfile from the same mapped and scanned inputfile
+            with self.profile.stage('scan'), mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                document = KeywordDocument(buffer, self.keyword_matcher, self.clear_cards if self.partial else None, self.indexed_blocks())
+                self.for_each_key_length(lambda encryptor: encryptor.write_mapped_file(document, infile.fileno()))
+
+    # ==============================================================================
+    def write_mapped_file(self, document: Optional[KeywordDocument], in_fd: int):
+        # gather input for logfile
+        self.gather_logs()
+
+        sh_logger.info("Encrypting...")
+        sh_logger.log(PRINT, f"Will encrypt the keywords: {' ,'.join(self.keywords_to_encrypt)}")
+
+        sh_logger.debug(f"copy output to file: {self.outfile_fullpath}")
+        with self.open_outfile() as outfile:
+            self.write_all(outfile, (self.build_header() + '\n').encode('utf-8'))
+            if document is not None:
+                self.write_mapped_output(document, in_fd, outfile)
+        self.profile.record_output(outfile)
+
+        self.finish_progress()
+
+        self.write_logfile()
+
+    # ==============================================================================
+    def write_mapped_output(self, document: KeywordDocument, in_fd: int, outfile):
+        """
+        Writes the output for the mapped inputfile. The keyword blocks are found by their byte offsets and only these blocks are decoded and encrypted.
+        The regions in between are copied byte by byte, either in the kernel with copy_file_range or from a memoryview of the mapped file.
+        """
+        for item in self.iter_document_output(document):
+            if isinstance(item, tuple):
+                self.copy_region(document.buffer, in_fd, outfile, *item)
+            else:
+                with self.profile.stage('write'):
+                    self.write_all(outfile, item)
+
+    # ==============================================================================
+    def copy_region(self, buffer: mmap.mmap, in_fd: int, outfile: AtomicOutputFile, start: int, end: int):
+        with self.profile.stage('write'):
+            self._copy_region(buffer, in_fd, outfile, start, end)
+
+    # ==============================================================================
+    def _copy_region(self, buffer: mmap.mmap, in_fd: int, outfile: AtomicOutputFile, start: int, end: int):
+        # copy the region inside of the kernel if possible, no data is copied to user space then. The compressed copies need the data though.
+        if self._copy_file_range and not outfile.compress:
+            try:
+                while start < end:
+                    copied = outfile.copy_file_range(in_fd, start, end - start)
+                    if copied == 0:
+                        break
+                    start += copied
+            except OSError as error:
+                sh_logger.debug(f"copy_file_range not available ({error}), copying from the mapped file instead")
+                self._copy_file_range = False
+
+        # the slice of the memoryview references the mapped file directly, no copy of the data is made
+        if start < end:
+            with memoryview(buffer) as view:
+                self.write_all(outfile, view[start:end])
+
+    # ==============================================================================
+    @staticmethod
+    def write_all(outfile, data):
+        # an unbuffered file may write less than requested
+        with memoryview(data) as view:
+            while view:
+                written = outfile.write(view)
+                view = view[written:]
+
+    # ==============================================================================
+    def write_logfile(self):
+        # write logfile
+        sh_logger.debug(f"write logfile to file: {self.logfile_fullpath}")
+        with AtomicOutputFile(self.logfile_fullpath) as logfile:
+            logfile.write_lines(self.log_text)
+            if self.partial_keywords:
+                logfile.write_lines(["Partially encrypted keywords:"] + [f"  {keyword}" for keyword in self.partial_keywords])
+
+# ==============================================================================
+class EncryptionManifest:
+    """
+    This class keeps track of the files encrypted by a LS_Dyna_Batch_Encryptor in a JSON file.
+
+    For every inputfile the hash of the file, the hashes of all encrypted keywords (the BlockCache keys), the key, the expiry date, the *VENDOR message, the keywords to encrypt and the tool version are recorded.
+    With this information an incremental run skips all files that did not change and reuses the encrypted keywords of the former outfile for files that changed.
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, path: str):
+        """
+        :param path: The JSON file of the manifest. It is read if it exists.
+        """
+        self.path: pathlib.Path = pathlib.Path(path).resolve()
+        self.files: Dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+            # a manifest of another format is just ignored and written again
+            if manifest.get('manifest_version') == self.MANIFEST_VERSION:
+                self.files = manifest.get('files', {})
+
+    # ==============================================================================
+    def entry(self, inputfile: pathlib.Path) -> Optional[dict]:
+        return self.files.get(str(inputfile))
+
+    # ==============================================================================
+    def is_current(self, inputfile: pathlib.Path, file_hash: str, outfile: pathlib.Path, settings: dict) -> bool:
+        """
+        Returns True if the outfile of the last run is still valid for the inputfile and the settings.
+        """
+        entry = self.entry(inputfile)
+        if entry is None or entry['sha256'] != file_hash or entry['outfile'] != str(outfile):
+            return False
+        if any(entry.get(name) != value for name, value in settings.items()):
+            return False
+        # the outfile must still be the one written by the last run
+        try:
+            stat = outfile.stat()
+        except OSError:
+            return False
+        return stat.st_size == entry['outfile_size'] and stat.st_mtime_ns == entry['outfile_mtime_ns']
 
-        self.output_text.append(header)
+    # ==============================================================================
+    def previous_keywords(self, inputfile: pathlib.Path, outfile: pathlib.Path) -> Dict[str, List[str]]:
+        """
+        Returns the encrypted keywords of the former outfile by their cache key. They can be reused for all keywords that did not change.
+        """
+        entry = self.entry(inputfile)
+        if entry is None or entry['outfile'] != str(outfile) or not outfile.exists():
+            return {}
+
+        encrypted_keywords = []
+        encrypted_xy_data = None
+        with open(outfile, 'r', encoding='utf-8', errors='ignore') as former_outfile:
+            for line in former_outfile:
+                line = line.rstrip('\n')
+                if line == '-----BEGIN PGP MESSAGE-----':
+                    encrypted_xy_data = []
+                if encrypted_xy_data is not None:
+                    encrypted_xy_data.append(line)
+                if line == '-----END PGP MESSAGE-----' and encrypted_xy_data is not None:
+                    encrypted_keywords.append(encrypted_xy_data)
+                    encrypted_xy_data = None
+
+        # if the outfile does not match the manifest (e.g. edited by hand), nothing is reused
+        if len(encrypted_keywords) != len(entry['keywords']):
+            return {}
+        return dict(zip(entry['keywords'], encrypted_keywords))
+
+    # ==============================================================================
+    def update(self, encryptor: 'LS_Dyna_Encryptor', file_hash: str, settings: dict):
+        stat = encryptor.outfile_fullpath.stat()
+        self.files[str(encryptor.inputfile_fullpath)] = {
+            'sha256': file_hash,
+            'outfile': str(encryptor.outfile_fullpath),
+            'outfile_size': stat.st_size,
+            'outfile_mtime_ns': stat.st_mtime_ns,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            **settings,
+            'keywords': list(encryptor.keyword_keys),
+        }
+
+    # ==============================================================================
+    def save(self):
+        # write to a unique temporary file first, so an interrupted run does not destroy the manifest and concurrent runs never rename a partial file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix='.tmp')
+        try:
+            # mkstemp creates the file for the owner only, the manifest gets the permissions of a normally created file
+            os.chmod(tmp_path, 0o666 & ~process_umask())
+            with os.fdopen(fd, 'w', encoding='utf-8') as manifest_file:
+                json.dump({'manifest_version': self.MANIFEST_VERSION, 'files': self.files}, manifest_file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
 
 # ==============================================================================
-    def gather_logs(self):
-        # gather all information for the logfile
-        self.log_text = []
-        self.log_text.append(f"# -----------------------------------------------------------------------------")
-        self.log_text.append(f"Input file to encrypt: {self.inputfile_fullpath}")
-        self.log_text.append(f"by: {self.ls_dyna_user_id}")
-        self.log_text.append(f"on: {datetime.now().strftime('%d. %B %Y %H:%M:%S')}")
-        if self.expiry_date:
-            self.log_text.append(f"Expiry date: {self.expiry_date.strftime('%d. %B %Y')}")
+class VerificationResult(NamedTuple):
+    """
+    The result of LS_Dyna_Output_Verifier.verify for one outfile. The outfile is fine if there are no errors.
+    key_ids are the ids of the keys the keywords are encrypted for (hex, as in the public-key encrypted session key packets).
+    """
+    inputfile: pathlib.Path
+    outfile: pathlib.Path
+    blocks: int
+    armor_bytes: int
+    passthrough_bytes: int
+    key_ids: Tuple[str, ...]
+    errors: Tuple[str, ...]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> str:
+        return (f"{self.blocks} encrypted keywords ({self.armor_bytes / 1e6:.2f} MB), {self.passthrough_bytes / 1e6:.2f} MB unchanged, "
+                f"key {', '.join(self.key_ids) or '-'}, {self.elapsed:.2f} s")
+
+# ==============================================================================
+class LS_Dyna_Output_Verifier(LS_Dyna_Encryptor_Base):
+    """
+    This class checks encrypted outfiles against their inputfiles without decrypting anything.
+
+    The inputfile is scanned with the same KeywordDocument as in encrypt_data, and the outfile is walked side by side with it:
+    - the outfile starts with the encryption header,
+    - everything that is not encrypted (also the comments after a keyword and the cards in clear text of the partial mode) is the same byte for byte,
+    - every keyword to encrypt is replaced by one PGP MESSAGE armor with a valid CRC-24 checksum. Its packets are parsed: public-key encrypted session keys
+      (for one of key_ids, if given) and one encrypted data packet, which is larger than the data of the keyword. So nothing is left in clear text.
+    Both files are memory mapped and compared in chunks. The walk stops at the first difference, because the rest of the files can not be matched anymore.
+    """
+
+    HEADER_REGEX = re.compile(rb'\$+\n\$\n\$ START OF ENCRYPTION HEADER\n.*?\n\$ END OF ENCRYPTION HEADER\n\$\n\$+\n\$\n', re.DOTALL)
+    ARMOR_BEGIN = b'-----BEGIN PGP MESSAGE-----\n'
+    ARMOR_END = b'-----END PGP MESSAGE-----\n'
+    # symmetrically encrypted data, without (gpg --rfc2440, native backend) and with integrity protection
+    ENCRYPTED_DATA_TAGS = (9, 18)
+    # the random prefix of the encrypted data: one AES block and the two check bytes
+    MIN_ENCRYPTION_OVERHEAD = 18
+
+    def __init__(self, *, keywords_to_encrypt: Optional[Sequence[str]] = None, partial: bool = False, partial_cards: Optional[Dict[str, int]] = None,
+                 key_ids: Optional[Iterable[str]] = None):
+        """
+        :param keywords_to_encrypt: The keywords that were encrypted. Default = LS_Dyna_Encryptor_Base.DEFAULT_KEYWORDS_TO_ENCRYPT.
+        :param partial: If True, the keywords were encrypted partially, see LS_Dyna_Encryptor.
+        :param partial_cards: The cards in clear text of the partial mode. Default = LS_Dyna_Encryptor_Base.DEFAULT_PARTIAL_CARDS.
+        :param key_ids: The ids of the keys the keywords may be encrypted for, e.g. LSDynaKey.key_id. None accepts every key.
+        """
+        super().__init__()
+        if keywords_to_encrypt is not None:
+            self.keywords_to_encrypt = list(keywords_to_encrypt)
+        self.partial = partial
+        if partial_cards is not None:
+            self.partial_cards = dict(partial_cards)
+        self.key_ids: Optional[set] = {key_id.upper() for key_id in key_ids} if key_ids is not None else None
+
+    # ==============================================================================
+    def verify(self, inputfile: Union[str, pathlib.Path], outfile: Union[str, pathlib.Path]) -> VerificationResult:
+        start_time = time.perf_counter()
+        inputfile, outfile = pathlib.Path(inputfile).resolve(), pathlib.Path(outfile).resolve()
+        counts = {'blocks': 0, 'armor_bytes': 0, 'passthrough_bytes': 0}
+        key_ids = set()
+        errors = []
+        try:
+            with open(inputfile, 'rb') as infile, open(outfile, 'rb') as out, self.map_file(infile) as buffer, self.map_file(out) as output:
+                # the text modes write '\n' only, the mapped mode keeps '\r\n' in the regions that are not encrypted
+                if buffer.find(b'\r\n') != -1:
+                    buffer, output = buffer[:].replace(b'\r\n', b'\n'), output[:].replace(b'\r\n', b'\n')
+                document = KeywordDocument(buffer, self.keyword_matcher, self.clear_cards if self.partial else None)
+                self.compare_document(document, output, counts, key_ids, errors)
+        except VerificationError as error:
+            errors.append(str(error))
+        except OSError as error:
+            errors.append(f"{error.strerror}: {error.filename}")
+        return VerificationResult(inputfile, outfile, counts['blocks'], counts['armor_bytes'], counts['passthrough_bytes'], tuple(sorted(key_ids)),
+                                  tuple(errors), time.perf_counter() - start_time)
+
+    # ==============================================================================
+    def verify_files(self, files: Sequence[Tuple[pathlib.Path, pathlib.Path]], max_workers: int = 1) -> List[VerificationResult]:
+        """
+        Verifies (inputfile, outfile) of all files and returns the results in the same order.
+        The checksums and comparisons run in Python, so the files are spread over max_workers processes instead of threads.
+        """
+        if max_workers <= 1 or len(files) <= 1:
+            return [self.verify(inputfile, outfile) for inputfile, outfile in files]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+            return list(executor.map(self.verify, [inputfile for inputfile, _ in files], [outfile for _, outfile in files]))
+
+    # ==============================================================================
+    @staticmethod
+    @contextlib.contextmanager
+    def map_file(file) -> Iterator[Union[mmap.mmap, bytes]]:
+        # an empty file can not be mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+    # ==============================================================================
+    @staticmethod
+    def line_number(buffer, offset: int) -> int:
+        # only needed for the error messages, a mmap has no count
+        return buffer[:offset].count(b'\n') + 1
+
+    # ==============================================================================
+    def compare_document(self, document: KeywordDocument, output, counts: dict, key_ids: set, errors: List[str]):
+        """
+        Walks the outfile along the blocks of the document in the same way as iter_document_output writes it.
+        Errors inside an armor are appended to errors, a difference of the files raises VerificationError.
+        """
+        buffer = document.buffer
+        size = len(buffer)
+        header = self.HEADER_REGEX.match(output)
+        if header is None:
+            raise VerificationError("the encryption header at the start of the outfile is missing")
+        pos = header.end()
+        last_end = 0
+        last_data_end = None
+        for start, data_start, data_end, end in document.iter_blocks():
+            # nothing to encrypt, e.g. only cards in clear text: the whole block is passed through
+            if data_start >= data_end:
+                data_start = end
+            pos = self.compare_region(buffer, last_end, data_start, output, pos, counts)
+            last_end = data_start
+            if data_start == end:
+                continue
+            armor_start = pos
+            pos = self.check_armor(output, pos, data_end - data_start, key_ids, errors)
+            counts['blocks'] += 1
+            counts['armor_bytes'] += pos - armor_start
+            # the comments after the keyword are not encrypted
+            pos = self.compare_region(buffer, data_end, end, output, pos, counts)
+            last_end, last_data_end = end, data_end
+
+        pos = self.compare_region(buffer, last_end, size, output, pos, counts)
+        # every line of the outfile ends with a newline, an encrypted keyword at the end of the inputfile already does
+        if size and buffer[size - 1] != 0x0A and last_data_end != size:
+            if output[pos:pos + 1] != b'\n':
+                raise VerificationError(f"line {self.line_number(output, pos)} of the outfile: the newline at the end is missing")
+            pos += 1
+        if pos != len(output):
+            raise VerificationError(f"line {self.line_number(output, pos)} of the outfile: data after the end of the inputfile")
+
+    # ==============================================================================
+    def compare_region(self, buffer, start: int, end: int, output, pos: int, counts: dict) -> int:
+        """
+        Compares buffer[start:end] of the inputfile with the outfile at pos in chunks and returns the position in the outfile after it.
+        """
+        for chunk_start in range(start, end, AtomicOutputFile.BUFFER_SIZE):
+            chunk = buffer[chunk_start:min(chunk_start + AtomicOutputFile.BUFFER_SIZE, end)]
+            output_chunk = output[pos:pos + len(chunk)]
+            if chunk != output_chunk:
+                offset = len(os.path.commonprefix([chunk, output_chunk]))
+                raise VerificationError(f"line {self.line_number(output, pos + offset)} of the outfile differs from line "
+                                        f"{self.line_number(buffer, chunk_start + offset)} of the inputfile")
+            pos += len(chunk)
+        counts['passthrough_bytes'] += max(end - start, 0)
+        return pos
+
+    # ==============================================================================
+    def check_armor(self, output, pos: int, data_length: int, key_ids: set, errors: List[str]) -> int:
+        """
+        Checks the armor of an encrypted keyword at pos and returns the position after it. data_length is the size of the data of the keyword in the inputfile.
+        """
+        line = self.line_number(output, pos)
+        if not output[pos:pos + len(self.ARMOR_BEGIN)] == self.ARMOR_BEGIN:
+            raise VerificationError(f"line {line} of the outfile: the PGP MESSAGE of a keyword to encrypt is missing. The keyword is not encrypted, "
+                                    f"or the outfile was written with other keywords or partial mode")
+        end = output.find(self.ARMOR_END, pos)
+        if end == -1 or output.find(self.ARMOR_BEGIN, pos + 1, end) != -1:
+            raise VerificationError(f"line {line} of the outfile: the PGP MESSAGE is not closed")
+        end += len(self.ARMOR_END)
+        try:
+            armored = output[pos:end].decode('ascii')
+            if not any(armor_line.startswith('=') for armor_line in armored.splitlines()[-2:-1]):
+                raise ValueError("the CRC-24 checksum is missing")
+            packets = list(iter_packets(dearmor(armored)))
+        except ValueError as error:
+            # also invalid base64 (binascii.Error) and text that is not ASCII
+            errors.append(f"line {line} of the outfile: {error}")
+            return end
+        except IndexError:
+            errors.append(f"line {line} of the outfile: an OpenPGP packet header is truncated")
+            return end
+
+        tags = [tag for tag, _ in packets]
+        if len(tags) < 2 or any(tag != 1 for tag in tags[:-1]) or tags[-1] not in self.ENCRYPTED_DATA_TAGS:
+            errors.append(f"line {line} of the outfile: unexpected OpenPGP packets {tags}, expected session keys (1) and encrypted data (9 or 18)")
+            return end
+        for _, body in packets[:-1]:
+            key_id = body[1:9].hex().upper()
+            key_ids.add(key_id)
+            if body[:1] != b'\x03' or len(body) < 10:
+                errors.append(f"line {line} of the outfile: invalid public-key encrypted session key packet")
+            elif self.key_ids is not None and key_id not in self.key_ids:
+                errors.append(f"line {line} of the outfile: encrypted for the key {key_id} instead of {', '.join(sorted(self.key_ids))}")
+        # the literal data is not compressed, so the encrypted data can not be smaller than the keyword
+        encrypted_length = len(packets[-1][1]) - (1 if tags[-1] == 18 else 0)
+        if encrypted_length < data_length + self.MIN_ENCRYPTION_OVERHEAD:
+            errors.append(f"line {line} of the outfile: the encrypted data ({encrypted_length} bytes) is smaller than the keyword ({data_length} bytes)")
+        return end
+
+# ==============================================================================
+class LS_Dyna_Batch_Encryptor:
+    """
+    This class is used to encrypt many files in one run.
+
+    The inputs can be files, glob patterns or directories, which are searched recursively for keyword files.
+    The gpg key and the expiry date are checked once and all files share one pool of gpg sessions and the block cache.
+    An error of a single file does not stop the batch, the errors are collected in failed_files and reported at the end (unless policy.fail_fast).
+    If the user answers a question with 'n', the whole batch stops like a single file.
+    """
+
+    # the errors of a single file that are collected instead of stopping the batch, UserCanceledError is raised before
+    FILE_ERRORS = (EncryptionError, OSError)
+
+    def __init__(self, *, inputs: Sequence[str], outdir: Optional[str] = None, expiry_date: Union[str, datetime.date], key_length: Union[int, Sequence[int]] = 1024,
+                 max_workers: Optional[int] = 1,
+                 cache_dir: Optional[str] = None, manifest: Optional[str] = None, incremental: bool = False, profile_json: bool = False, backend: str = 'gpg',
+                 reuse_session_key: bool = False, partial: bool = False, keyword_index: bool = False, policy: Optional[EncryptionPolicy] = None,
+                 compress: Sequence[str] = (), keyring: str = 'user'):
+        """
+        :param inputs: The files, glob patterns and directories to encrypt.
+        :param outdir: The directory to write the encrypted files to. The structure of input directories is mirrored. Default = next to the inputfiles.
+        :param expiry_date: The expiry date for all files.
+        :param key_length: The length of the key to use, or several ones, see LS_Dyna_Encryptor. Several key lengths are not possible with a manifest.
+        :param max_workers: The number of gpg sessions running in parallel. None uses one per CPU.
+        :param cache_dir: The directory of a BlockCache shared by all files.
+        :param manifest: The JSON file of the EncryptionManifest. Default = lsdyna_encrypt_manifest.json in the outdir or the current directory, if incremental is True.
+        :param incremental: If True, unchanged files are skipped and only the changed keywords of changed files are encrypted again.
+        :param profile_json: If True, the EncryptionProfile of every file is written next to its logfile.
+        :param backend: The name of the encryption backend of all files, see ENCRYPTION_BACKENDS.
+        :param reuse_session_key: If True, one session key per file is used for all its keywords. Only for the native backend.
+        :param partial: If True, the keywords are encrypted partially, see LS_Dyna_Encryptor. Only without expiry date.
+        :param keyword_index: If True, the keyword blocks are taken from the index next to every inputfile, see LS_Dyna_Encryptor.
+        :param policy: What happens with existing outfiles, odd expiry dates and failing files, see EncryptionPolicy. Default = ask the user and collect the errors.
+        :param compress: The formats of compressed copies of every outfile, see AtomicOutputFile.
+        :param keyring: Where gpg finds the LS-Dyna keys, see LS_Dyna_Encryptor.
+        """
+        self.inputs: List[str] = list(inputs)
+        self.outdir: Optional[pathlib.Path] = pathlib.Path(outdir).resolve() if outdir is not None else None
+        self.expiry_date: Union[str, datetime.date] = expiry_date
+        self.key_lengths: Tuple[int, ...] = key_length_tuple(key_length)
+        self.key_length: int = self.key_lengths[0]
+        self.max_workers: int = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.cache: Optional[BlockCache] = BlockCache(cache_dir) if cache_dir is not None else None
+        self.incremental: bool = incremental
+        if len(self.key_lengths) > 1 and (manifest is not None or incremental):
+            raise ConfigurationError("The manifest records one outfile per inputfile, use one key length per run with a manifest or in incremental runs")
+        if manifest is None and incremental:
+            manifest = (self.outdir or pathlib.Path.cwd()) / 'lsdyna_encrypt_manifest.json'
+        self.manifest: Optional[EncryptionManifest] = EncryptionManifest(manifest) if manifest is not None else None
+
+        self.keywords_to_encrypt: List[str] = list(LS_Dyna_Encryptor.DEFAULT_KEYWORDS_TO_ENCRYPT)
+        self.vendor_message: str = LS_Dyna_Encryptor.DEFAULT_VENDOR_MESSAGE
+        self.partial_cards: Dict[str, int] = dict(LS_Dyna_Encryptor.DEFAULT_PARTIAL_CARDS)
+        # the file extensions searched for in directories
+        self.extensions: Tuple[str, ...] = ('.k', '.key', '.dyn', '.inc')
+        self.encryptors: List[LS_Dyna_Encryptor] = []
+        self.skipped_files: List[pathlib.Path] = []
+        self.profile_json: bool = profile_json
+        self.backend: str = backend
+        self.reuse_session_key: bool = reuse_session_key
+        self.partial: bool = partial
+        self.keyword_index: bool = keyword_index
+        self.policy: EncryptionPolicy = policy if policy is not None else EncryptionPolicy()
+        self.policy.check()
+        AtomicOutputFile.check_compressions(compress)
+        self.compress: Tuple[str, ...] = tuple(compress)
+        self.keyring: str = keyring
+        # (inputfile, error) of all files that failed
+        self.failed_files: List[Tuple[pathlib.Path, Exception]] = []
+        # the sum of the profiles of all files, the wall time is the one of the whole batch
+        self.profile: EncryptionProfile = EncryptionProfile()
+        self.file_hashes: Dict[pathlib.Path, str] = {}
+
+        self.inputfiles: List[Tuple[pathlib.Path, Optional[pathlib.Path]]] = self.collect_inputfiles()
+        if not self.inputfiles and not self.failed_files:
+            raise InputFileError("No inputfiles found")
+
+    # ==============================================================================
+    def collect_inputfiles(self) -> List[Tuple[pathlib.Path, Optional[pathlib.Path]]]:
+        """
+        Returns (inputfile, outfile) for all inputs. The outfile is None if it should be written next to the inputfile.
+        In the outdir, the files of a directory keep their path relative to the directory and single files (also from glob patterns) their path
+        relative to the common directory of all single files. Two inputfiles with the same outfile raise a ConfigurationError before anything is encrypted.
+        """
+        # (inputfile, path of the outfile relative to the outdir). The relative path of single files is set when all of them are known.
+        found = []
+        for spec in self.inputs:
+            path = pathlib.Path(spec)
+            if path.is_dir():
+                for inputfile in sorted(path.rglob('*')):
+                    if inputfile.suffix.lower() in self.extensions and inputfile.is_file():
+                        found.append((inputfile, inputfile.relative_to(path)))
+            elif path.is_file():
+                found.append((path, None))
+            else:
+                # the shell does not expand patterns in quotes or on Windows
+                matches = [pathlib.Path(match) for match in sorted(glob.glob(spec, recursive=True))]
+                if not matches:
+                    sh_logger.warning(f"No files found for: {spec}")
+                found.extend((match, None) for match in matches if match.is_file())
+
+        # every file once in the order it was found. A file that is also in a directory keeps its path relative to the directory.
+        relative_paths = {}
+        for inputfile, relative_path in found:
+            inputfile = inputfile.resolve()
+            if relative_paths.get(inputfile) is None:
+                relative_paths[inputfile] = relative_path
+
+        # e.g. a/mat.k and c/mat.k are written to <outdir>/a/mat.k.asc and <outdir>/c/mat.k.asc instead of both to <outdir>/mat.k.asc
+        single_files = [inputfile for inputfile, relative_path in relative_paths.items() if relative_path is None]
+        root = pathlib.Path(os.path.commonpath([inputfile.parent for inputfile in single_files])) if single_files else None
+
+        inputfiles = []
+        outfiles = {}
+        for inputfile, relative_path in relative_paths.items():
+            outfile = None
+            if self.outdir is not None:
+                if relative_path is None:
+                    relative_path = inputfile.relative_to(root)
+                outfile = self.outdir / relative_path.with_name(relative_path.name + '.asc')
+                # the check of existing outfiles runs before any file is written, so it would not notice this
+                if outfile in outfiles:
+                    raise ConfigurationError(f"{outfiles[outfile]} and {inputfile} would both be written to {outfile}")
+                outfiles[outfile] = inputfile
+            inputfiles.append((inputfile, outfile))
+        return inputfiles
+
+    # ==============================================================================
+    def record_failure(self, inputfile: pathlib.Path, error: Exception):
+        # with fail_fast the batch stops at the first error, otherwise all errors are reported at the end
+        if self.policy.fail_fast:
+            raise error
+        sh_logger.debug(f"failed: {inputfile}: {error}")
+        self.failed_files.append((inputfile, error))
+
+    # ==============================================================================
+    def report_failures(self):
+        if not self.failed_files:
+            return
+        sh_logger.error(f"{len(self.failed_files)} file(s) failed:")
+        for inputfile, error in self.failed_files:
+            sh_logger.error(f"  {inputfile}: {error}")
+
+    # ==============================================================================
+    def manifest_settings(self) -> dict:
+        # everything apart from the inputfile that changes the outfile
+        if self.expiry_date is None or self.expiry_date in ('0', False):
+            expiry_date = 'never'
+        elif isinstance(self.expiry_date, datetime):
+            expiry_date = self.expiry_date.strftime('%m/%d/%Y')
         else:
-            self.log_text.append(f"Expiry date: Never")
-        self.log_text.append(f"Encrypted keywords: {', '.join(self.keywords_to_encrypt)}")
+            expiry_date = datetime.strptime(self.expiry_date, '%m/%d/%Y').strftime('%m/%d/%Y')
+        return {
+            'key_id': LS_Dyna_Encryptor.LS_DYNA_USER_IDS.get(self.key_length),
+            'key_length': self.key_length,
+            'expiry_date': expiry_date,
+            'vendor_message': self.vendor_message,
+            'keywords_to_encrypt': list(self.keywords_to_encrypt),
+            'tool_version': __version__,
+            # only recorded if set, so manifests of former versions stay valid
+            **({'partial_cards': dict(self.partial_cards)} if self.partial else {}),
+        }
 
     # ==============================================================================
-    def check_gpg_key(self):
-        # check if the key is imported in gpg, returns 0 if available
-        check_key = os.system(f'gpg -k {self.ls_dyna_user_id} > /dev/null 2>&1')
+    def outfile_for(self, inputfile: pathlib.Path, outfile: Optional[pathlib.Path]) -> pathlib.Path:
+        # same default as LS_Dyna_Encryptor.check_outfile
+        return outfile if outfile is not None else inputfile.with_name(inputfile.name + '.asc')
 
-        if check_key != 0:
-            sh_logger.error("""key_length not available/not known. Maybe also outdated. Exiting...
-Please check your keys in your gpg configuration ot add the LS-Dyna keys. For further instructions refer to the LS-Dyna instructions:
+    # ==============================================================================
+    def skip_unchanged_files(self) -> List[Tuple[pathlib.Path, Optional[pathlib.Path]]]:
+        """
+        Returns the inputfiles that need to be encrypted. Files whose manifest entry still matches are skipped.
+        """
+        if self.manifest is None:
+            return self.inputfiles
 
-https://ftp.lstc.com/anonymous/outgoing/support/FAQ/Instructions_encryption
-""")
-            sys.exit()	
+        settings = self.manifest_settings()
+        inputfiles = []
+        for inputfile, outfile in self.inputfiles:
+            self.file_hashes[inputfile] = file_sha256(inputfile)
+            if self.incremental and self.manifest.is_current(inputfile, self.file_hashes[inputfile], self.outfile_for(inputfile, outfile), settings):
+                sh_logger.debug(f"unchanged, skipping: {inputfile}")
+                self.skipped_files.append(inputfile)
+                continue
+            inputfiles.append((inputfile, outfile))
+        return inputfiles
 
     # ==============================================================================
-    def encrypt_actual_data(self, enc_data):
-        # make temp file for encryption
-        tmp_inputfile = pathlib.Path("tmp_enc_script.txt").resolve()
-        tmp_outputfile = pathlib.Path("tmp_enc_script.txt.asc").resolve()
-
-        # text_to_encrypt is the data plus *VENDOR if expiry date
-        if self.expiry_date is not None:
-            # sh_logger.info(f"Encrypting file with expiry date: {expiry_date.strftime('%Y/%m/%d')}")
-            enc_data.insert(0, f"This could be a self written error message in the VENDOR keyword")
-            enc_data.insert(0, f"DATE      {self.expiry_date.strftime('%m/%d/%Y')}")
-            enc_data.insert(0, "*VENDOR")
-            enc_data.append("*VENDOR_END")
-
-        # write text to encrypt to file
-        with open(tmp_inputfile, 'w', encoding='utf-8', errors='ignore') as infile:
-            # tte = text to encrypt
-            for tte in enc_data:
-                infile.write(tte + '\n')
-
-        # if already encrypted file exists, just delete it
-        if tmp_outputfile.exists():
-            os.system(f'rm -f {tmp_outputfile} > /dev/null 2>&1')
-
-        # encrypt the inputfile
-        os.system(f'gpg -e -a --rfc2440 --textmode --cipher-algo AES  --compress-algo 0 -r {self.ls_dyna_user_id} --trust-model always {tmp_inputfile} > /dev/null 2>&1')
-
-        # open the output file with encrypted data
-        with open(tmp_outputfile, 'r', encoding='utf-8', errors='ignore') as tmp_enc_file:
-            enc_text = tmp_enc_file.read().splitlines()
-
-        # clean up all files
-        os.system(f'rm -f {tmp_inputfile} {tmp_outputfile} > /dev/null 2>&1')
+    def create_encryptors(self, inputfiles: List[Tuple[pathlib.Path, Optional[pathlib.Path]]], executor: concurrent.futures.Executor):
+        self.encryptors = []
+        expiry_date = self.expiry_date
+        for inputfile, outfile in inputfiles:
+            if outfile is not None:
+                outfile.parent.mkdir(parents=True, exist_ok=True)
+            # in an incremental run the outfiles of the former run are replaced without asking
+            try:
+                encryptor = LS_Dyna_Encryptor(inputfile=str(inputfile), outfile=None if outfile is None else str(outfile), expiry_date=expiry_date,
+                                              key_length=self.key_lengths, max_workers=self.max_workers, overwrite=self.incremental, backend=self.backend,
+                                              reuse_session_key=self.reuse_session_key, partial=self.partial, keyword_index=self.keyword_index, policy=self.policy,
+                                              compress=self.encryptor_compress, keyring=self.keyring)
+            except UserCanceledError:
+                raise
+            except self.FILE_ERRORS as error:
+                self.record_failure(inputfile, error)
+                continue
+            if encryptor.skipped:
+                self.skipped_files.append(inputfile)
+                continue
+            # the expiry date is only checked (and maybe asked for) with the first file, all others get the checked date
+            expiry_date = encryptor.expiry_date if encryptor.expiry_date is not None else '0'
+            encryptor.keywords_to_encrypt = list(self.keywords_to_encrypt)
+            encryptor.vendor_message = self.vendor_message
+            encryptor.partial_cards = dict(self.partial_cards)
+            encryptor.cache = self.cache
+            encryptor.executor = executor
+            # the progress bars of files encrypted in parallel would overwrite each other
+            encryptor.show_progress = len(inputfiles) == 1
+            encryptor.profile_json = self.profile_json
+            if self.manifest is not None:
+                encryptor.keyword_keys = []
+                if self.incremental:
+                    encryptor.previous_keywords = self.manifest.previous_keywords(encryptor.inputfile_fullpath, encryptor.outfile_fullpath)
+            self.encryptors.append(encryptor)
 
-        return enc_text
+    # ==============================================================================
+    @property
+    def encryptor_compress(self) -> Tuple[str, ...]:
+        # the compressed copies written by the encryptors of the single files
+        return self.compress
 
     # ==============================================================================
-    def encrypt_keyword(self, curve_data):
-        # since just the next keyword ends the curve, it could be that some comments are after the current data to encrypt and before the next keyword
-        # this is checked here and just appended to the outfile_text
-        comments_after_enc_data = []
-        for p, t in enumerate(reversed(curve_data)):
-            if t.startswith('$'):
-                comments_after_enc_data.append(t)
+    def encrypt_files(self, stream: bool = False, mapped: bool = False):
+        """
+        Encrypts all inputfiles. The files are processed in parallel and their keywords are encrypted by the shared pool of gpg sessions.
+
+        :param stream: see LS_Dyna_Encryptor.encrypt_file
+        :param mapped: see LS_Dyna_Encryptor.encrypt_file
+        """
+        start = time.perf_counter()
+        inputfiles = self.skip_unchanged_files()
+        if self.skipped_files:
+            sh_logger.info(f"Skipping {len(self.skipped_files)} unchanged files.")
+
+        # the files are processed by their own pool, the gpg sessions run in the shared executor. This way a file never waits for a pool that is busy with files.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self.create_encryptors(inputfiles, executor)
+            sh_logger.info(f"Encrypting {len(self.encryptors)} files with {self.max_workers} gpg session(s)...")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as file_executor:
+                futures = [file_executor.submit(encryptor.encrypt_file, stream=stream, mapped=mapped) for encryptor in self.encryptors]
+                for encryptor, future in zip(self.encryptors, futures):
+                    try:
+                        future.result()
+                    except UserCanceledError:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    except self.FILE_ERRORS as error:
+                        if self.policy.fail_fast:
+                            for pending in futures:
+                                pending.cancel()
+                        self.record_failure(encryptor.inputfile_fullpath, error)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        failed = {inputfile for inputfile, _ in self.failed_files}
+        encryptors = [encryptor for encryptor in self.encryptors if encryptor.inputfile_fullpath not in failed]
+        # with several key lengths, the statistics include the outfiles of all key lengths
+        key_encryptors = [key_encryptor for encryptor in encryptors for key_encryptor in encryptor.key_encryptors]
+        for encryptor in key_encryptors:
+            self.profile.merge(encryptor.profile)
+        self.profile.wall_time += elapsed
+
+        if self.manifest is not None:
+            settings = self.manifest_settings()
+            for encryptor in encryptors:
+                self.manifest.update(encryptor, self.file_hashes[encryptor.inputfile_fullpath], settings)
+            self.manifest.save()
+            sh_logger.debug(f"manifest written: {self.manifest.path}")
+
+        input_bytes = sum(encryptor.inputfile_fullpath.stat().st_size for encryptor in encryptors)
+        keywords = sum(encryptor.encrypted_keywords for encryptor in key_encryptors)
+        reused_keywords = sum(encryptor.reused_keywords for encryptor in key_encryptors)
+        sh_logger.log(PRINT, f"Encrypted {len(encryptors)} files, {keywords} keywords ({reused_keywords} reused), {input_bytes / 1e6:.1f} MB in {elapsed:.2f} s")
+        sh_logger.log(PRINT, f"Throughput: {len(encryptors) / elapsed:.1f} files/s, {keywords / elapsed:.1f} keywords/s, {input_bytes / 1e6 / elapsed:.2f} MB/s")
+        self.finish_files()
+        sh_logger.log(PRINT, f"Output: {self.profile.output_summary()}")
+        self.report_failures()
+
+    # ==============================================================================
+    def verify_files(self) -> List[VerificationResult]:
+        """
+        Checks the existing outfiles of all inputfiles without decrypting them, see LS_Dyna_Output_Verifier. The files are spread over max_workers processes.
+        Outfiles with errors are recorded in failed_files.
+        """
+        verifier = LS_Dyna_Output_Verifier(keywords_to_encrypt=self.keywords_to_encrypt, partial=self.partial, partial_cards=self.partial_cards,
+                                           key_ids=[KeyRegistry.key(key_length).key_id for key_length in self.key_lengths])
+        files = []
+        for inputfile, outfile in self.inputfiles:
+            outfile = self.outfile_for(inputfile, outfile)
+            if len(self.key_lengths) > 1:
+                files.extend((inputfile, LS_Dyna_Encryptor.key_length_outfile(outfile, key_length)) for key_length in self.key_lengths)
+            else:
+                files.append((inputfile, outfile))
+
+        sh_logger.info(f"Verifying {len(files)} outfile(s)...")
+        start_time = time.perf_counter()
+        results = verifier.verify_files(files, self.max_workers)
+        elapsed = time.perf_counter() - start_time
+        for result in results:
+            if result.ok:
+                sh_logger.info(f"Verified {result.outfile}: {result.summary()}")
                 continue
-            break
-    
-        # reverse the comments after curve data to get the correct order
-        comments_after_enc_data = reversed(comments_after_enc_data)
-        # if there were comments after the curve the curve data needs to be reduced
-        if p == 0:
-            enc_data = curve_data
-        else:
-            enc_data = curve_data[:-p]
-        
-        # encrypt actual curve
-        encrypted_xy_data = self.encrypt_actual_data(enc_data)
-        # add comments after curve back to the text
-        encrypted_xy_data.extend(comments_after_enc_data)
-        return encrypted_xy_data
+            more = f" (and {len(result.errors) - 1} more errors)" if len(result.errors) > 1 else ''
+            self.record_failure(result.inputfile, VerificationError(f"{result.outfile}: {result.errors[0]}{more}"))
+        ok_files = sum(result.ok for result in results)
+        sh_logger.log(PRINT, f"Verified {len(results)} outfile(s) in {elapsed:.2f} s: {ok_files} ok, {len(results) - ok_files} failed")
+        self.report_failures()
+        return results
 
     # ==============================================================================
-    def encrypt_data(self):
-        sh_logger.info(f"Encrypting...")
-        sh_logger.log(PRINT, f"Will encrypt the keywords: {' ,'.join(self.keywords_to_encrypt)}")
-        to_encrypt = False
-        tmp_text_to_encrypt = []
-        for i, line in enumerate(self.input_text):
-            progress_bar(iteration=i, maximum=len(self.input_text))
-
-            # if line is not a keyword that should be encrypted just append to outputfile and go to next line
-            if not line.upper().startswith(tuple(self.keywords_to_encrypt)) and not to_encrypt:
-                self.output_text.append(line)
+    def finish_files(self):
+        """
+        Called after all files are encrypted and before the failed files are reported. Subclasses process the outfiles further here.
+        """
+
+# ==============================================================================
+class LS_Dyna_Include_Encryptor(LS_Dyna_Batch_Encryptor):
+    """
+    This class encrypts input decks together with all files they include.
+
+    The *INCLUDE tree of every inputfile (the masters) is resolved with the index of KeywordFile. The files of one level of the trees are read and indexed in parallel
+    and every file is only read once, also if it is included by several files or masters. Every file of the trees is encrypted once by the batch, then
+    - 'mirror': the encrypted files are written to the outdir with the same names and the same structure relative to the masters, so the *INCLUDE keywords still work.
+    - 'merge': one self-contained deck per master is written to the outdir. The *INCLUDE keywords are replaced by the encrypted content of the included files.
+
+    An included file is searched next to the including file, in the directory of the master and in the directories of *INCLUDE_PATH, like LS-Dyna does.
+    """
+
+    INCLUDE_MODES = ('mirror', 'merge')
+    ARMOR_BEGIN = b'\n-----BEGIN PGP MESSAGE-----'
+
+    def __init__(self, *, inputs: Sequence[str], outdir: str, mode: str = 'mirror', **kwargs):
+        """
+        :param inputs: The masters: files, glob patterns and directories like for LS_Dyna_Batch_Encryptor.
+        :param outdir: The directory to write the encrypted files or the merged decks to.
+        :param mode: 'mirror' or 'merge', see above.
+        :param kwargs: see LS_Dyna_Batch_Encryptor. A manifest is only possible in the mirror mode.
+        """
+        if mode not in self.INCLUDE_MODES:
+            raise ConfigurationError(f"Unknown include mode {mode}. Available: {', '.join(self.INCLUDE_MODES)}")
+        if mode == 'merge' and (kwargs.get('manifest') is not None or kwargs.get('incremental')):
+            raise ConfigurationError("The merged decks can not be recorded in a manifest, use the mirror mode for incremental runs")
+        # the outfiles of several key lengths have different names, the *INCLUDE keywords would not find them anymore
+        if len(key_length_tuple(kwargs.get('key_length', 1024))) > 1:
+            raise ConfigurationError("The included files are referenced by their names, use one key length per run")
+        self.mode: str = mode
+        # the master files and the included files of every file of their trees
+        self.masters: List[pathlib.Path] = []
+        self.include_trees: Dict[pathlib.Path, Dict[pathlib.Path, List[pathlib.Path]]] = {}
+        super().__init__(inputs=inputs, outdir=outdir, **kwargs)
+
+    # ==============================================================================
+    def collect_inputfiles(self) -> List[Tuple[pathlib.Path, Optional[pathlib.Path]]]:
+        """
+        Returns (inputfile, outfile) for every file of the include trees of the masters. A file included by several files or masters is returned once.
+        A master with an error in its tree is recorded as failed and left out.
+        """
+        self.masters = [master for master, _ in super().collect_inputfiles()]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            keyword_files = {}
+            self.include_trees = self.resolve_include_trees(executor, keyword_files)
+        for master, tree in list(self.include_trees.items()):
+            try:
+                self.check_include_cycles(master, tree)
+                if self.mode == 'merge':
+                    self.check_mergeable(tree, keyword_files)
+            except self.FILE_ERRORS as error:
+                self.record_failure(master, error)
+                del self.include_trees[master]
+        self.masters = list(self.include_trees)
+
+        # the masters first, then the included files in the order they were found
+        files = list(dict.fromkeys(path for tree in self.include_trees.values() for path in tree))
+        if self.mode == 'merge':
+            return [(path, self.work_dir / f"{i:05d}_{path.name}") for i, path in enumerate(files)]
+
+        # the structure below the common directory of the masters is mirrored, included files outside of it can not be placed in the outdir
+        root = pathlib.Path(os.path.commonpath([master.parent for master in self.masters])) if self.masters else pathlib.Path.cwd()
+        inputfiles = []
+        for path in files:
+            if root not in path.parents:
+                raise ConfigurationError(f"The included file {path} is outside of {root} and can not be mirrored, use the merge mode instead")
+            outfile = self.outdir / path.relative_to(root)
+            if outfile == path:
+                raise ConfigurationError(f"The outdir {self.outdir} would overwrite the inputfiles")
+            inputfiles.append((path, outfile))
+        return inputfiles
+
+    # ==============================================================================
+    @property
+    def work_dir(self) -> pathlib.Path:
+        # the merge mode writes the encrypted files of the trees to this directory first, it is created by the encryptors and removed after the merge
+        return self.outdir / '.lsdyna_merge'
+
+    # ==============================================================================
+    def resolve_include_trees(self, executor: concurrent.futures.Executor, keyword_files: dict) -> Dict[pathlib.Path, Dict[pathlib.Path, List[pathlib.Path]]]:
+        """
+        Resolves the include trees of all masters level by level. All files of a level are indexed in parallel, a file is only indexed once.
+        """
+        # the index futures by file, shared by all trees
+        futures = {}
+        trees = {master: {} for master in self.masters}
+        include_dirs = {master: [] for master in self.masters}
+        # (file, master) of the current level
+        level = [(master, master) for master in self.masters]
+        while level:
+            for path, _ in level:
+                if path not in futures:
+                    keyword_files[path] = KeywordFile(path, cache_index=self.keyword_index)
+                    # accessing the index reads and indexes the file
+                    futures[path] = executor.submit(lambda keyword_file: keyword_file.index, keyword_files[path])
+
+            next_level = []
+            for path, master in level:
+                if master not in trees:
+                    continue
+                try:
+                    index = futures[path].result()
+                    for include_path in index.include_paths:
+                        directory = (master.parent / include_path.replace('\\', '/')).resolve()
+                        if directory not in include_dirs[master]:
+                            include_dirs[master].append(directory)
+                    children = [self.resolve_include(name, path, master, include_dirs[master]) for name in index.includes]
+                except self.FILE_ERRORS as error:
+                    # the other masters are still encrypted
+                    self.record_failure(master, error)
+                    del trees[master]
+                    continue
+                trees[master][path] = children
+                for child in children:
+                    if child not in trees[master] and (child, master) not in next_level:
+                        next_level.append((child, master))
+            level = next_level
+        return trees
+
+    # ==============================================================================
+    @staticmethod
+    def resolve_include(name: str, including_file: pathlib.Path, master: pathlib.Path, include_dirs: List[pathlib.Path]) -> pathlib.Path:
+        # decks written on Windows may use backslashes, an absolute name stays absolute
+        name = name.replace('\\', '/')
+        for directory in (including_file.parent, master.parent, *include_dirs):
+            candidate = directory / name
+            if candidate.is_file():
+                return candidate.resolve()
+        raise InputFileError(f"The included file {name} of {including_file} was not found")
+
+    # ==============================================================================
+    @staticmethod
+    def check_include_cycles(master: pathlib.Path, tree: Dict[pathlib.Path, List[pathlib.Path]]):
+        # LS-Dyna would read a file that includes itself forever
+        stack = [(master, iter(tree[master]))]
+        active = {master}
+        while stack:
+            path, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                active.discard(path)
+            elif child in active:
+                raise InputFileError(f"{child} includes itself (via {path})")
+            else:
+                stack.append((child, iter(tree[child])))
+                active.add(child)
+
+    # ==============================================================================
+    @staticmethod
+    def check_mergeable(tree: Dict[pathlib.Path, List[pathlib.Path]], keyword_files: Dict[pathlib.Path, KeywordFile]):
+        # only a plain *INCLUDE can be replaced by the content of the file, the other variants change the included data (e.g. *INCLUDE_TRANSFORM)
+        for path in tree:
+            for keyword in keyword_files[path].index.keywords:
+                if KeywordFile.INCLUDE_REGEX.match(keyword) and keyword != '*INCLUDE':
+                    raise ConfigurationError(f"{keyword} in {path} can not be merged, use the mirror mode instead")
+
+    # ==============================================================================
+    def encrypt_files(self, stream: bool = False, mapped: bool = False):
+        """
+        Encrypts all files of the include trees once and writes the merged decks in the merge mode.
+
+        :param stream: see LS_Dyna_Encryptor.encrypt_file
+        :param mapped: see LS_Dyna_Encryptor.encrypt_file
+        """
+        if self.mode != 'merge':
+            super().encrypt_files(stream=stream, mapped=mapped)
+            return
+        try:
+            super().encrypt_files(stream=stream, mapped=mapped)
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    # ==============================================================================
+    def verify_files(self) -> List[VerificationResult]:
+        # a merged deck has no single inputfile to compare with, the mirrored files do
+        if self.mode == 'merge':
+            raise ConfigurationError("The merged decks can not be verified, only the files of the mirror mode")
+        return super().verify_files()
+
+    # ==============================================================================
+    def finish_files(self):
+        """
+        Writes the merged decks in the merge mode. A master is not merged if a file of its tree failed.
+        """
+        if self.mode != 'merge':
+            return
+        outfiles = {encryptor.inputfile_fullpath: encryptor.outfile_fullpath for encryptor in self.encryptors}
+        failed = {inputfile for inputfile, _ in self.failed_files}
+        for master in self.masters:
+            if master in failed:
                 continue
-            
-            # if line starts with asterix it is a keyword.
-            # if its currently in to_encrypt (line before was in a keyword to encrypt), that means that the curent keyword is finished and a new keyword begins.
-            #   in this case the current keyword needs to be encrypted and appended to the output text
-            if line.startswith('*') and to_encrypt:
-                # set to_encrypt to False since line is not longer inside of the curve
-                to_encrypt = False
-                # encrypt the curve and append to output text
-                self.output_text.extend(self.encrypt_keyword(tmp_text_to_encrypt))
-                # empty tmp var for holding encrypting data
-                tmp_text_to_encrypt = []
-                # check if the Keyword is a new keyword to encrypt
-                # if so, set to_encrypt to True and append the line to the tmp_text_to_encrypt
-                # if not just append to outfile
-                if not line.upper().startswith(tuple(self.keywords_to_encrypt)):
-                    self.output_text.append(line)
-
-            # if True, then the line has keyword and that means a new keyword is starting, but we are currently not inside encryption mode
-            if line.upper().startswith(tuple(self.keywords_to_encrypt)) and not to_encrypt:
-                to_encrypt = True
-
-            # if True, then we are inside a keyword and the data needs to be encrypted
-            if to_encrypt:
-                tmp_text_to_encrypt.append(line)
+            failed_file = next((path for path in self.include_trees[master] if path in failed), None)
+            try:
+                if failed_file is not None:
+                    raise InputFileError(f"not merged, {failed_file} failed")
+                self.write_merged_deck(master, outfiles)
+            except self.FILE_ERRORS as error:
+                self.record_failure(master, error)
 
-        # print after the progress bar to get to the next line
-        print()
+    # ==============================================================================
+    @property
+    def encryptor_compress(self) -> Tuple[str, ...]:
+        # in the merge mode the encrypted files in the work dir are temporary, only the merged decks are compressed
+        return () if self.mode == 'merge' else self.compress
 
-        # if no *END Keyword is specified and the last keyword is to encrypt, the encryption of the last curve is not triggered since the for loop just ends.
-        # we must check if there is still something to encrypt
-        if tmp_text_to_encrypt:
-            self.output_text.extend(self.encrypt_keyword(tmp_text_to_encrypt))
+    # ==============================================================================
+    def merged_outfile(self, master: pathlib.Path) -> pathlib.Path:
+        return self.outdir / master.name
 
     # ==============================================================================
-    def read_inputfile(self):
-        # read inputfile
-        with open(self.inputfile_fullpath, 'r', encoding='utf-8', errors='ignore') as infile:
-            self.input_text = infile.read().splitlines()
+    def write_merged_deck(self, master: pathlib.Path, outfiles: Dict[pathlib.Path, pathlib.Path]):
+        """
+        Writes the encrypted master with the encrypted content of the included files in place of the *INCLUDE keywords and the logfiles of all files as one logfile.
+        """
+        outfile = self.merged_outfile(master)
+        logfile = outfile.with_name(outfile.name + '.log')
+        for path in (outfile, logfile):
+            if path.exists() and not self.policy.allow_existing(path):
+                self.skipped_files.append(master)
+                return
+        sh_logger.debug(f"write merged deck to file: {outfile}")
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        tree = self.include_trees[master]
+        # the encryption header is only written once at the top of the merged deck
+        header = (self.encryptors[0].build_header() + '\n').encode('utf-8')
+        with AtomicOutputFile(outfile, compress=self.compress) as merged:
+            merged.writelines(self.iter_merged_output(master, master, tree, outfiles, header))
+        with AtomicOutputFile(logfile) as merged_log:
+            for path in tree:
+                merged_log.write(outfiles[path].with_name(outfiles[path].name + '.log').read_bytes())
+        # the merged decks are written in addition to the encrypted files of the work dir
+        self.profile.record_output(merged)
+        self.profile.bytes_out += merged.bytes_written
 
     # ==============================================================================
-    def encrypt_file(self):
-        self.read_inputfile()
+    def iter_merged_output(self, path: pathlib.Path, master: pathlib.Path, tree: Dict[pathlib.Path, List[pathlib.Path]],
+                           outfiles: Dict[pathlib.Path, pathlib.Path], header: bytes) -> Iterator[bytes]:
+        # the blocks of the encrypted file, the encrypted keywords contain no keyword lines, so the *INCLUDE keywords are found by the index as well
+        encrypted = KeywordFile(outfiles[path], cache_index=False)
+        buffer = encrypted.path.read_bytes()
+        children = iter(tree[path])
+        last_end = len(header) if path != master and buffer.startswith(header) else 0
+        for start, end, keyword in encrypted.iter_blocks():
+            # the header and the comments before the first keyword
+            if last_end < start:
+                yield buffer[last_end:start]
+            last_end = end
+            if path != master and keyword in ('*KEYWORD', '*END'):
+                # everything after *END of an included file is ignored by LS-Dyna
+                if keyword == '*END':
+                    return
+                yield self.encrypted_part(buffer, start, end)
+                continue
+            if keyword == '*INCLUDE':
+                names = KeywordFile.include_names(KeywordFile.read_cards(buffer, start, end, None)[1:])
+                for name, child in zip(names, children):
+                    yield f"$ *INCLUDE {name}\n".encode('utf-8')
+                    yield from self.iter_merged_output(child, master, tree, outfiles, header)
+                yield self.encrypted_part(buffer, start, end)
+                continue
+            # the directories are not needed anymore in a self-contained deck
+            if keyword.startswith('*INCLUDE_PATH'):
+                yield self.encrypted_part(buffer, start, end)
+                continue
+            yield buffer[start:end]
+        if last_end < len(buffer):
+            yield buffer[last_end:]
 
-        self.generate_header()
+    # ==============================================================================
+    @classmethod
+    def encrypted_part(cls, buffer, start: int, end: int) -> bytes:
+        # the armor lines contain no keyword line, so the encrypted keywords after a block belong to it in the index. Only the cards of the keyword are dropped.
+        armor = buffer.find(cls.ARMOR_BEGIN, start, end)
+        return buffer[armor + 1:end] if armor != -1 else b''
 
-        # gather input for logfile
-        self.gather_logs()
+# ==============================================================================
+class LS_Dyna_Async_Encryptor(LS_Dyna_Encryptor_Base):
+    """
+    This class encrypts LS-Dyna input given as bytes or streams inside of an asyncio event loop, e.g. in a web service.
 
-        self.encrypt_data()
+    gpg is started with asyncio.create_subprocess_exec and the number of concurrent gpg processes is limited by a semaphore, so one instance can serve many concurrent requests without a thread per request.
+    There are no interactive questions: invalid arguments raise ConfigurationError (a ValueError), a missing key raises EncryptionKeyError and a failing gpg BackendError (both RuntimeError).
+    """
 
-        # write outfile
-        sh_logger.debug(f"write output to file: {self.outfile_fullpath}")
-        with open(self.outfile_fullpath, 'w', encoding='utf-8', errors='ignore') as outfile:
-            for line in self.output_text:
-                outfile.write(line + '\n')
+    def __init__(self, *, expiry_date: Union[str, datetime, None] = None, key_length: int = 1024, max_concurrency: int = 4,
+                 keywords_to_encrypt: Optional[Sequence[str]] = None, vendor_message: Optional[str] = None, backend: str = 'gpg', partial: bool = False,
+                 keyring: str = 'user'):
+        """
+        :param expiry_date: The expiry date as datetime or in the format mm/dd/yyyy. None or '0' means no expiry date.
+        :param key_length: The key length of the LS-Dyna key to use (1024 or 2048).
+        :param max_concurrency: The maximum number of gpg processes running at the same time for this instance.
+        :param keywords_to_encrypt: The keywords to encrypt. Default = LS_Dyna_Encryptor_Base.DEFAULT_KEYWORDS_TO_ENCRYPT
+        :param vendor_message: The message in the *VENDOR keyword.
+        :param backend: The name of the encryption backend, see ENCRYPTION_BACKENDS. The native backend encrypts in the default thread pool of the loop.
+        :param partial: If True, the keywords are encrypted partially, see LS_Dyna_Encryptor. Only without expiry date.
+        :param keyring: Where gpg finds the LS-Dyna keys, see LS_Dyna_Encryptor. With 'ephemeral' a service does not need a prepared keyring.
+        """
+        super().__init__()
+        if keywords_to_encrypt is not None:
+            self.keywords_to_encrypt = list(keywords_to_encrypt)
+        if vendor_message is not None:
+            self.vendor_message = vendor_message
 
-        # write logfile
-        sh_logger.debug(f"write logfile to file: {self.logfile_fullpath}")
-        with open(self.logfile_fullpath, 'w', encoding='utf-8', errors='ignore') as logfile:
-            for line in self.log_text:
-                logfile.write(line + '\n')
+        if expiry_date in ('0', None, False):
+            self.expiry_date = None
+        elif isinstance(expiry_date, datetime):
+            self.expiry_date = expiry_date
+        else:
+            try:
+                self.expiry_date = datetime.strptime(expiry_date, '%m/%d/%Y')
+            except ValueError:
+                raise ConfigurationError(f"The expiry date {expiry_date} is not in the format mm/dd/yyyy") from None
+        if self.expiry_date is not None and datetime.today() > self.expiry_date:
+            sh_logger.warning(f"The expiry date {self.expiry_date.strftime('%d. %B %Y')} is in the past.")
+        if partial and self.expiry_date is not None:
+            raise ConfigurationError("Keywords can only be encrypted partially without expiry date, since *VENDOR has to contain whole keywords")
+        self.partial = partial
+
+        if key_length not in self.LS_DYNA_USER_IDS:
+            raise ConfigurationError(f"Encryption key length {key_length} not available/not known. Supported: {sorted(self.LS_DYNA_USER_IDS)}")
+        self.key_length: int = key_length
+        self.ls_dyna_user_id = self.LS_DYNA_USER_IDS[key_length]
+
+        self.max_concurrency: int = max_concurrency
+        # created in the running event loop on first use
+        self._semaphore = None
+        if backend not in ENCRYPTION_BACKENDS:
+            raise ConfigurationError(f"Unknown encryption backend {backend}. Available: {', '.join(ENCRYPTION_BACKENDS)}")
+        if keyring not in KEYRINGS:
+            raise ConfigurationError(f"Unknown keyring {keyring}. Available: {', '.join(KEYRINGS)}")
+        if keyring == 'ephemeral' and ENCRYPTION_BACKENDS[backend] is GpgBackend:
+            self.backend: EncryptionBackend = KeyRegistry.gpg_backend(key_length)
+        else:
+            self.backend: EncryptionBackend = ENCRYPTION_BACKENDS[backend](recipient=self.ls_dyna_user_id)
+        self.encrypted_keywords: int = 0
+        # the input is processed in windows of about this size, a window always ends before a keyword
+        self.window_bytes: int = 16 * 1024 * 1024
+
+    # ==============================================================================
+    @property
+    def semaphore(self):
+        # an asyncio.Semaphore. asyncio is only imported if the async API is used, it takes longer to import than the rest of the module
+        import asyncio
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    # ==============================================================================
+    async def check_gpg_key(self):
+        """
+        Checks once per process and GnuPG home if the key is imported in gpg. Raises EncryptionKeyError if not.
+        """
+        import asyncio
+        if not isinstance(self.backend, GpgBackend):
+            return
+        checked_key = (self.backend.homedir or os.environ.get('GNUPGHOME'), self.backend.recipient)
+        if checked_key in self.checked_gpg_keys:
+            return
+        process = await asyncio.create_subprocess_exec(*self.backend.base_command(), '-k', self.backend.recipient,
+                                                       stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        if await process.wait() != 0:
+            raise EncryptionKeyError(f"The LS-Dyna key {self.backend.recipient} is not imported in gpg. "
+                               "Please refer to https://ftp.lstc.com/anonymous/outgoing/support/FAQ/Instructions_encryption")
+        self.checked_gpg_keys.add(checked_key)
+
+    # ==============================================================================
+    async def encrypt_payload(self, payload: bytes) -> List[str]:
+        async with self.semaphore:
+            return await self.backend.encrypt_async(payload)
+
+    # ==============================================================================
+    async def encrypt_lines(self, lines: List[str], long_format: Optional[bool] = None) -> List[str]:
+        """
+        Returns the output lines for the given input lines. All keywords of the lines are encrypted concurrently.
+
+        :param long_format: If the deck is in the long format (*KEYWORD LONG=Y). None = detected from the lines, which only works if they are the start of the deck.
+        """
+        import asyncio
+        # same as LS_Dyna_Encryptor.iter_output_lines, None is the placeholder for an encrypted keyword
+        pending = []
+        payloads = []
+        # set for every call, the instance may encrypt other decks concurrently. The keywords are split before the first await.
+        if long_format is None:
+            self.check_long_format(lines)
+        elif self.partial:
+            self.card_parser.long_format = long_format
+        for to_encrypt, data in self.iter_keyword_segments(lines):
+            if not to_encrypt:
+                pending.extend(data)
+                continue
+            clear, enc_data, comments_after_enc_data = self.split_keyword(data)
+            pending.extend(clear)
+            if not enc_data:
+                continue
+            payloads.append(self.build_payload(enc_data))
+            pending.append(None)
+            pending.extend(comments_after_enc_data)
+
+        self.encrypted_keywords += len(payloads)
+        encrypted_keywords = iter(await asyncio.gather(*(self.encrypt_payload(payload) for payload in payloads)))
+        output_lines = []
+        for line in pending:
+            if line is None:
+                output_lines.extend(next(encrypted_keywords))
+            else:
+                output_lines.append(line)
+        return output_lines
+
+    # ==============================================================================
+    async def encrypt_bytes(self, data: bytes) -> bytes:
+        """
+        Encrypts the content of a keyword file and returns the encrypted file including the header.
+        """
+        await self.check_gpg_key()
+        output_lines = await self.encrypt_lines(data.decode('utf-8', errors='ignore').splitlines())
+        return ''.join(line + '\n' for line in [self.build_header(), *output_lines]).encode('utf-8', errors='ignore')
+
+    # ==============================================================================
+    async def encrypt_stream(self, reader: AsyncIterable[bytes], writer):
+        """
+        Reads the lines of a keyword file from the reader and writes the encrypted file to the writer window by window, so the memory does not grow with the size of the file.
+
+        :param reader: An async iterable of lines as bytes, e.g. an asyncio.StreamReader or the content of an aiohttp request.
+        :param writer: An object with a write method, e.g. an asyncio.StreamWriter (drain is awaited) or an aiohttp StreamResponse (write is awaited).
+        """
+        await self.check_gpg_key()
+        await self.write(writer, [self.build_header()])
+
+        window = []
+        window_bytes = 0
+        # detected once in the first window, the later windows do not contain the *KEYWORD line
+        long_format = None
+        async for line in reader:
+            line = line.decode('utf-8', errors='ignore').rstrip('\r\n')
+            # a window is only encrypted before a new keyword, so a keyword is never split between two windows
+            if window_bytes >= self.window_bytes and line[:1] == '*':
+                if long_format is None:
+                    long_format = self.is_long_format(window)
+                await self.write(writer, await self.encrypt_lines(window, long_format=long_format))
+                window, window_bytes = [], 0
+            window.append(line)
+            window_bytes += len(line)
+        await self.write(writer, await self.encrypt_lines(window, long_format=long_format))
+
+    # ==============================================================================
+    @staticmethod
+    async def write(writer, lines: List[str]):
+        import inspect
+        if not lines:
+            return
+        result = writer.write(''.join(line + '\n' for line in lines).encode('utf-8', errors='ignore'))
+        if inspect.isawaitable(result):
+            await result
+        elif hasattr(writer, 'drain'):
+            await writer.drain()
 
 # ==============================================================================
 # defs
 # ==============================================================================
 def start_args():
+    import argparse
     my_parser = argparse.ArgumentParser(prog=f'{sys.argv[0]}', description='Encrypt LS-Dyna Material Data', allow_abbrev=False) 
     my_parser.version = __version__
-    my_parser.add_argument('inputfile', type=str, help='specify the inputfiles to evaluate')
-    my_parser.add_argument('-o', '--outfile', type=str, help='specify the name of the outputfile. Default = inputfile + .asc')
+    my_parser.add_argument('inputfiles', type=str, nargs='+', help='specify the inputfiles to evaluate. Glob patterns and directories (searched recursively) are accepted as well')
+    my_parser.add_argument('-o', '--outfile', type=str, help='specify the name of the outputfile. Only possible for a single inputfile. Default = inputfile + .asc')
+    my_parser.add_argument('-od', '--outdir', type=str, help='specify a directory for the outputfiles. The structure of input directories is mirrored. Default = next to the inputfiles')
     # day_in_three_year = datetime.today() + timedelta(days=3*365) # 3 years
     my_parser.add_argument('-ed', '--expiry_date', type=str, default='0', help='specify the date when the encrypted file should expire. Format must be mm/dd/yyyy')
     key_lengths = [1024, 2048]
-    my_parser.add_argument('-kl', '--key_length', type=int, choices=key_lengths, default=key_lengths[0], help='specify the key-length to use')
+    my_parser.add_argument('-kl', '--key_length', type=int, choices=key_lengths, action='append',
+                           help=f'specify the key-length to use. Default = {key_lengths[0]}. Given twice (-kl 1024 -kl 2048), the inputfiles are read once and encrypted for both keys, '
+                                'the outfiles then get the key length in their name (e.g. test.key.2048.asc)')
+    my_parser.add_argument('--keyring', type=str, choices=list(KEYRINGS), default='user',
+                           help="specify where gpg finds the LS-Dyna keys. 'ephemeral' imports the public keys shipped with this tool into a temporary GnuPG home, "
+                                "so they do not have to be imported by the user. Default = user")
+    my_parser.add_argument('-s', '--stream', action='store_true', help='read, encrypt and write the file incrementally to keep the memory usage low for very large files')
+    my_parser.add_argument('-m', '--mmap', action='store_true', help='memory map the file and copy everything that is not encrypted in large chunks. Fastest mode for large files')
+    my_parser.add_argument('-j', '--jobs', type=int, default=1, help='specify the number of parallel gpg sessions. 0 uses one per CPU. Default = 1')
+    my_parser.add_argument('-c', '--cache_dir', type=str, help='specify a directory to cache encrypted keywords. Unchanged keywords are taken from the cache')
+    my_parser.add_argument('--cache_size', type=int, default=512, help='specify the maximum size of the cache in MB. Default = 512')
+    my_parser.add_argument('--manifest', type=str, help='specify a JSON file to record the hashes of all encrypted files and keywords. Default = lsdyna_encrypt_manifest.json in the outdir with --incremental')
+    my_parser.add_argument('--includes', type=str, choices=list(LS_Dyna_Include_Encryptor.INCLUDE_MODES),
+                           help="also encrypt all files included by the inputfiles (*INCLUDE, *INCLUDE_PATH), every file once. 'mirror' writes the encrypted files with the same names to --outdir, 'merge' writes one self-contained deck per inputfile to --outdir")
+    my_parser.add_argument('-i', '--incremental', action='store_true', help='skip files that did not change since the last run and only encrypt the changed keywords of changed files')
+    my_parser.add_argument('-p', '--partial', action='store_true', help='encrypt the keywords partially: the keyword line and e.g. the card with the LCID of a curve stay in clear text. Only without expiry date')
+    my_parser.add_argument('-b', '--backend', type=str, choices=list(ENCRYPTION_BACKENDS), default='gpg', help="specify the encryption backend. 'native' encrypts without the gpg binary and needs the package cryptography. Default = gpg")
+    my_parser.add_argument('--reuse_session_key', action='store_true', help='encrypt all keywords of a file with one session key, so the public-key step runs once per file. Only with --backend native')
+    my_parser.add_argument('--compress', type=str, choices=list(OUTPUT_COMPRESSIONS), action='append',
+                           help="also write a compressed copy of every outfile (<outfile>.gz or .zst) for archiving. Can be given twice. 'zstd' needs the package zstandard")
+    my_parser.add_argument('--index', action='store_true', help='keep an index of the keywords next to every inputfile (.<name>.kwindex.json), so an unchanged file is not scanned again')
+    my_parser.add_argument('--profile', action='store_true', help='print the time per stage, the throughput and the gpg latency and write them as JSON next to the logfile')
+    my_parser.add_argument('--verify', action='store_true',
+                           help='do not encrypt, check the existing outfiles against the inputfiles instead: every keyword to encrypt is a PGP message with a valid checksum '
+                                'for the LS-Dyna key and everything else is unchanged. Nothing is decrypted, --jobs files are checked in parallel')
+    existing_group = my_parser.add_mutually_exclusive_group()
+    existing_group.add_argument('--overwrite', dest='existing', action='store_const', const='overwrite', help='overwrite existing outfiles and logfiles without asking')
+    existing_group.add_argument('--skip_existing', dest='existing', action='store_const', const='skip', help='skip the inputfiles whose outfile or logfile already exists')
+    existing_group.add_argument('--fail_existing', dest='existing', action='store_const', const='fail', help='let the inputfiles fail whose outfile or logfile already exists')
+    my_parser.add_argument('--no_input', action='store_true', help='never ask: existing outfiles fail (unless --overwrite or --skip_existing) and odd expiry dates are only warned about. For scripts and CI')
+    my_parser.add_argument('--fail_fast', action='store_true', help='stop the batch at the first failing file. Default = encrypt the other files and report all errors at the end')
     my_parser.add_argument('-ver', '--version', action='version')
     args = my_parser.parse_args()
+    args.key_length = list(dict.fromkeys(args.key_length or [key_lengths[0]]))
+
+    if args.outfile is not None and (len(args.inputfiles) > 1 or args.outdir is not None):
+        my_parser.error("--outfile can only be used with a single inputfile and without --outdir")
+    if args.outfile is not None and (args.manifest is not None or args.incremental):
+        my_parser.error("--outfile can not be used with --manifest or --incremental, use --outdir instead")
+    if args.includes is not None and args.outdir is None:
+        my_parser.error("--includes needs --outdir")
+    if args.includes == 'merge' and (args.manifest is not None or args.incremental):
+        my_parser.error("--includes merge can not be used with --manifest or --incremental")
+    if args.partial and args.expiry_date != '0':
+        my_parser.error("--partial can only be used without expiry date (-ed 0)")
+    if args.reuse_session_key and args.backend != NativeOpenPGPBackend.name:
+        my_parser.error("--reuse_session_key can only be used with --backend native")
+    if len(args.key_length) > 1 and (args.manifest is not None or args.incremental or args.includes is not None):
+        my_parser.error("several key lengths can not be used with --manifest, --incremental or --includes")
+    if args.verify and args.includes == 'merge':
+        my_parser.error("--verify can only check the files of --includes mirror")
 
     sh_logger.debug(f"start arguments: {vars(args)}")
 
-    return args.inputfile, args.outfile, args.expiry_date, args.key_length
+    return args
+
+# ==============================================================================
+def policy_from_args(args) -> EncryptionPolicy:
+    default_existing = 'fail' if args.no_input else 'ask'
+    return EncryptionPolicy(existing=args.existing or default_existing, odd_expiry_date='warn' if args.no_input else 'ask', fail_fast=args.fail_fast)
 
 # ==============================================================================
 # ==============================================================================
 if __name__ == '__main__':
+    setup_logging()
     # start the argument parser, read the arguments from CLI and set the variables
-    inputfile, outfile, expiry_date, key_length = start_args()
+    args = start_args()
+    policy = policy_from_args(args)
     print()
-    lsdyna_me = LS_Dyna_Encryptor(inputfile=inputfile, outfile=outfile, expiry_date=expiry_date, key_length=key_length)
-    lsdyna_me.encrypt_file()
+    # errors end the program with exit code 1, failed files of a batch as well
+    exit_code = 0
+    try:
+        batch_kwargs = dict(inputs=args.inputfiles, outdir=args.outdir, expiry_date=args.expiry_date, key_length=args.key_length, max_workers=args.jobs or None,
+                            cache_dir=args.cache_dir, manifest=args.manifest, incremental=args.incremental, profile_json=args.profile, backend=args.backend,
+                            reuse_session_key=args.reuse_session_key, partial=args.partial, keyword_index=args.index, policy=policy,
+                            compress=args.compress or (), keyring=args.keyring)
+        if args.verify:
+            # the outfiles are checked, nothing is encrypted
+            if args.includes is not None:
+                lsdyna_batch = LS_Dyna_Include_Encryptor(mode=args.includes, **batch_kwargs)
+            else:
+                lsdyna_batch = LS_Dyna_Batch_Encryptor(**batch_kwargs)
+            if args.outfile is not None:
+                lsdyna_batch.inputfiles = [(inputfile, pathlib.Path(args.outfile).resolve()) for inputfile, _ in lsdyna_batch.inputfiles]
+            lsdyna_batch.verify_files()
+            if lsdyna_batch.failed_files:
+                exit_code = 1
+        elif len(args.inputfiles) == 1 and args.outdir is None and args.includes is None and args.manifest is None and not args.incremental and not os.path.isdir(args.inputfiles[0]):
+            # a single file is encrypted directly, everything else as batch
+            lsdyna_me = LS_Dyna_Encryptor(inputfile=args.inputfiles[0], outfile=args.outfile, expiry_date=args.expiry_date, key_length=args.key_length,
+                                          max_workers=args.jobs or None, cache_dir=args.cache_dir, backend=args.backend,
+                                          reuse_session_key=args.reuse_session_key, partial=args.partial, keyword_index=args.index, policy=policy,
+                                          compress=args.compress or (), keyring=args.keyring)
+            if lsdyna_me.cache is not None:
+                lsdyna_me.cache.max_bytes = args.cache_size * 1024 * 1024
+            lsdyna_me.profile_json = args.profile
+            lsdyna_me.encrypt_file(stream=args.stream, mapped=args.mmap)
+            if args.profile and not lsdyna_me.skipped:
+                sh_logger.log(PRINT, lsdyna_me.profile.summary())
+        else:
+            if args.includes is not None:
+                lsdyna_batch = LS_Dyna_Include_Encryptor(mode=args.includes, **batch_kwargs)
+            else:
+                lsdyna_batch = LS_Dyna_Batch_Encryptor(**batch_kwargs)
+            if lsdyna_batch.cache is not None:
+                lsdyna_batch.cache.max_bytes = args.cache_size * 1024 * 1024
+            lsdyna_batch.encrypt_files(stream=args.stream, mapped=args.mmap)
+            if args.profile:
+                sh_logger.log(PRINT, lsdyna_batch.profile.summary())
+            if lsdyna_batch.failed_files:
+                exit_code = 1
+    except UserCanceledError as error:
+        sh_logger.info(f"{error} Exiting...")
+    except EncryptionError as error:
+        sh_logger.error(f"{error}. Exiting...")
+        exit_code = 1
     print()
+    sys.exit(exit_code)
@@ -0,0 +1,51 @@
+import os
+import re
+import sys
+import shutil
+import pathlib
+import subprocess
+
+import pytest
+
+# make the encryptor importable without installing it, like the benchmarks do
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'python-lsdyna_encrypt'))
+
+
+def run_gpg(homedir, *args, data: bytes = b'') -> subprocess.CompletedProcess:
+    return subprocess.run(['gpg', '--homedir', str(homedir), '--batch', *args], input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+@pytest.fixture(scope='session')
+def test_key(tmp_path_factory):
+    """
+    A throwaway DSA/ElGamal key like the LS-Dyna keys in a temporary GnuPG home, the secret key is there as well.
+    Returns (GnuPG home, fingerprint of the primary key, long id of the ElGamal subkey, armored public key).
+    """
+    if shutil.which('gpg') is None:
+        pytest.skip("gpg is not installed")
+    homedir = tmp_path_factory.mktemp('gnupg')
+    os.chmod(homedir, 0o700)
+    run_gpg(homedir, '--passphrase', '', '--quick-gen-key', 'Native Backend Test <native@example.com>', 'dsa1024', 'sign', 'never').check_returncode()
+    fingerprint = re.search(r'^fpr:+([0-9A-F]+):', run_gpg(homedir, '--with-colons', '--list-keys', 'native@example.com').stdout.decode(), re.M).group(1)
+    run_gpg(homedir, '--passphrase', '', '--quick-add-key', fingerprint, 'elg1024', 'encr', 'never').check_returncode()
+    listing = run_gpg(homedir, '--with-colons', '--list-keys', fingerprint).stdout.decode()
+    subkey_id = re.search(r'^sub:[^:]*:\d+:16:([0-9A-F]{16}):', listing, re.M).group(1)
+    public_key = run_gpg(homedir, '--armor', '--export', fingerprint).stdout.decode()
+    yield homedir, fingerprint, subkey_id, public_key
+    subprocess.run(['gpgconf', '--homedir', str(homedir), '--kill', 'all'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.fixture(scope='session')
+def decrypt(test_key):
+    """
+    Returns a function that decrypts one armored message with the secret key of test_key.
+    """
+    homedir = test_key[0]
+
+    def decrypt_armor(armor: str) -> bytes:
+        # the messages have no modification detection code, like the ones of gpg --rfc2440
+        result = run_gpg(homedir, '--ignore-mdc-error', '--decrypt', data=armor.encode())
+        assert result.returncode == 0, result.stderr.decode()
+        # the literal data is in text mode
+        return result.stdout.replace(b'\r\n', b'\n')
+    return decrypt_armor
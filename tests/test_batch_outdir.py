@@ -0,0 +1,62 @@
+"""
+The outfiles of LS_Dyna_Batch_Encryptor in an outdir: inputfiles with the same name are kept apart and two inputfiles are never written to the same outfile.
+The native backend encrypts for the LS-Dyna keys shipped with the encryptor (no gpg keyring needed).
+"""
+import pytest
+
+from encrypt_lsdyna import LS_Dyna_Batch_Encryptor, ConfigurationError
+
+pytest.importorskip('cryptography')
+
+
+def write_deck(path, node_id: int):
+    # the node id tells the outfiles apart, it stays in clear text
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"*KEYWORD\n*DEFINE_CURVE\n1\n0.0,0.0\n*NODE\n{node_id:8d}       0.0       0.0       0.0\n*END\n")
+
+
+def test_single_files_with_the_same_name(tmp_path):
+    write_deck(tmp_path / 'a' / 'mat.k', 1)
+    write_deck(tmp_path / 'c' / 'mat.k', 2)
+    batch = LS_Dyna_Batch_Encryptor(inputs=[str(tmp_path / 'a' / 'mat.k'), str(tmp_path / 'c' / 'mat.k')], outdir=str(tmp_path / 'out'),
+                                    expiry_date='0', backend='native')
+    # relative to the common directory of the single files
+    assert [outfile for _, outfile in batch.inputfiles] == [tmp_path / 'out' / 'a' / 'mat.k.asc', tmp_path / 'out' / 'c' / 'mat.k.asc']
+    batch.encrypt_files()
+    assert not batch.failed_files
+    assert f"{1:8d}       0.0" in (tmp_path / 'out' / 'a' / 'mat.k.asc').read_text()
+    assert f"{2:8d}       0.0" in (tmp_path / 'out' / 'c' / 'mat.k.asc').read_text()
+    assert not (tmp_path / 'out' / 'mat.k.asc').exists()
+
+
+@pytest.mark.parametrize('single_first', [False, True])
+def test_directory_and_glob(tmp_path, single_first):
+    write_deck(tmp_path / 'model' / 'mat.k', 1)
+    write_deck(tmp_path / 'model' / 'parts' / 'mat.k', 2)
+    write_deck(tmp_path / 'single' / 'curves.k', 3)
+    inputs = [str(tmp_path / 'model'), str(tmp_path / 'single' / '*.k')]
+    inputs.insert(0 if single_first else len(inputs), str(tmp_path / 'model' / 'mat.k'))
+    batch = LS_Dyna_Batch_Encryptor(inputs=inputs, outdir=str(tmp_path / 'out'), expiry_date='0', backend='native')
+    # a directory keeps its structure, a file given twice is encrypted once and keeps its path in the directory
+    assert sorted(batch.inputfiles) == [
+        (tmp_path / 'model' / 'mat.k', tmp_path / 'out' / 'mat.k.asc'),
+        (tmp_path / 'model' / 'parts' / 'mat.k', tmp_path / 'out' / 'parts' / 'mat.k.asc'),
+        (tmp_path / 'single' / 'curves.k', tmp_path / 'out' / 'curves.k.asc'),
+    ]
+
+
+def test_without_outdir(tmp_path):
+    write_deck(tmp_path / 'a' / 'mat.k', 1)
+    batch = LS_Dyna_Batch_Encryptor(inputs=[str(tmp_path / 'a' / 'mat.k')], expiry_date='0', backend='native')
+    assert batch.inputfiles == [(tmp_path / 'a' / 'mat.k', None)]
+
+
+def test_duplicate_outfiles(tmp_path):
+    # the mat.k of the directory and the single file other/mat.k would both be written to out/mat.k.asc
+    write_deck(tmp_path / 'model' / 'mat.k', 1)
+    write_deck(tmp_path / 'other' / 'mat.k', 2)
+    with pytest.raises(ConfigurationError, match='would both be written to'):
+        LS_Dyna_Batch_Encryptor(inputs=[str(tmp_path / 'model'), str(tmp_path / 'other' / 'mat.k')], outdir=str(tmp_path / 'out'),
+                                expiry_date='0', backend='native')
+    # nothing is encrypted
+    assert not (tmp_path / 'out').exists()
@@ -0,0 +1,76 @@
+"""
+Merging of *INCLUDE trees by LS_Dyna_Include_Encryptor: the encrypted keywords of the master and of the included files end up in the merged deck.
+gpg encrypts for the throwaway key of conftest.test_key, so the merged deck can be decrypted.
+"""
+import re
+import datetime
+
+import pytest
+
+from encrypt_lsdyna import LS_Dyna_Encryptor_Base, LS_Dyna_Include_Encryptor, EncryptionPolicy
+
+ARMOR_REGEX = re.compile(r'-----BEGIN PGP MESSAGE-----.*?-----END PGP MESSAGE-----', re.S)
+
+MASTER = """*KEYWORD
+*INCLUDE_PATH
+lib
+*DEFINE_CURVE
+1
+0.0,0.0
+1.0,1.0
+*INCLUDE
+curves.k
+*DEFINE_TABLE
+10
+0.1,1
+*NODE
+1 0.0 0.0 0.0
+*END
+"""
+# the curves right after *KEYWORD, the encrypted keyword belongs to the block of *KEYWORD in the index of the encrypted file
+INCLUDED = """*KEYWORD
+*DEFINE_CURVE_TITLE
+included
+2
+0.0,0.0
+$ comment after the curve
+*DEFINE_CURVE
+3
+0.0,0.0
+*END
+"""
+
+
+@pytest.fixture
+def gpg_test_key(test_key, monkeypatch):
+    # the 1024 bit LS-Dyna key is replaced by the test key in its GnuPG home
+    homedir, fingerprint, _, _ = test_key
+    monkeypatch.setenv('GNUPGHOME', str(homedir))
+    monkeypatch.setitem(LS_Dyna_Encryptor_Base.LS_DYNA_USER_IDS, 1024, f"0x{fingerprint[-8:]}")
+
+
+@pytest.mark.parametrize('expiry', [False, True], ids=['no_expiry_date', 'expiry_date'])
+def test_merge(tmp_path, gpg_test_key, decrypt, expiry):
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'master.k').write_text(MASTER)
+    (tmp_path / 'lib' / 'curves.k').write_text(INCLUDED)
+    expiry_date = (datetime.date.today() + datetime.timedelta(days=365)).strftime('%m/%d/%Y') if expiry else '0'
+
+    pipeline = LS_Dyna_Include_Encryptor(inputs=[str(tmp_path / 'master.k')], outdir=str(tmp_path / 'out'), mode='merge', expiry_date=expiry_date,
+                                         policy=EncryptionPolicy(existing='fail', odd_expiry_date='fail'))
+    pipeline.encrypt_files()
+    assert not pipeline.failed_files
+
+    merged = (tmp_path / 'out' / 'master.k').read_text()
+    payloads = [decrypt(armor).decode() for armor in ARMOR_REGEX.findall(merged)]
+    # the keywords of the master and of the included file in the order of the deck, each with its own *VENDOR
+    assert [[line for line in payload.splitlines() if line.startswith('*DEFINE')] for payload in payloads] == [
+        ['*DEFINE_CURVE'], ['*DEFINE_CURVE_TITLE'], ['*DEFINE_CURVE'], ['*DEFINE_TABLE']]
+    assert sum(payload.count('*VENDOR\n') for payload in payloads) == (len(payloads) if expiry else 0)
+    assert merged.count('*VENDOR') == 0
+
+    clear = ARMOR_REGEX.sub('', merged)
+    assert '*DEFINE' not in clear
+    assert '*INCLUDE' not in clear.replace('$ *INCLUDE curves.k', '')
+    assert '$ comment after the curve' in clear
+    assert clear.count('*KEYWORD') == 1 and clear.count('*END') == 1 and '*NODE' in clear
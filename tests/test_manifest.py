@@ -0,0 +1,97 @@
+"""
+Incremental runs of LS_Dyna_Batch_Encryptor with the EncryptionManifest: unchanged files are skipped and the encrypted keywords of changed files are reused.
+The native backend encrypts for the LS-Dyna keys shipped with the encryptor (no gpg keyring needed).
+"""
+import re
+import datetime
+
+import pytest
+
+from encrypt_lsdyna import LS_Dyna_Batch_Encryptor, EncryptionManifest
+
+pytest.importorskip('cryptography')
+
+ARMOR_REGEX = re.compile(r'-----BEGIN PGP MESSAGE-----.*?-----END PGP MESSAGE-----', re.S)
+
+
+def deck(curve_ids) -> str:
+    curves = ''.join(f"*DEFINE_CURVE\n{curve_id}\n0.0,0.0\n1.0,{curve_id}.0\n" for curve_id in curve_ids)
+    return f"*KEYWORD\n{curves}*NODE\n       1       0.0       0.0       0.0\n*END\n"
+
+
+@pytest.fixture
+def model(tmp_path):
+    (tmp_path / 'model').mkdir()
+    (tmp_path / 'model' / 'a.k').write_text(deck([1, 2, 3]))
+    (tmp_path / 'model' / 'b.k').write_text(deck([4, 5, 6, 7]))
+    return tmp_path
+
+
+def run(tmp_path, expiry_date='0') -> LS_Dyna_Batch_Encryptor:
+    batch = LS_Dyna_Batch_Encryptor(inputs=[str(tmp_path / 'model')], outdir=str(tmp_path / 'out'), expiry_date=expiry_date, backend='native', incremental=True)
+    batch.encrypt_files()
+    assert not batch.failed_files
+    return batch
+
+
+def armors(path) -> list:
+    return ARMOR_REGEX.findall(path.read_text())
+
+
+def encrypted(batch) -> dict:
+    # (encrypted keywords, reused keywords) by the name of the inputfile
+    return {encryptor.inputfile_fullpath.name: (encryptor.encrypted_keywords, encryptor.reused_keywords) for encryptor in batch.encryptors}
+
+
+def test_first_run(model):
+    batch = run(model)
+    assert encrypted(batch) == {'a.k': (3, 0), 'b.k': (4, 0)}
+    manifest = EncryptionManifest(str(model / 'out' / 'lsdyna_encrypt_manifest.json'))
+    entry = manifest.entry(model / 'model' / 'b.k')
+    assert entry['outfile'] == str(model / 'out' / 'b.k.asc')
+    assert len(entry['keywords']) == 4 and entry['expiry_date'] == 'never'
+
+
+def test_unchanged_files_are_skipped(model):
+    run(model)
+    outfiles = {name: (model / 'out' / name).read_bytes() for name in ('a.k.asc', 'b.k.asc')}
+    batch = run(model)
+    assert sorted(path.name for path in batch.skipped_files) == ['a.k', 'b.k']
+    assert batch.encryptors == []
+    assert {name: (model / 'out' / name).read_bytes() for name in outfiles} == outfiles
+
+
+def test_changed_file_reuses_blocks(model):
+    run(model)
+    former = armors(model / 'out' / 'b.k.asc')
+    (model / 'model' / 'b.k').write_text(deck([4, 5, 16, 7]))
+    batch = run(model)
+    assert [path.name for path in batch.skipped_files] == ['a.k']
+    assert encrypted(batch) == {'b.k': (4, 3)}
+    # the unchanged curves keep their encrypted keywords, only the changed one is encrypted again
+    current = armors(model / 'out' / 'b.k.asc')
+    assert [armor == former_armor for armor, former_armor in zip(current, former)] == [True, True, False, True]
+    # the next run skips the file again
+    assert [path.name for path in run(model).skipped_files] == ['a.k', 'b.k']
+
+
+def test_changed_settings(model):
+    run(model)
+    former = armors(model / 'out' / 'a.k.asc')
+    # the expiry date is part of the encrypted keywords (*VENDOR), nothing can be reused
+    expiry_date = (datetime.date.today() + datetime.timedelta(days=365)).strftime('%m/%d/%Y')
+    batch = run(model, expiry_date=expiry_date)
+    assert batch.skipped_files == []
+    assert encrypted(batch) == {'a.k': (3, 0), 'b.k': (4, 0)}
+    assert not set(armors(model / 'out' / 'a.k.asc')) & set(former)
+
+
+def test_changed_outfile(model):
+    run(model)
+    outfile = model / 'out' / 'a.k.asc'
+    outfile.write_text(outfile.read_text().replace('*NODE', '*NODE\n$ edited'))
+    batch = run(model)
+    # the outfile is written again, the encrypted keywords in it are still the ones of the manifest
+    assert [path.name for path in batch.skipped_files] == ['b.k']
+    assert encrypted(batch) == {'a.k': (3, 3)}
+    assert '$ edited' not in outfile.read_text()
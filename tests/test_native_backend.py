@@ -0,0 +1,82 @@
+"""
+Round trip of the NativeOpenPGPBackend with gpg: the payloads are encrypted in Python for the throwaway key of conftest.test_key and decrypted by gpg.
+The secret keys of LS-Dyna are not available, so their keys are only used for the packet structure.
+"""
+import shutil
+
+import pytest
+
+from encrypt_lsdyna import LS_Dyna_Encryptor, NativeOpenPGPBackend, dearmor, iter_packets
+
+pytest.importorskip('cryptography')
+pytestmark = pytest.mark.skipif(shutil.which('gpg') is None, reason="gpg is not installed")
+
+
+def session_key_packet(lines) -> bytes:
+    return next(iter_packets(dearmor('\n'.join(lines))))[1]
+
+
+PAYLOADS = [
+    b'*DEFINE_CURVE\n1\n0.0,0.0\n1.0,2.0\n',
+    b'',
+    # larger than one packet with a 2-byte length
+    ''.join(f"{i * 0.1:20.6f}{i * 0.2:20.6f}\n" for i in range(2000)).encode(),
+]
+
+
+@pytest.mark.parametrize('payload', PAYLOADS, ids=['curve', 'empty', 'large'])
+def test_round_trip(test_key, decrypt, payload):
+    _, fingerprint, _, public_key = test_key
+    backend = NativeOpenPGPBackend(recipient=fingerprint[-8:], public_keys=[public_key])
+    assert decrypt('\n'.join(backend.encrypt(payload))) == payload
+
+
+def test_packet_structure(test_key):
+    _, fingerprint, subkey_id, public_key = test_key
+    backend = NativeOpenPGPBackend(recipient=fingerprint[-8:], public_keys=[public_key])
+    packets = list(iter_packets(dearmor('\n'.join(backend.encrypt(PAYLOADS[0])))))
+    # public-key encrypted session key (version 3, ElGamal) for the subkey and symmetrically encrypted data
+    assert [tag for tag, _ in packets] == [1, 9]
+    session_key = packets[0][1]
+    assert session_key[0] == 3
+    assert session_key[1:9].hex().upper() == subkey_id
+    assert session_key[9] == 16
+
+
+def test_armor_checksum(test_key):
+    _, fingerprint, _, public_key = test_key
+    lines = NativeOpenPGPBackend(recipient=fingerprint[-8:], public_keys=[public_key]).encrypt(PAYLOADS[0])
+    assert lines[0] == '-----BEGIN PGP MESSAGE-----' and lines[-1] == '-----END PGP MESSAGE-----' and lines[-2].startswith('=')
+    # one changed character of the body does not match the CRC-24 checksum anymore
+    body = lines[2]
+    lines[2] = ('B' if body[0] == 'A' else 'A') + body[1:]
+    with pytest.raises(ValueError):
+        dearmor('\n'.join(lines))
+
+
+def test_reused_session_key(test_key, decrypt):
+    _, fingerprint, _, public_key = test_key
+    backend = NativeOpenPGPBackend(recipient=fingerprint[-8:], public_keys=[public_key], reuse_session_key=True)
+    payloads = [f"*DEFINE_CURVE\n{i}\n0.0,{i}.0\n".encode() for i in range(5)]
+    messages = [backend.encrypt(payload) for payload in payloads]
+    # one session key packet for all messages of the file, but every message is complete and decrypts on its own
+    assert len({session_key_packet(message) for message in messages}) == 1
+    assert len({'\n'.join(message) for message in messages}) == len(messages)
+    for payload, message in zip(payloads, messages):
+        assert decrypt('\n'.join(message)) == payload
+
+    # the next file gets a new session key
+    backend.new_session()
+    message = backend.encrypt(payloads[0])
+    assert session_key_packet(message) != session_key_packet(messages[0])
+    assert decrypt('\n'.join(message)) == payloads[0]
+
+
+def test_ls_dyna_keys():
+    # the shipped LS-Dyna keys are found by their user ids and used through their ElGamal subkey
+    for key_length, recipient in LS_Dyna_Encryptor.LS_DYNA_USER_IDS.items():
+        backend = NativeOpenPGPBackend(recipient=recipient)
+        packets = list(iter_packets(dearmor('\n'.join(backend.encrypt(PAYLOADS[0])))))
+        assert [tag for tag, _ in packets] == [1, 9]
+        # the ElGamal value of the session key has the size of the key
+        assert key_length - 8 < int.from_bytes(packets[0][1][10:12], 'big') <= key_length
@@ -0,0 +1,94 @@
+"""
+LS_Dyna_Output_Verifier on outfiles of the native backend, which encrypts for the LS-Dyna keys shipped with the encryptor (no gpg keyring needed).
+"""
+import pytest
+
+from encrypt_lsdyna import LS_Dyna_Encryptor, LS_Dyna_Output_Verifier, KeyRegistry
+
+pytest.importorskip('cryptography')
+
+DECK = """*KEYWORD
+$ material data
+*DEFINE_CURVE
+1
+0.0,0.0
+1.0,2.0
+*NODE
+       1       0.0       0.0       0.0
+       2       1.0       0.0       0.0
+*DEFINE_TABLE_COMPACT
+2
+0.1,1
+$ comment after the table
+*DEFINE_CURVE_TITLE
+title
+3
+0.0,0.0
+*END
+"""
+
+
+@pytest.fixture
+def encrypted(tmp_path):
+    """
+    Returns (inputfile, outfile) of the encrypted DECK.
+    """
+    inputfile = tmp_path / 'deck.k'
+    inputfile.write_text(DECK)
+    lde = LS_Dyna_Encryptor(inputfile=str(inputfile), expiry_date='0', backend='native')
+    lde.show_progress = False
+    lde.encrypt_file()
+    return inputfile, tmp_path / 'deck.k.asc'
+
+
+def verify(inputfile, outfile, **kwargs):
+    return LS_Dyna_Output_Verifier(key_ids=[KeyRegistry.key(1024).key_id], **kwargs).verify(inputfile, outfile)
+
+
+def test_ok(encrypted):
+    result = verify(*encrypted)
+    assert result.ok, result.errors
+    assert result.blocks == 3
+    assert result.key_ids == (KeyRegistry.key(1024).key_id,)
+
+
+def test_other_key(encrypted):
+    result = LS_Dyna_Output_Verifier(key_ids=[KeyRegistry.key(2048).key_id]).verify(*encrypted)
+    assert not result.ok
+    assert all('encrypted for the key' in error for error in result.errors)
+
+
+def test_altered_armor(encrypted):
+    inputfile, outfile = encrypted
+    lines = outfile.read_text().splitlines(keepends=True)
+    # the first line of the base64 body of the first armor
+    body = lines.index('-----BEGIN PGP MESSAGE-----\n') + 2
+    lines[body] = ('B' if lines[body][0] == 'A' else 'A') + lines[body][1:]
+    outfile.write_text(''.join(lines))
+    result = verify(inputfile, outfile)
+    assert not result.ok
+    assert len(result.errors) == 1 and 'CRC-24' in result.errors[0]
+
+
+def test_truncated_armor(encrypted):
+    inputfile, outfile = encrypted
+    text = outfile.read_text()
+    outfile.write_text(text[:text.rindex('-----END PGP MESSAGE-----')])
+    result = verify(inputfile, outfile)
+    assert not result.ok
+    assert 'not closed' in result.errors[-1]
+
+
+def test_changed_clear_text(encrypted):
+    inputfile, outfile = encrypted
+    outfile.write_text(outfile.read_text().replace('       2       1.0', '       2       1.5'))
+    result = verify(inputfile, outfile)
+    assert not result.ok
+    assert 'differs from line 9 of the inputfile' in result.errors[0]
+
+
+def test_keyword_not_encrypted(encrypted):
+    # the outfile of other keywords to encrypt does not match
+    result = verify(*encrypted, keywords_to_encrypt=['*DEFINE_CURVE*', '*DEFINE_TABLE*', '*NODE'])
+    assert not result.ok
+    assert 'PGP MESSAGE of a keyword to encrypt is missing' in result.errors[0]